@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, OTPLog
+from .models import User, OTPLog, SMSDispatch
 
 
 @admin.register(User)
@@ -39,4 +39,18 @@ class OTPLogAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
     
     def has_add_permission(self, request):
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(SMSDispatch)
+class SMSDispatchAdmin(admin.ModelAdmin):
+    """SMS dispatch queue admin"""
+    
+    list_display = ['mobile', 'status', 'attempts', 'created_at', 'sent_at', 'last_error']
+    list_filter = ['status', 'created_at']
+    search_fields = ['mobile', 'provider_reference']
+    readonly_fields = ['created_at', 'sent_at']
+    ordering = ['-created_at']
+    
+    def has_add_permission(self, request):
+        return False
@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Connects the receivers that drop cached users on save/delete
+        from . import middleware  # noqa: F401
+
+        if settings.LAST_LOGIN_WRITE_BEHIND:
+            from django.contrib.auth.models import update_last_login
+            from django.contrib.auth.signals import user_logged_in
+            from .last_login import buffer_last_login
+
+            user_logged_in.disconnect(update_last_login, dispatch_uid='update_last_login')
+            user_logged_in.connect(buffer_last_login, dispatch_uid='buffer_last_login')
@@ -0,0 +1,53 @@
+"""
+Write-behind OTPLog audit trail.
+
+The cache-backed OTP store keeps the login path free of SQL; issue and
+verify events are recorded here and written to ``otp_logs`` in batches.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .batching import BackgroundBatcher
+from .models import OTPLog
+
+ISSUED = 'issued'
+VERIFIED = 'verified'
+
+
+def _flush_otp_events(events):
+    """Write a batch of OTP events: one bulk INSERT plus one UPDATE per verification"""
+    issued = [
+        OTPLog(mobile=mobile, otp=otp, expiry=when)
+        for kind, mobile, otp, when in events if kind == ISSUED
+    ]
+    verified = [
+        (mobile, otp, when)
+        for kind, mobile, otp, when in events if kind == VERIFIED
+    ]
+
+    with transaction.atomic():
+        if issued:
+            OTPLog.objects.bulk_create(issued, batch_size=500)
+        for mobile, otp, verified_at in verified:
+            OTPLog.objects.filter(
+                mobile=mobile,
+                otp=otp,
+                verified=False
+            ).update(verified=True, verified_at=verified_at)
+
+
+otp_audit = BackgroundBatcher(
+    _flush_otp_events,
+    max_batch=500,
+    interval=1.0,
+    name='otp-audit',
+    synchronous=not getattr(settings, 'OTP_AUDIT_ASYNC', True),
+)
+
+
+def record_issued(mobile, otp, expiry):
+    otp_audit.put((ISSUED, mobile, otp, expiry))
+
+
+def record_verified(mobile, otp, verified_at):
+    otp_audit.put((VERIFIED, mobile, otp, verified_at))
@@ -0,0 +1,88 @@
+"""
+Small helper for moving non-critical writes off the request path.
+
+Items are queued in memory and handed to a flush callable in batches by a
+daemon thread, so a burst of requests turns into a handful of bulk queries.
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundBatcher:
+    """Queue items and flush them in batches from a background thread"""
+
+    def __init__(self, flush, max_batch=500, interval=1.0, name='batcher', synchronous=False):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.interval = interval
+        self.name = name
+        self.synchronous = synchronous
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        atexit.register(self.drain)
+
+    def put(self, item):
+        """Queue an item (or flush it right away in synchronous mode)"""
+        if self.synchronous:
+            self._flush_safely([item])
+            return
+        self._ensure_started()
+        self._queue.put(item)
+
+    def drain(self):
+        """Flush everything that is still queued in the calling thread"""
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._flush_safely(batch)
+
+    def _ensure_started(self):
+        # Threads do not survive a gunicorn fork, so check liveness every time
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                close_old_connections()
+                self._flush_safely(batch)
+
+    def _take_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.interval)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush_safely(self, batch):
+        try:
+            self.flush(batch)
+        except Exception:
+            logger.exception('%s: failed to flush %d item(s)', self.name, len(batch))
@@ -0,0 +1,94 @@
+"""
+Durable OTP SMS dispatch queue.
+
+``MobileLoginView`` only inserts an ``SMSDispatch`` row; the SMS worker
+(``manage.py run_sms_worker``) leases due rows, sends them and retries
+failures with exponential backoff. A leased row that is never finished
+(worker crash) becomes due again once its lease runs out. The OTP is
+cleared from a row once it is sent or has failed for good, and
+``purge_otp_logs`` deletes old rows.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SMSDispatch
+from .sms import SMSError, send_otp_sms
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_otp_sms(mobile, otp):
+    """Queue an OTP SMS and return the dispatch row"""
+    return SMSDispatch.objects.create(mobile=mobile, otp=otp)
+
+
+async def aenqueue_otp_sms(mobile, otp):
+    """Async version of enqueue_otp_sms()"""
+    return await SMSDispatch.objects.acreate(mobile=mobile, otp=otp)
+
+
+def claim_due(batch_size):
+    """Lease up to ``batch_size`` due dispatches for this worker"""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            SMSDispatch.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        SMSDispatch.objects.filter(id__in=ids).update(
+            attempts=F('attempts') + 1,
+            next_attempt_at=now + timedelta(seconds=settings.SMS_LEASE_SECONDS),
+        )
+    return list(SMSDispatch.objects.filter(id__in=ids))
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter, capped at SMS_RETRY_MAX_SECONDS"""
+    delay = settings.SMS_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+    delay = min(delay, settings.SMS_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def deliver(dispatch):
+    """Send one leased dispatch and record the outcome; returns the new status"""
+    now = timezone.now()
+
+    # An OTP that has already expired is useless to the student
+    if now > dispatch.created_at + timedelta(seconds=settings.OTP_EXPIRY_SECONDS):
+        return _finish(dispatch, 'failed', last_error='OTP expired before delivery')
+
+    try:
+        reference = send_otp_sms(dispatch.mobile, dispatch.otp)
+    except Exception as e:
+        if not isinstance(e, SMSError):
+            # Anything else is unexpected; record it and retry like a provider failure
+            logger.exception('Unexpected error delivering SMS dispatch %s', dispatch.id)
+        error = (str(e) or type(e).__name__)[:255]
+        if dispatch.attempts >= settings.SMS_MAX_ATTEMPTS:
+            return _finish(dispatch, 'failed', last_error=error)
+        return _finish(
+            dispatch, 'pending',
+            last_error=error,
+            next_attempt_at=now + timedelta(seconds=retry_delay(dispatch.attempts)),
+        )
+
+    return _finish(dispatch, 'sent', provider_reference=reference[:100], sent_at=timezone.now())
+
+
+def _finish(dispatch, status, **fields):
+    if status != 'pending':
+        # Nothing will send it again
+        fields['otp'] = ''
+    SMSDispatch.objects.filter(id=dispatch.id).update(status=status, **fields)
+    return status
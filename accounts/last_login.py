@@ -0,0 +1,40 @@
+"""
+Write-behind ``last_login``.
+
+Django's ``update_last_login`` issues one UPDATE per login. With
+``LAST_LOGIN_WRITE_BEHIND`` enabled it is replaced by this receiver, which
+sets the value in memory and lets a background batcher persist the latest
+timestamp per user with a single ``bulk_update``.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from .batching import BackgroundBatcher
+from .models import User
+
+
+def _flush_last_login(items):
+    latest = {}
+    for user_id, when in items:
+        if user_id not in latest or when > latest[user_id]:
+            latest[user_id] = when
+    User.objects.bulk_update(
+        [User(pk=user_id, last_login=when) for user_id, when in latest.items()],
+        ['last_login'],
+        batch_size=500,
+    )
+
+
+last_login_writer = BackgroundBatcher(
+    _flush_last_login,
+    max_batch=1000,
+    interval=2.0,
+    name='last-login',
+    synchronous=not settings.LAST_LOGIN_WRITE_BEHIND,
+)
+
+
+def buffer_last_login(sender, user, **kwargs):
+    """user_logged_in receiver replacing django.contrib.auth.models.update_last_login"""
+    user.last_login = timezone.now()
+    last_login_writer.put((user.pk, user.last_login))
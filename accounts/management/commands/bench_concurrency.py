@@ -0,0 +1,114 @@
+import asyncio
+import statistics
+import time
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand
+
+from accounts.models import User
+from accounts.views import OTP_LOGIN_BACKEND
+from students.models import StudentProfile
+
+
+def login_cookie(mobile):
+    """Create a logged-in session for ``mobile`` (with a profile) and return its cookie"""
+    user = User.objects.get_or_create_by_mobile(mobile)
+    StudentProfile.objects.get_or_create(user=user, defaults={'full_name': 'Benchmark', 'step_completed': 8})
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = OTP_LOGIN_BACKEND
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.create()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+async def fetch(host, port, request, timeout):
+    """One request on a fresh connection; returns the HTTP status"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        writer.write(request)
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def load(url, concurrency, duration, cookie, timeout):
+    """Keep ``concurrency`` clients busy for ``duration`` seconds"""
+    parts = urlsplit(url)
+    headers = [
+        f'GET {parts.path or "/"}{"?" + parts.query if parts.query else ""} HTTP/1.1',
+        f'Host: {parts.netloc}',
+        'Connection: close',
+    ]
+    if cookie:
+        headers.append(f'Cookie: {cookie}')
+    request = ('\r\n'.join(headers) + '\r\n\r\n').encode()
+
+    timings, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await fetch(parts.hostname, parts.port or 80, request, timeout)
+            except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+                status = None
+            if status is not None and status < 500:
+                timings.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return timings, errors
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure concurrent-connection capacity of one web worker. Start one worker per stack, e.g. '
+        '"gunicorn config.wsgi -w 1 -b :8001" and '
+        '"ASYNC_VIEWS=True gunicorn config.asgi -c python:config.gunicorn_asgi -w 1 -b :8002", '
+        'then run this command against each URL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help='e.g. http://127.0.0.1:8001/profile/review/')
+        parser.add_argument('--concurrency', default='1,10,50,100,200',
+                            help='Comma-separated numbers of concurrent clients')
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--timeout', type=float, default=10)
+        parser.add_argument('--slo-ms', type=float, default=500,
+                            help='A level counts as sustained while p99 stays under this and nothing fails')
+        parser.add_argument('--mobile', default='7000299999',
+                            help='Benchmark user the requests are logged in as')
+        parser.add_argument('--anonymous', action='store_true', help='Send no session cookie')
+
+    def handle(self, *args, **options):
+        cookie = None if options['anonymous'] else login_cookie(options['mobile'])
+        levels = [int(level) for level in options['concurrency'].split(',')]
+
+        for url in options['urls']:
+            capacity = 0
+            for concurrency in levels:
+                timings, errors = asyncio.run(
+                    load(url, concurrency, options['duration'], cookie, options['timeout'])
+                )
+                timings.sort()
+                p50 = statistics.median(timings) if timings else float('nan')
+                p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] if timings else float('nan')
+                self.stdout.write(
+                    f'{url:<45} c={concurrency:<4} {len(timings) / options["duration"]:8.1f} req/s  '
+                    f'p50 {p50:8.1f} ms  p99 {p99:8.1f} ms  errors {errors}'
+                )
+                if timings and not errors and p99 < options['slo_ms']:
+                    capacity = concurrency
+            self.stdout.write(self.style.SUCCESS(
+                f'{url}: sustained {capacity} concurrent connections within p99 {options["slo_ms"]:.0f} ms'
+            ))
@@ -0,0 +1,91 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.contrib.auth import login
+from django.contrib.auth.models import AnonymousUser, update_last_login
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import OTPLog, User
+from accounts.otp_store import get_otp_store
+from accounts.views import VerifyOTPView
+
+
+def legacy_verify(request, mobile, otp):
+    """The pre-consolidation VerifyOTPView.post sequence, kept for comparison"""
+    otp_log = OTPLog.objects.filter(mobile=mobile, otp=otp, verified=False).latest('created_at')
+    if otp_log.is_expired():
+        raise AssertionError('OTP expired during benchmark')
+    otp_log.verified = True
+    otp_log.verified_at = timezone.now()
+    otp_log.save()
+    user, _ = User.objects.get_or_create(mobile=mobile, defaults={'auth_type': 'otp', 'is_active': True})
+    login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+    update_last_login(None, user)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare queries and latency per OTP login: the old verify sequence vs. the '
+        'consolidated VerifyOTPView. Creates and deletes users 70000xxxxx; use a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--store', default='accounts.otp_store.DatabaseOTPStore',
+                            help='OTP_STORE used for the consolidated path')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        view = VerifyOTPView.as_view()
+        count = options['logins']
+
+        def make_request(mobile, otp):
+            request = factory.post('/verify-otp/', {'mobile': mobile, 'otp': otp})
+            request.user = AnonymousUser()
+            SessionMiddleware(lambda r: None).process_request(request)
+            return request
+
+        def run(label, mobiles, login_once):
+            timings, queries = [], []
+            for mobile in mobiles:
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    login_once(mobile)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(captured))
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f'{label:<14} queries/login {statistics.mean(queries):.1f}  '
+                f'mean {statistics.mean(timings):.2f} ms  p99 {p99:.2f} ms'
+            )
+
+        legacy_mobiles = [f'70000{i:05d}' for i in range(count)]
+        new_mobiles = [f'70001{i:05d}' for i in range(count)]
+
+        with override_settings(RATELIMIT_ENABLED=False, OTP_STORE=options['store']):
+            def legacy_once(mobile):
+                legacy_verify(make_request(mobile, issued[mobile]), mobile, issued[mobile])
+
+            def new_once(mobile):
+                view(make_request(mobile, issued[mobile]))
+
+            # OTPs are issued up front so only verification is measured
+            issued = {m: OTPLog.objects.create(
+                mobile=m, otp='123456', expiry=timezone.now() + timedelta(minutes=10)
+            ).otp for m in legacy_mobiles}
+            run('legacy', legacy_mobiles, legacy_once)
+
+            store = get_otp_store()
+            issued = {m: store.issue(m).otp for m in new_mobiles}
+            run('consolidated', new_mobiles, new_once)
+
+        all_mobiles = legacy_mobiles + new_mobiles
+        User.objects.filter(mobile__in=all_mobiles).delete()
+        OTPLog.objects.filter(mobile__in=all_mobiles).delete()
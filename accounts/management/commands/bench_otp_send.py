@@ -0,0 +1,92 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from accounts.dispatch import claim_due, deliver
+from accounts.management.commands.fake_2factor import FakeTwoFactorServer
+from accounts.models import SMSDispatch
+from accounts.sms import get_sms_client, send_otp_sms
+from accounts.views import MobileLoginView
+
+
+class Command(BaseCommand):
+    help = (
+        'Offline benchmark of the OTP send path against a fake 2Factor server: '
+        'view latency (worker occupancy) with the dispatch queue vs. a synchronous send, '
+        'and queue drain throughput. Writes to the configured database; use a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--latency-ms', type=float, default=300)
+        parser.add_argument('--threads', type=int, default=8)
+
+    def handle(self, *args, **options):
+        server = FakeTwoFactorServer(('127.0.0.1', 0), latency=options['latency_ms'] / 1000)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        count = options['requests']
+        mobiles = [f'9{i:09d}' for i in range(count)]
+
+        providers = [{
+            'BACKEND': 'accounts.sms.TwoFactorProvider',
+            'NAME': 'fake-2factor',
+            'OPTIONS': {'api_key': 'bench', 'base_url': base_url},
+        }]
+
+        with override_settings(SMS_PROVIDERS=providers):
+            sync_times = self._time_each(lambda m: send_otp_sms('+91' + m, '123456'), mobiles[:20])
+
+            view = MobileLoginView.as_view()
+            factory = RequestFactory()
+
+            def post(mobile):
+                request = factory.post('/login/mobile/', {'mobile': mobile})
+                request.user = AnonymousUser()
+                SessionMiddleware(lambda r: None).process_request(request)
+                view(request)
+
+            view_times = self._time_each(post, mobiles)
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                while True:
+                    batch = claim_due(50)
+                    if not batch:
+                        break
+                    list(pool.map(deliver, batch))
+            drain_seconds = time.perf_counter() - started
+            latency = get_sms_client().latency_percentiles()
+
+        server.shutdown()
+        sent = SMSDispatch.objects.filter(mobile__in=['+91' + m for m in mobiles], status='sent')
+        delivered = sent.count()
+        SMSDispatch.objects.filter(mobile__in=['+91' + m for m in mobiles]).delete()
+
+        self.stdout.write(f"Provider latency:            {options['latency_ms']:.0f} ms")
+        self.stdout.write(f'Synchronous send (old view): {self._summary(sync_times)}')
+        self.stdout.write(f'Queued view response:        {self._summary(view_times)}')
+        self.stdout.write(
+            f'Queue drain: {delivered}/{count} sent in {drain_seconds:.2f}s '
+            f"({delivered / drain_seconds:.0f} msg/s with {options['threads']} threads)"
+        )
+        self.stdout.write(f'Provider latency percentiles: {latency}')
+
+    def _time_each(self, func, items):
+        times = []
+        for item in items:
+            started = time.perf_counter()
+            func(item)
+            times.append((time.perf_counter() - started) * 1000)
+        return times
+
+    def _summary(self, times):
+        times = sorted(times)
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+        return f'mean {statistics.mean(times):.1f} ms, p99 {p99:.1f} ms'
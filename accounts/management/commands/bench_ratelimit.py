@@ -0,0 +1,46 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from accounts.ratelimit import check_rate_limit, get_limiter
+
+
+class Command(BaseCommand):
+    help = 'Measure the overhead of one OTP rate-limit check (mobile + IP + global buckets)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=20000)
+        parser.add_argument('--threads', type=int, default=1)
+        parser.add_argument('--action', default='issue', choices=['issue', 'verify'])
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        checks = options['checks']
+        requests = [
+            factory.post('/login/mobile/', REMOTE_ADDR=f'10.0.{i % 250}.{i % 200}')
+            for i in range(1000)
+        ]
+
+        def run(i):
+            started = time.perf_counter()
+            check_rate_limit(options['action'], requests[i % 1000], f'9{i:09d}')
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            latencies = sorted(pool.map(run, range(checks)))
+        elapsed = time.perf_counter() - started
+
+        pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))]
+        self.stdout.write(f'Limiter: {type(get_limiter()).__name__}')
+        self.stdout.write(
+            f'{checks} checks in {elapsed:.2f}s = {checks / elapsed:,.0f} checks/s '
+            f"({options['threads']} threads)"
+        )
+        self.stdout.write(
+            f'Per check: mean {statistics.mean(latencies):.3f} ms, '
+            f'p50 {pick(0.50):.3f} ms, p99 {pick(0.99):.3f} ms'
+        )
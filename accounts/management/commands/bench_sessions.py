@@ -0,0 +1,67 @@
+import statistics
+import time
+from importlib import import_module
+
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+ENGINES = ['django.contrib.sessions.backends.db', 'accounts.session_backend']
+
+SCENARIOS = {
+    # Typical step GET: only reads the auth keys
+    'read': lambda session, i: session.get('_auth_user_id'),
+    # Re-assigns an identical value, which still marks the session modified
+    'rewrite-same': lambda session, i: session.__setitem__('last_step', 3),
+    # Real change on every request
+    'change': lambda session, i: session.__setitem__('last_step', i),
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure per-request session overhead (time and queries) for each session engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--sessions', type=int, default=200)
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        for engine in ENGINES:
+            with override_settings(SESSION_ENGINE=engine):
+                store_class = import_module(engine).SessionStore
+                keys = []
+                for i in range(options['sessions']):
+                    store = store_class()
+                    store.update({'_auth_user_id': str(i), 'last_step': 3})
+                    store.create()
+                    keys.append(store.session_key)
+
+                for name, touch in SCENARIOS.items():
+                    def view(request, touch=touch):
+                        touch(request.session, view.counter)
+                        view.counter += 1
+                        return HttpResponse()
+                    view.counter = 0
+                    middleware = SessionMiddleware(view)
+
+                    timings, queries = [], []
+                    for i in range(options['requests']):
+                        request = factory.get('/dashboard/')
+                        request.COOKIES['sessionid'] = keys[i % len(keys)]
+                        with CaptureQueriesContext(connection) as captured:
+                            started = time.perf_counter()
+                            middleware(request)
+                            timings.append((time.perf_counter() - started) * 1000)
+                        queries.append(len(captured))
+
+                    self.stdout.write(
+                        f'{engine:<38} {name:<13} {statistics.mean(timings):.3f} ms/request, '
+                        f'{statistics.mean(queries):.2f} queries/request'
+                    )
+
+                for key in keys:
+                    store_class(key).delete()
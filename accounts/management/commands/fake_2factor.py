@@ -0,0 +1,103 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+SMS_PATH = re.compile(r'^/API/V1/(?P<key>[^/]+)/SMS/(?P<mobile>[^/]+)/(?P<otp>[^/]+)/(?P<template>[^/]+)$')
+
+
+class FakeTwoFactorServer(ThreadingHTTPServer):
+    """Local stand-in for the 2Factor SMS API with configurable latency and failures"""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, failure_rate=0.0, quiet=True):
+        super().__init__(address, FakeTwoFactorHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.quiet = quiet
+        self.stats = {'received': 0, 'accepted': 0, 'rejected': 0}
+        self.stats_lock = threading.Lock()
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+
+class FakeTwoFactorHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+
+        if self.path == '/stats':
+            with server.stats_lock:
+                return self._json(200, dict(server.stats))
+
+        match = SMS_PATH.match(self.path)
+        if not match:
+            return self._json(404, {'Status': 'Error', 'Details': 'Unknown endpoint'})
+
+        server.count('received')
+        delay = server.latency + random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        if random.random() < server.failure_rate:
+            server.count('rejected')
+            return self._json(200, {'Status': 'Error', 'Details': 'Simulated provider failure'})
+
+        server.count('accepted')
+        return self._json(200, {'Status': 'Success', 'Details': str(uuid.uuid4())})
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a local fake 2Factor SMS API for offline testing. '
+        'Point TWO_FACTOR_BASE_URL at it, e.g. http://127.0.0.1:8025'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8025)
+        parser.add_argument('--latency-ms', type=float, default=0,
+                            help='Fixed delay added to every SMS request')
+        parser.add_argument('--jitter-ms', type=float, default=0,
+                            help='Extra random delay (0..jitter) per request')
+        parser.add_argument('--failure-rate', type=float, default=0.0,
+                            help='Fraction of requests answered with Status=Error')
+        parser.add_argument('--verbose-requests', action='store_true')
+
+    def handle(self, *args, **options):
+        server = FakeTwoFactorServer(
+            (options['host'], options['port']),
+            latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000,
+            failure_rate=options['failure_rate'],
+            quiet=not options['verbose_requests'],
+        )
+        self.stdout.write(f"Fake 2Factor listening on http://{options['host']}:{options['port']} (GET /stats for counters)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f'Stats: {server.stats}')
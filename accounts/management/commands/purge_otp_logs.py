@@ -0,0 +1,71 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import OTPLog, SMSDispatch
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete OTPLog and SMSDispatch rows older than their retention periods in small batches, '
+        'so no single statement holds locks for long'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.OTP_LOG_RETENTION_DAYS,
+                            help='Keep OTPLog rows newer than this many days')
+        parser.add_argument('--dispatch-days', type=int, default=settings.SMS_DISPATCH_RETENTION_DAYS,
+                            help='Keep SMSDispatch rows newer than this many days')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.05,
+                            help='Pause between batches to let replication and vacuum keep up')
+        parser.add_argument('--max-batches', type=int, default=0,
+                            help='Stop after this many batches per table (0 = until done)')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        for model, days in ((OTPLog, options['days']), (SMSDispatch, options['dispatch_days'])):
+            self.purge(model, timezone.now() - timedelta(days=days), options)
+
+    def purge(self, model, cutoff, options):
+        name = model.__name__
+        expired = model.objects.filter(created_at__lt=cutoff).order_by()
+
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} {name} rows older than {cutoff:%Y-%m-%d %H:%M} would be deleted')
+            return
+
+        deleted = 0
+        batches = 0
+        longest = 0.0
+        started = time.perf_counter()
+
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+
+            # Each batch is its own short transaction; its duration bounds lock time
+            batch_started = time.perf_counter()
+            with transaction.atomic():
+                count, _ = model.objects.filter(id__in=ids).delete()
+            longest = max(longest, time.perf_counter() - batch_started)
+
+            deleted += count
+            batches += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{name} batch {batches}: {count} rows')
+            if options['max_batches'] and batches >= options['max_batches']:
+                break
+            time.sleep(options['sleep'])
+
+        elapsed = time.perf_counter() - started
+        rate = deleted / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} {name} rows older than {cutoff:%Y-%m-%d %H:%M} in {batches} batches, '
+            f'{elapsed:.1f}s ({rate:,.0f} rows/s), longest batch transaction {longest * 1000:.1f} ms'
+        ))
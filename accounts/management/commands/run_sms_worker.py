@@ -0,0 +1,63 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts.dispatch import claim_due, deliver
+from accounts.sms import get_sms_client
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued OTP SMS messages, retrying failures with backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8,
+                            help='Concurrent provider requests')
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Dispatches leased per poll')
+        parser.add_argument('--poll-interval', type=float, default=0.5,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when no dispatch is due instead of polling')
+
+    def handle(self, *args, **options):
+        totals = {'sent': 0, 'pending': 0, 'failed': 0}
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            try:
+                while True:
+                    close_old_connections()
+                    batch = claim_due(options['batch_size'])
+                    if not batch:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    for status in pool.map(self._deliver, batch):
+                        totals[status] += 1
+                    self.stdout.write(
+                        f"sent={totals['sent']} retrying={totals['pending']} failed={totals['failed']} "
+                        f"latency={get_sms_client().latency_percentiles()}"
+                    )
+            except KeyboardInterrupt:
+                pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"SMS worker stopped: sent={totals['sent']} retrying={totals['pending']} failed={totals['failed']}"
+        ))
+
+    def _deliver(self, dispatch):
+        try:
+            return deliver(dispatch)
+        except Exception:
+            # Could not even record the outcome (database down); the lease
+            # runs out and the row is retried
+            logger.exception('Could not deliver SMS dispatch %s', dispatch.id)
+            return 'pending'
+        finally:
+            close_old_connections()
@@ -0,0 +1,50 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Incrementally delete expired sessions in small batches '
+        '(clearsessions removes them all in one statement)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--sleep', type=float, default=0.05,
+                            help='Pause between batches')
+        parser.add_argument('--max-batches', type=int, default=0,
+                            help='Stop after this many batches (0 = until done)')
+
+    def handle(self, *args, **options):
+        expired = Session.objects.filter(expire_date__lt=timezone.now()).order_by()
+
+        deleted = 0
+        batches = 0
+        longest = 0.0
+        started = time.perf_counter()
+
+        while True:
+            keys = list(expired.values_list('session_key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+
+            batch_started = time.perf_counter()
+            with transaction.atomic():
+                count, _ = Session.objects.filter(session_key__in=keys).delete()
+            longest = max(longest, time.perf_counter() - batch_started)
+
+            deleted += count
+            batches += 1
+            if options['max_batches'] and batches >= options['max_batches']:
+                break
+            time.sleep(options['sleep'])
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} expired sessions in {batches} batches, {elapsed:.1f}s, '
+            f'longest batch transaction {longest * 1000:.1f} ms'
+        ))
@@ -0,0 +1,188 @@
+"""
+Authentication middleware that resolves ``request.user`` from the cache.
+
+``CachedAuthenticationMiddleware`` replaces Django's ``AuthenticationMiddleware``.
+The user row is cached under ``auth:user:<id>`` together with the session
+auth hash it was verified against, so a warm request resolves the user with
+no query. A session whose hash does not match the cached one (password
+change, rotated ``SECRET_KEY``) takes the normal verification path. Saving or
+deleting the user drops the entry, and so does a ``QuerySet.update()`` or
+``bulk_update()`` of users (``accounts.models.UserQuerySet``); an update of
+the whole table moves every entry to a new generation instead. Inside a
+transaction the entry is dropped again on commit, since a request can still
+read and cache the old row before then. Caching is controlled by
+``AUTH_USER_CACHE_ENABLED`` and needs a cache shared by all workers.
+
+On a cache miss the user is loaded with ``select_related('profile')`` when
+``AUTH_USER_CACHE_CO_LOAD_PROFILE`` is set, so views reading
+``request.user.profile`` need no second query on that request (this also
+applies with caching disabled). Only the profile's ``CORE_FIELDS`` are
+co-loaded. The profile is never cached with the user;
+it changes far more often.
+"""
+import uuid
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+_missing = object()
+
+# Entries cached under another generation are misses
+GENERATION_KEY = 'auth:user:generation'
+
+
+def user_cache_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _after_commit(func, using):
+    # Outside a transaction the change is already visible; nothing to repeat
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(func, using=using)
+
+
+def invalidate_cached_users(user_ids, using=None):
+    keys = [user_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        cache.delete_many(keys)
+        _after_commit(partial(cache.delete_many, keys), using)
+
+
+def _new_generation():
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def invalidate_all_cached_users(using=None):
+    _new_generation()
+    _after_commit(_new_generation, using)
+
+
+def _load_user(backend, user_id):
+    """backend.get_user(), co-loading the profile for model backends"""
+    if not (settings.AUTH_USER_CACHE_CO_LOAD_PROFILE and isinstance(backend, ModelBackend)):
+        return backend.get_user(user_id)
+
+    UserModel = get_user_model()
+    try:
+        user = _co_load_queryset(UserModel).get(pk=user_id)
+    except UserModel.DoesNotExist:
+        return None
+    return user if backend.user_can_authenticate(user) else None
+
+
+def _co_load_queryset(UserModel):
+    queryset = UserModel._default_manager.select_related('profile')
+    # Only the profile's CORE_FIELDS; pages load the sections they show
+    profile_model = UserModel._meta.get_field('profile').related_model
+    core = getattr(profile_model, 'CORE_FIELDS', None)
+    if core:
+        queryset = queryset.defer(*(
+            f'profile__{field.name}' for field in profile_model._meta.concrete_fields
+            if not field.primary_key and field.name not in core
+        ))
+    return queryset
+
+
+def _verify_session(request, user):
+    """Session hash check from django.contrib.auth.get_user(), including fallback keys"""
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    if not session_hash:
+        request.session.flush()
+        return False
+
+    session_auth_hash = user.get_session_auth_hash()
+    if constant_time_compare(session_hash, session_auth_hash):
+        return True
+    if any(
+        constant_time_compare(session_hash, fallback_hash)
+        for fallback_hash in user.get_session_auth_fallback_hash()
+    ):
+        request.session.cycle_key()
+        request.session[HASH_SESSION_KEY] = session_auth_hash
+        return True
+
+    request.session.flush()
+    return False
+
+
+def _cache_user(user, generation):
+    # A co-loaded profile sits in the instance's relation cache; keep it out of the entry
+    fields_cache = user._state.fields_cache
+    profile = fields_cache.pop('profile', _missing)
+    try:
+        cache.set(
+            user_cache_key(user.pk),
+            (generation, user.get_session_auth_hash(), user),
+            settings.AUTH_USER_CACHE_TIMEOUT
+        )
+    finally:
+        if profile is not _missing:
+            fields_cache['profile'] = profile
+
+
+def resolve_user(request):
+    """Return the session's user, from the cache when its auth hash still matches"""
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    session_hash = request.session.get(HASH_SESSION_KEY)
+    generation = None
+    if settings.AUTH_USER_CACHE_ENABLED and session_hash:
+        key = user_cache_key(user_id)
+        found = cache.get_many([key, GENERATION_KEY])
+        generation = found.get(GENERATION_KEY)
+        cached = found.get(key)
+        if cached is not None and cached[0] == generation and constant_time_compare(session_hash, cached[1]):
+            return cached[2]
+
+    user = _load_user(auth.load_backend(backend_path), user_id)
+    if user is None or not _verify_session(request, user):
+        return AnonymousUser()
+    if settings.AUTH_USER_CACHE_ENABLED:
+        _cache_user(user, generation)
+    return user
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = resolve_user(request)
+    return request._cached_user
+
+
+async def auser(request):
+    # Shares request._cached_user with request.user, so an async view that
+    # renders a template (auth context processor) resolves the user once
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = await sync_to_async(resolve_user)(request)
+    return request._cached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware backed by the user cache"""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        request.auser = partial(auser, request)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def _invalidate_cached_user(sender, instance, using, **kwargs):
+    invalidate_cached_users([instance.pk], using)
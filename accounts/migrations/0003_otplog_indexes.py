@@ -0,0 +1,32 @@
+# Generated by Django 5.2.8 on 2026-10-17 01:41
+
+from django.db import migrations, models
+
+from accounts.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # otp_logs is large: CREATE INDEX CONCURRENTLY cannot run in a transaction,
+    # and keeps writes flowing while the indexes build
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0002_sms_dispatch'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='otplog',
+            index=models.Index(fields=['mobile', 'otp', 'verified', '-created_at'], name='otp_logs_verify_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='otplog',
+            index=models.Index(fields=['created_at'], name='otp_logs_created_idx'),
+        ),
+        # Drops the old mobile index once the composite one can serve its lookups
+        migrations.AlterField(
+            model_name='otplog',
+            name='mobile',
+            field=models.CharField(max_length=15),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:48
+
+from django.db import migrations, models
+
+from accounts.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # sms_dispatches has never been purged; build the index without blocking the queue
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0003_otplog_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='smsdispatch',
+            index=models.Index(fields=['created_at'], name='sms_dispatch_created_idx'),
+        ),
+    ]
@@ -1,9 +1,44 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.db import connections, models
 from django.utils import timezone
+import uuid
 
 
-class UserManager(BaseUserManager):
+class UserQuerySet(models.QuerySet):
+    """Users; keeps the authenticated-user cache in step with bulk updates
+
+    update() and bulk_update() send no post_save, so they drop the cached
+    users (accounts.middleware) of the rows they change themselves.
+    """
+    
+    def update(self, **kwargs):
+        from .middleware import invalidate_all_cached_users, invalidate_cached_users
+        
+        if not self.query.has_filters():
+            # Every user: retire the whole cache rather than read every pk
+            rows = super().update(**kwargs)
+            invalidate_all_cached_users(self.db)
+            return rows
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        invalidate_cached_users(user_ids, self.db)
+        return rows
+    
+    update.alters_data = True
+    
+    def bulk_update(self, objs, fields, batch_size=None):
+        from .middleware import invalidate_cached_users
+        
+        # The pks are known: skip the pre-read update() above would do per batch
+        objs = tuple(objs)
+        rows = models.QuerySet(self.model, using=self.db).bulk_update(objs, fields, batch_size)
+        invalidate_cached_users([obj.pk for obj in objs], self.db)
+        return rows
+    
+    bulk_update.alters_data = True
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """Custom user manager for email-based authentication"""
     
     def create_user(self, email=None, mobile=None, password=None, **extra_fields):
@@ -31,6 +66,36 @@ class UserManager(BaseUserManager):
             raise ValueError('Superuser must have is_superuser=True')
         
         return self.create_user(email, password=password, **extra_fields)
+    
+    def get_or_create_by_mobile(self, mobile):
+        """
+        Fetch or create the OTP user for a mobile number.
+        
+        INSERT ... ON CONFLICT (mobile) DO NOTHING RETURNING creates the user
+        with no select-then-insert window, so concurrent first logins for the
+        same number cannot race into an IntegrityError. For an existing user
+        it returns no row and writes nothing; the user is then read by mobile.
+        """
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        opts = self.model._meta
+        
+        user = self.model(mobile=mobile, auth_type='otp', is_active=True)
+        fields = [f for f in opts.concrete_fields if not f.primary_key]
+        values = [f.get_db_prep_save(f.pre_save(user, add=True), connection) for f in fields]
+        
+        sql = (
+            f'INSERT INTO {qn(opts.db_table)} ({", ".join(qn(f.column) for f in fields)}) '
+            f'VALUES ({", ".join(["%s"] * len(fields))}) '
+            f'ON CONFLICT ({qn("mobile")}) DO NOTHING '
+            f'RETURNING {", ".join(qn(f.column) for f in opts.concrete_fields)}'
+        )
+        # raw() runs the statement and applies the usual column converters
+        created = next(iter(self.raw(sql, values)), None)
+        if created is not None:
+            return created
+        # Repeat login; the user cannot disappear in between short of a delete
+        return self.get(mobile=mobile)
 
 
 class User(AbstractBaseUser, PermissionsMixin):
@@ -75,7 +140,7 @@ class User(AbstractBaseUser, PermissionsMixin):
 class OTPLog(models.Model):
     """Model to track OTP generation and verification"""
     
-    mobile = models.CharField(max_length=15, db_index=True)
+    mobile = models.CharField(max_length=15)
     otp = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
     expiry = models.DateTimeField()
@@ -87,10 +152,51 @@ class OTPLog(models.Model):
         ordering = ['-created_at']
         verbose_name = 'OTP Log'
         verbose_name_plural = 'OTP Logs'
+        indexes = [
+            # Matches the verify lookup; also serves plain lookups by mobile
+            models.Index(fields=['mobile', 'otp', 'verified', '-created_at'], name='otp_logs_verify_idx'),
+            # Range scans for the retention purge (manage.py purge_otp_logs)
+            models.Index(fields=['created_at'], name='otp_logs_created_idx'),
+        ]
     
     def __str__(self):
         return f'{self.mobile} - {self.otp} (Verified: {self.verified})'
     
     def is_expired(self):
         """Check if OTP has expired"""
-        return timezone.now() > self.expiry
\ No newline at end of file
+        return timezone.now() > self.expiry
+
+
+class SMSDispatch(models.Model):
+    """Queued OTP SMS, delivered by the SMS worker (manage.py run_sms_worker)"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    mobile = models.CharField(max_length=15)
+    otp = models.CharField(max_length=6)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.CharField(max_length=255, blank=True)
+    provider_reference = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'sms_dispatches'
+        ordering = ['-created_at']
+        verbose_name = 'SMS Dispatch'
+        verbose_name_plural = 'SMS Dispatches'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='sms_dispatch_due_idx'),
+            # Range scans for the retention purge (manage.py purge_otp_logs)
+            models.Index(fields=['created_at'], name='sms_dispatch_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.mobile} - {self.status} ({self.attempts} attempts)'
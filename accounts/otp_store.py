@@ -0,0 +1,207 @@
+"""
+Pluggable OTP storage for the mobile login flow.
+
+``settings.OTP_STORE`` selects the backend:
+
+- ``CacheOTPStore`` keeps OTPs in the shared cache with a TTL of
+  ``OTP_EXPIRY_SECONDS`` and an attempt counter. Issue and verify run no SQL;
+  the ``OTPLog`` audit trail is written behind in batches.
+- ``DatabaseOTPStore`` is the original ``OTPLog``-backed behaviour, for
+  deployments without a shared cache.
+- ``SignedOTPStore`` is stateless: the OTP is an HMAC of the mobile number,
+  a time window and a nonce, and the client carries a signed challenge token
+  back to verify. Verification is CPU-only apart from a small replay set.
+"""
+import secrets
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.module_loading import import_string
+
+from . import audit
+from .models import OTPLog
+
+# Verification outcomes
+OTP_OK = 'ok'
+OTP_INVALID = 'invalid'
+OTP_EXPIRED = 'expired'
+OTP_LOCKED = 'locked'
+
+# What issue() hands back; ``token`` is only set by stateless stores
+OTPChallenge = namedtuple('OTPChallenge', ['otp', 'token'], defaults=[None])
+
+
+def generate_otp():
+    """Generate a 6-digit OTP"""
+    return str(secrets.randbelow(900000) + 100000)
+
+
+class BaseOTPStore:
+    """Interface shared by all OTP stores"""
+
+    def issue(self, mobile):
+        """Create a new OTP for ``mobile`` and return an OTPChallenge"""
+        raise NotImplementedError
+
+    def verify(self, mobile, otp, token=None):
+        """Consume ``otp`` for ``mobile`` and return one of the OTP_* outcomes"""
+        raise NotImplementedError
+
+    async def aissue(self, mobile):
+        return await sync_to_async(self.issue)(mobile)
+
+    async def averify(self, mobile, otp, token=None):
+        return await sync_to_async(self.verify)(mobile, otp, token=token)
+
+
+class CacheOTPStore(BaseOTPStore):
+    """OTPs in the shared cache with attempt counting and consume-once semantics"""
+
+    def __init__(self, cache_alias='default'):
+        self.cache = caches[cache_alias]
+
+    def _keys(self, mobile):
+        return f'otp:{mobile}', f'otp:{mobile}:attempts'
+
+    def issue(self, mobile):
+        otp = generate_otp()
+        code_key, attempts_key = self._keys(mobile)
+        self.cache.set_many(
+            {code_key: otp, attempts_key: 0},
+            timeout=settings.OTP_EXPIRY_SECONDS
+        )
+        expiry = timezone.now() + timedelta(seconds=settings.OTP_EXPIRY_SECONDS)
+        audit.record_issued(mobile, otp, expiry)
+        return OTPChallenge(otp)
+
+    def verify(self, mobile, otp, token=None):
+        code_key, attempts_key = self._keys(mobile)
+
+        try:
+            attempts = self.cache.incr(attempts_key)
+        except ValueError:
+            # Counter is gone: the OTP was never issued or its TTL elapsed
+            return OTP_EXPIRED
+
+        if attempts > settings.OTP_MAX_ATTEMPTS:
+            self.cache.delete_many([code_key, attempts_key])
+            return OTP_LOCKED
+
+        expected = self.cache.get(code_key)
+        if expected is None:
+            return OTP_EXPIRED
+        if not constant_time_compare(expected, otp):
+            return OTP_INVALID
+
+        # Only the first concurrent caller gets True back from delete()
+        if not self.cache.delete(code_key):
+            return OTP_INVALID
+        self.cache.delete(attempts_key)
+
+        audit.record_verified(mobile, otp, timezone.now())
+        return OTP_OK
+
+
+class DatabaseOTPStore(BaseOTPStore):
+    """OTPs stored directly in OTPLog"""
+
+    def issue(self, mobile):
+        otp = generate_otp()
+        OTPLog.objects.create(
+            mobile=mobile,
+            otp=otp,
+            expiry=timezone.now() + timedelta(seconds=settings.OTP_EXPIRY_SECONDS)
+        )
+        return OTPChallenge(otp)
+
+    def verify(self, mobile, otp, token=None):
+        # One conditional UPDATE both checks and consumes the OTP
+        now = timezone.now()
+        consumed = OTPLog.objects.filter(
+            mobile=mobile,
+            otp=otp,
+            verified=False,
+            expiry__gt=now
+        ).update(verified=True, verified_at=now)
+        if consumed:
+            return OTP_OK
+
+        # Failure path only: tell an expired code apart from a wrong one
+        if OTPLog.objects.filter(mobile=mobile, otp=otp, verified=False).exists():
+            return OTP_EXPIRED
+        return OTP_INVALID
+
+
+class SignedOTPStore(BaseOTPStore):
+    """Stateless OTPs derived from an HMAC and verified against a signed challenge token"""
+
+    salt = 'accounts.otp_store.SignedOTPStore'
+
+    def __init__(self, cache_alias='default'):
+        # Only used for the replay set of consumed nonces
+        self.cache = caches[cache_alias]
+
+    def _derive(self, mobile, window, nonce):
+        digest = salted_hmac(self.salt, f'{mobile}:{window}:{nonce}', algorithm='sha256').digest()
+        # Dynamic truncation as in HOTP (RFC 4226)
+        offset = digest[-1] & 0x0F
+        code = int.from_bytes(digest[offset:offset + 4], 'big') & 0x7FFFFFFF
+        return f'{code % 1000000:06d}'
+
+    def issue(self, mobile):
+        window = int(time.time()) // settings.OTP_EXPIRY_SECONDS
+        nonce = secrets.token_urlsafe(8)
+        otp = self._derive(mobile, window, nonce)
+        token = signing.dumps({'m': mobile, 'w': window, 'n': nonce}, salt=self.salt)
+        expiry = timezone.now() + timedelta(seconds=settings.OTP_EXPIRY_SECONDS)
+        audit.record_issued(mobile, otp, expiry)
+        return OTPChallenge(otp, token)
+
+    def verify(self, mobile, otp, token=None):
+        if not token:
+            return OTP_INVALID
+        try:
+            challenge = signing.loads(token, salt=self.salt, max_age=settings.OTP_EXPIRY_SECONDS)
+        except signing.SignatureExpired:
+            return OTP_EXPIRED
+        except signing.BadSignature:
+            return OTP_INVALID
+
+        if challenge['m'] != mobile:
+            return OTP_INVALID
+        if not constant_time_compare(self._derive(mobile, challenge['w'], challenge['n']), otp):
+            return OTP_INVALID
+
+        # Replay prevention: a nonce can be consumed once while its token is still valid
+        if not self.cache.add(f'otp:used:{challenge["n"]}', 1, timeout=settings.OTP_EXPIRY_SECONDS):
+            return OTP_INVALID
+
+        audit.record_verified(mobile, otp, timezone.now())
+        return OTP_OK
+
+
+_store = None
+
+
+def get_otp_store():
+    """Return the OTP store configured by ``settings.OTP_STORE``"""
+    global _store
+    if _store is None:
+        _store = import_string(settings.OTP_STORE)()
+    return _store
+
+
+@receiver(setting_changed)
+def _reset_otp_store(setting, **kwargs):
+    global _store
+    if setting == 'OTP_STORE':
+        _store = None
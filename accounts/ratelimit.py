@@ -0,0 +1,168 @@
+"""
+Token-bucket rate limiting for the OTP endpoints.
+
+With ``REDIS_URL`` set, every bucket involved in a request (per mobile, per
+IP, global) is checked and debited by one Lua script, so a check is a single
+atomic round trip shared by all workers. Without Redis the Django cache is
+used with an ``add()``/``incr()`` fixed-window approximation, which is only
+per-process under LocMemCache.
+"""
+import math
+import re
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+Rate = namedtuple('Rate', ['capacity', 'period'])
+
+RATE_PATTERN = re.compile(r'^(?P<count>\d+)/(?P<multiplier>\d*)(?P<unit>[smh])$')
+NON_DIGITS = re.compile(r'\D')
+UNIT_SECONDS = {'s': 1, 'm': 60, 'h': 3600}
+
+# KEYS: bucket keys; ARGV: now, then (capacity, tokens per second) per key.
+# Returns {allowed, retry_after_ms}. Buckets are only debited if all allow.
+TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local state = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+    state[i] = tokens
+end
+local allowed = 0
+if wait == 0 then allowed = 1 end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local rate = tonumber(ARGV[i * 2 + 1])
+    local tokens = state[i]
+    if allowed == 1 then tokens = tokens - 1 end
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return {allowed, math.ceil(wait * 1000)}
+"""
+
+
+def parse_rate(value):
+    """Parse '<tokens>/<period>' such as '5/m', '3/10m' or '100/h'"""
+    match = RATE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f'Invalid rate limit {value!r}')
+    period = int(match.group('multiplier') or 1) * UNIT_SECONDS[match.group('unit')]
+    return Rate(int(match.group('count')), period)
+
+
+class RedisTokenBucket:
+    """All-or-nothing token bucket check over several keys in one EVALSHA"""
+
+    def __init__(self, url):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def consume(self, buckets):
+        args = [time.time()]
+        for _, rate in buckets:
+            args += [rate.capacity, rate.capacity / rate.period]
+        allowed, retry_after_ms = self.script(keys=[key for key, _ in buckets], args=args)
+        return bool(allowed), retry_after_ms / 1000
+
+
+class CacheFixedWindow:
+    """Fallback using the Django cache: one counter per key and window"""
+
+    def consume(self, buckets):
+        now = time.time()
+        retry_after = 0
+        for key, rate in buckets:
+            window = int(now // rate.period)
+            window_key = f'{key}:{window}'
+            cache.add(window_key, 0, timeout=rate.period)
+            try:
+                count = cache.incr(window_key)
+            except ValueError:
+                # Evicted between add() and incr(); start the window again
+                cache.set(window_key, 1, timeout=rate.period)
+                count = 1
+            if count > rate.capacity:
+                retry_after = max(retry_after, (window + 1) * rate.period - now)
+        return retry_after == 0, retry_after
+
+
+_limiter = None
+_rates = {}
+
+
+def get_limiter():
+    global _limiter
+    if _limiter is None:
+        _limiter = RedisTokenBucket(settings.REDIS_URL) if settings.REDIS_URL else CacheFixedWindow()
+    return _limiter
+
+
+def get_rates(action):
+    """Parsed limits for an action, compiled once per process"""
+    if action not in _rates:
+        _rates[action] = {
+            scope: parse_rate(value)
+            for scope, value in settings.OTP_RATE_LIMITS[action].items()
+        }
+    return _rates[action]
+
+
+def get_client_ip(request):
+    """Client IP, taking the address appended by our NUM_PROXIES trusted proxies"""
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded and settings.NUM_PROXIES:
+        addresses = [address.strip() for address in forwarded.split(',')]
+        return addresses[-min(settings.NUM_PROXIES, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def mobile_identity(mobile):
+    """
+    The subscriber number of ``mobile``: its last 10 digits, so '+91XXXXXXXXXX',
+    '91XXXXXXXXXX', '0XXXXXXXXXX' and 'XXXXXXXXXX' share one bucket
+    """
+    return NON_DIGITS.sub('', mobile)[-10:]
+
+
+def check_rate_limit(action, request, mobile):
+    """
+    Debit the mobile, IP and global buckets for ``action``.
+
+    Returns ``(allowed, retry_after_seconds)``. Runs before any DB or network work.
+    """
+    if not settings.RATELIMIT_ENABLED:
+        return True, 0
+
+    identities = {
+        'mobile': mobile_identity(mobile),
+        'ip': get_client_ip(request),
+        'global': 'all',
+    }
+    buckets = [
+        (f'rl:{action}:{scope}:{identities[scope]}', rate)
+        for scope, rate in get_rates(action).items()
+    ]
+    return get_limiter().consume(buckets)
+
+
+async def acheck_rate_limit(action, request, mobile):
+    """Async version of check_rate_limit()"""
+    return await sync_to_async(check_rate_limit)(action, request, mobile)
+
+
+def retry_after_header(seconds):
+    return str(max(1, math.ceil(seconds)))
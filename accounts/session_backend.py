@@ -0,0 +1,63 @@
+"""
+Session engine tuned for this app (``SESSION_ENGINE = 'accounts.session_backend'``).
+
+Builds on Django's ``cached_db`` engine (read from the cache, fall back to
+``django_session``, write through to both) and adds:
+
+- lazy writes: a session marked modified is only written when its content
+  actually differs from what was loaded;
+- no existence probe when generating a new key: ``create()`` already inserts
+  with ``must_create`` and retries on a collision.
+"""
+import json
+
+from django.contrib.sessions.backends.base import VALID_KEY_CHARS
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils.crypto import get_random_string
+
+
+class SessionStore(CachedDBStore):
+    """Cache-first session store that skips writes when nothing changed"""
+
+    _loaded_state = None
+
+    def _snapshot(self, data):
+        return json.dumps(data, separators=(',', ':'), sort_keys=True, default=str)
+
+    def load(self):
+        data = super().load()
+        self._loaded_state = self._snapshot(data)
+        return data
+
+    async def aload(self):
+        data = await super().aload()
+        self._loaded_state = self._snapshot(data)
+        return data
+
+    def _unchanged(self, must_create):
+        return (
+            not must_create
+            and self.session_key is not None
+            and self._loaded_state is not None
+            and self._snapshot(self._get_session(no_load=True)) == self._loaded_state
+        )
+
+    def save(self, must_create=False):
+        if self._unchanged(must_create):
+            return
+        super().save(must_create=must_create)
+        self._loaded_state = self._snapshot(self._session)
+
+    async def asave(self, must_create=False):
+        if self._unchanged(must_create):
+            return
+        await super().asave(must_create=must_create)
+        self._loaded_state = self._snapshot(self._session)
+
+    def _get_new_session_key(self):
+        # 32 random chars make collisions negligible, and create() inserts with
+        # must_create=True and retries on one, so the exists() query is skipped
+        return get_random_string(32, VALID_KEY_CHARS)
+
+    async def _aget_new_session_key(self):
+        return get_random_string(32, VALID_KEY_CHARS)
@@ -0,0 +1,242 @@
+"""
+SMS provider client used by the OTP dispatch worker.
+
+Each provider keeps a pooled ``requests.Session`` (one per worker process),
+its own circuit breaker and a window of recent latencies. ``SMSClient``
+sends through the first healthy provider and, if it has not answered within
+``SMS_HEDGE_AFTER_MS``, hedges by also asking the next one; the first
+success wins. A hedge can deliver the same OTP twice, which is harmless.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+
+class SMSError(Exception):
+    """Raised when the SMS provider could not be reached or rejected the message"""
+
+
+class SMSProviderUnavailable(SMSError):
+    """Transport failure or 5xx - counts against the provider's circuit breaker"""
+
+
+class CircuitBreaker:
+    """Open after consecutive failures, then let one trial request through after a cool-down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling window of request latencies (milliseconds)"""
+
+    def __init__(self, size=1000):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, millis):
+        with self._lock:
+            self._samples.append(millis)
+
+    def percentiles(self):
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {'count': 0}
+        pick = lambda q: round(samples[min(len(samples) - 1, int(len(samples) * q))], 1)
+        return {'count': len(samples), 'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99)}
+
+
+class SMSProvider:
+    """Base provider: pooled HTTP session, circuit breaker and latency stats"""
+
+    def __init__(self, name, timeout=5, pool_size=32):
+        self.name = name
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.SMS_BREAKER_FAILURE_THRESHOLD,
+            reset_timeout=settings.SMS_BREAKER_RESET_SECONDS,
+        )
+        self.latency = LatencyTracker()
+
+    def send_otp(self, mobile, otp):
+        """Send ``otp`` to ``mobile`` and return the provider's reference"""
+        raise NotImplementedError
+
+    def call(self, mobile, otp):
+        """send_otp() wrapped with breaker bookkeeping and latency tracking"""
+        started = time.perf_counter()
+        try:
+            reference = self.send_otp(mobile, otp)
+        except SMSProviderUnavailable:
+            self.breaker.record_failure()
+            raise
+        except SMSError:
+            # The provider answered, it just refused this message
+            self.breaker.record_success()
+            raise
+        except Exception as e:
+            # Anything else (a bug, an error outside requests) must still settle
+            # the breaker, or a half-open one would never get another trial
+            self.breaker.record_failure()
+            raise SMSProviderUnavailable(f'{self.name}: {e!r}') from e
+        finally:
+            self.latency.add((time.perf_counter() - started) * 1000)
+        self.breaker.record_success()
+        return reference
+
+
+class TwoFactorProvider(SMSProvider):
+    """2Factor.in OTP SMS API"""
+
+    def __init__(self, name, api_key, base_url='https://2factor.in', template='OneCore', **kwargs):
+        super().__init__(name, **kwargs)
+        self.api_key = api_key
+        self.base_url = base_url.rstrip('/')
+        self.template = template
+
+    def send_otp(self, mobile, otp):
+        url = f"{self.base_url}/API/V1/{self.api_key}/SMS/{mobile}/{otp}/{self.template}"
+
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise SMSProviderUnavailable(f'{self.name}: {e}') from e
+        if response.status_code >= 500:
+            raise SMSProviderUnavailable(f'{self.name}: HTTP {response.status_code}')
+
+        try:
+            result = response.json()
+        except ValueError as e:
+            raise SMSProviderUnavailable(f'{self.name}: invalid response') from e
+
+        if result.get("Status") != "Success":
+            raise SMSError(f'{self.name}: {result.get("Details") or "Provider rejected the message"}')
+
+        return result.get("Details", "")
+
+
+class SMSClient:
+    """Send through the configured providers with hedging and failover"""
+
+    def __init__(self, providers, hedge_after=1.5):
+        self.providers = providers
+        self.hedge_after = hedge_after
+        self._executor = ThreadPoolExecutor(max_workers=32 * len(providers),
+                                            thread_name_prefix='sms')
+
+    def send_otp(self, mobile, otp):
+        # allow() is only asked when a provider is about to be called: it may
+        # hand out the one trial call of a half-open breaker
+        remaining = iter(self.providers)
+        pending = {}
+        errors = []
+
+        def launch_next():
+            """Call the next provider whose breaker lets it through; False if none is left"""
+            for provider in remaining:
+                if provider.breaker.allow():
+                    pending[self._executor.submit(provider.call, mobile, otp)] = provider
+                    return True
+            return False
+
+        if not launch_next():
+            raise SMSProviderUnavailable('All SMS providers are unavailable')
+        exhausted = False
+        while pending:
+            done, _ = wait(pending, timeout=None if exhausted else self.hedge_after,
+                           return_when=FIRST_COMPLETED)
+            if not done:
+                # Slow provider: hedge with the next one, keep waiting on both
+                exhausted = not launch_next()
+                continue
+
+            for future in done:
+                pending.pop(future)
+                try:
+                    return future.result()
+                except SMSError as e:
+                    errors.append(str(e))
+                    if not pending and not exhausted:
+                        exhausted = not launch_next()
+
+        raise SMSError('; '.join(errors) or 'All SMS providers are unavailable')
+
+    def latency_percentiles(self):
+        """Per-provider latency percentiles, for tuning SMS_HEDGE_AFTER_MS"""
+        return {
+            provider.name: dict(provider.latency.percentiles(), breaker=provider.breaker.state)
+            for provider in self.providers
+        }
+
+
+_client = None
+
+
+def get_sms_client():
+    """Return this process's SMS client, built from ``settings.SMS_PROVIDERS``"""
+    global _client
+    if _client is None:
+        providers = [
+            import_string(conf['BACKEND'])(
+                conf['NAME'],
+                timeout=settings.SMS_PROVIDER_TIMEOUT_SECONDS,
+                **conf.get('OPTIONS', {})
+            )
+            for conf in settings.SMS_PROVIDERS
+        ]
+        _client = SMSClient(providers, hedge_after=settings.SMS_HEDGE_AFTER_MS / 1000)
+    return _client
+
+
+@receiver(setting_changed)
+def _reset_sms_client(setting, **kwargs):
+    global _client
+    if setting.startswith('SMS_'):
+        _client = None
+
+
+def send_otp_sms(mobile, otp):
+    """Send an OTP through the configured providers and return the provider's reference"""
+    return get_sms_client().send_otp(mobile, otp)
@@ -1,3 +1,369 @@
-from django.test import TestCase
+import io
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from .audit import otp_audit
+from .dispatch import claim_due, deliver, enqueue_otp_sms
+from .last_login import last_login_writer
+from .middleware import resolve_user, user_cache_key
+from .models import OTPLog, SMSDispatch, User
+from .otp_store import (
+    OTP_EXPIRED, OTP_INVALID, OTP_LOCKED, OTP_OK, CacheOTPStore, DatabaseOTPStore, SignedOTPStore,
+)
+from .ratelimit import check_rate_limit
+from .session_backend import SessionStore
+from .sms import CircuitBreaker, SMSClient, SMSProvider, SMSProviderUnavailable
+from .views import AsyncMobileLoginView, AsyncVerifyOTPView
+
+# The async views next to the site's URLs, for AsyncLoginFlowTests
+urlpatterns = [
+    path('async/login/mobile/', AsyncMobileLoginView.as_view()),
+    path('async/verify-otp/', AsyncVerifyOTPView.as_view()),
+    path('', include('config.urls')),
+]
+
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+class FakeProvider(SMSProvider):
+    """Provider answering with ``outcomes`` in turn (an exception to raise, or None to succeed)"""
+
+    def __init__(self, name, outcomes=(), delay=0, **kwargs):
+        super().__init__(name, **kwargs)
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.calls = 0
+
+    def send_otp(self, mobile, otp):
+        self.calls += 1
+        time.sleep(self.delay)
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        if outcome is not None:
+            raise outcome
+        return f'{self.name}-ref'
+
+
+class MisconfiguredProvider(SMSProvider):
+    """Provider that cannot even be built"""
+
+    def __init__(self, name, **kwargs):
+        raise ImproperlyConfigured(f'{name}: no API key')
+
+
+def fake_providers(*outcomes):
+    return [{'BACKEND': 'accounts.tests.FakeProvider', 'NAME': 'fake', 'OPTIONS': {'outcomes': outcomes}}]
+
+
+class AccountsTestCase(TestCase):
+    """Empty cache (OTPs, rate limits and cached users) and write-behind batchers flushed in the test"""
+
+    def setUp(self):
+        cache.clear()
+        for batcher in (otp_audit, last_login_writer):
+            patcher = mock.patch.object(batcher, 'synchronous', True)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class OTPStoreTests(AccountsTestCase):
+    """accounts.otp_store: consume-once, expiry, lockout and replay"""
+
+    mobile = '9123456780'
+
+    def test_cache_store_consumes_once(self):
+        store = CacheOTPStore()
+        otp = store.issue(self.mobile).otp
+        self.assertEqual(store.verify(self.mobile, otp), OTP_OK)
+        self.assertNotEqual(store.verify(self.mobile, otp), OTP_OK)
+        self.assertTrue(OTPLog.objects.get(mobile=self.mobile, otp=otp).verified)
+
+    def test_cache_store_expires(self):
+        store = CacheOTPStore()
+        otp = store.issue(self.mobile).otp
+        with mock.patch('time.time', return_value=time.time() + settings.OTP_EXPIRY_SECONDS + 1):
+            self.assertEqual(store.verify(self.mobile, otp), OTP_EXPIRED)
+
+    def test_cache_store_locks_after_max_attempts(self):
+        store = CacheOTPStore()
+        otp = store.issue(self.mobile).otp
+        wrong = '000000' if otp != '000000' else '111111'
+        for _ in range(settings.OTP_MAX_ATTEMPTS):
+            self.assertEqual(store.verify(self.mobile, wrong), OTP_INVALID)
+        self.assertEqual(store.verify(self.mobile, otp), OTP_LOCKED)
+        # The code is gone: a new one has to be requested
+        self.assertEqual(store.verify(self.mobile, otp), OTP_EXPIRED)
+
+    def test_database_store_consumes_once_and_expires(self):
+        store = DatabaseOTPStore()
+        otp = store.issue(self.mobile).otp
+        self.assertEqual(store.verify(self.mobile, otp), OTP_OK)
+        self.assertEqual(store.verify(self.mobile, otp), OTP_INVALID)
+
+        otp = store.issue(self.mobile).otp
+        OTPLog.objects.filter(otp=otp, verified=False).update(expiry=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(store.verify(self.mobile, otp), OTP_EXPIRED)
+
+    def test_signed_store_refuses_replays_and_other_numbers(self):
+        store = SignedOTPStore()
+        otp, token = store.issue(self.mobile)
+        self.assertEqual(store.verify('9123456789', otp, token=token), OTP_INVALID)
+        self.assertEqual(store.verify(self.mobile, otp, token=token), OTP_OK)
+        self.assertEqual(store.verify(self.mobile, otp, token=token), OTP_INVALID)
+
+    def test_signed_store_expires(self):
+        store = SignedOTPStore()
+        otp, token = store.issue(self.mobile)
+        with mock.patch('time.time', return_value=time.time() + settings.OTP_EXPIRY_SECONDS + 1):
+            self.assertEqual(store.verify(self.mobile, otp, token=token), OTP_EXPIRED)
+
+
+class RateLimitTests(AccountsTestCase):
+    """accounts.ratelimit with the cache fallback"""
+
+    def test_every_spelling_of_a_number_shares_its_budget(self):
+        request = RequestFactory().post('/')
+        capacity = int(settings.OTP_RATE_LIMITS['issue']['mobile'].split('/')[0])
+        spellings = ['+919123456780', '9123456780', '09123456780', '+91 91234 56780']
+        for mobile in spellings[:capacity]:
+            self.assertEqual(check_rate_limit('issue', request, mobile), (True, 0))
+
+        allowed, retry_after = check_rate_limit('issue', request, spellings[capacity])
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        # Other numbers keep their own budget
+        self.assertTrue(check_rate_limit('issue', request, '9123456789')[0])
+
+    def test_over_budget_issue_gets_429(self):
+        capacity = int(settings.OTP_RATE_LIMITS['issue']['mobile'].split('/')[0])
+        for _ in range(capacity):
+            self.client.post(reverse('mobile_login'), {'mobile': '9123456780'})
+        response = self.client.post(reverse('mobile_login'), {'mobile': '9123456780'})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(SMSDispatch.objects.count(), capacity)
+
+
+class SMSClientTests(TestCase):
+    """accounts.sms: circuit breakers, hedging and failover"""
+
+    def client_for(self, *providers, hedge_after=5):
+        client = SMSClient(providers, hedge_after=hedge_after)
+        self.addCleanup(client._executor.shutdown)
+        return client
+
+    def test_breaker_opens_then_lets_one_trial_through(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        breaker.opened_at -= 30
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_slow_provider_is_hedged(self):
+        slow, fast = FakeProvider('slow', delay=0.5), FakeProvider('fast')
+        self.assertEqual(self.client_for(slow, fast, hedge_after=0.05).send_otp('9123456780', '123456'), 'fast-ref')
+        self.assertEqual((slow.calls, fast.calls), (1, 1))
+
+    def test_unused_backup_keeps_its_trial(self):
+        primary, backup = FakeProvider('primary'), FakeProvider('backup')
+        backup.breaker.state = CircuitBreaker.OPEN
+        backup.breaker.opened_at = time.monotonic() - backup.breaker.reset_timeout
+        self.assertEqual(self.client_for(primary, backup).send_otp('9123456780', '123456'), 'primary-ref')
+        self.assertEqual(backup.breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(backup.breaker.allow())
+
+    def test_unexpected_error_counts_against_the_breaker_and_fails_over(self):
+        primary, backup = FakeProvider('primary', [ValueError('bug')]), FakeProvider('backup')
+        self.assertEqual(self.client_for(primary, backup).send_otp('9123456780', '123456'), 'backup-ref')
+        self.assertEqual(primary.breaker.failures, 1)
+
+    def test_all_open_breakers_fail_fast(self):
+        down = FakeProvider('down')
+        down.breaker.state = CircuitBreaker.OPEN
+        down.breaker.opened_at = time.monotonic()
+        with self.assertRaises(SMSProviderUnavailable):
+            self.client_for(down).send_otp('9123456780', '123456')
+        self.assertEqual(down.calls, 0)
+
+
+class SMSDispatchTests(AccountsTestCase):
+    """accounts.dispatch: leasing, retries and the OTP's lifetime on the row"""
+
+    def setUp(self):
+        super().setUp()
+        self.dispatch = enqueue_otp_sms('+919123456780', '123456')
+
+    def deliver_due(self):
+        SMSDispatch.objects.filter(pk=self.dispatch.pk).update(next_attempt_at=timezone.now())
+        (dispatch,) = claim_due(10)
+        return deliver(dispatch)
+
+    def test_failure_is_retried_then_sent(self):
+        with override_settings(SMS_PROVIDERS=fake_providers(SMSProviderUnavailable('fake: HTTP 503'))):
+            self.assertEqual(self.deliver_due(), 'pending')
+            dispatch = SMSDispatch.objects.get()
+            self.assertEqual((dispatch.attempts, dispatch.last_error, dispatch.otp), (1, 'fake: HTTP 503', '123456'))
+            self.assertGreater(dispatch.next_attempt_at, timezone.now())
+
+            self.assertEqual(self.deliver_due(), 'sent')
+        dispatch = SMSDispatch.objects.get()
+        self.assertEqual((dispatch.attempts, dispatch.provider_reference, dispatch.otp), (2, 'fake-ref', ''))
+
+    def test_unexpected_error_is_recorded_and_retried(self):
+        provider = {'BACKEND': 'accounts.tests.MisconfiguredProvider', 'NAME': 'broken'}
+        with override_settings(SMS_PROVIDERS=[provider]), self.assertLogs('accounts.dispatch', 'ERROR'):
+            self.assertEqual(self.deliver_due(), 'pending')
+        self.assertEqual(SMSDispatch.objects.get().last_error, 'broken: no API key')
+
+    def test_last_attempt_fails_for_good_and_drops_the_otp(self):
+        SMSDispatch.objects.update(attempts=settings.SMS_MAX_ATTEMPTS - 1)
+        with override_settings(SMS_PROVIDERS=fake_providers(SMSProviderUnavailable('fake: timeout'))):
+            self.assertEqual(self.deliver_due(), 'failed')
+        self.assertEqual(SMSDispatch.objects.get().otp, '')
+
+
+class PurgeTests(AccountsTestCase):
+    """manage.py purge_otp_logs"""
+
+    def test_only_rows_past_retention_are_deleted(self):
+        expiry = timezone.now() + timedelta(seconds=90)
+        old_log, new_log = (OTPLog.objects.create(mobile='9123456780', otp='123456', expiry=expiry) for _ in range(2))
+        old_dispatch, new_dispatch = (enqueue_otp_sms('+919123456780', '123456') for _ in range(2))
+        OTPLog.objects.filter(pk=old_log.pk).update(
+            created_at=timezone.now() - timedelta(days=settings.OTP_LOG_RETENTION_DAYS + 1)
+        )
+        SMSDispatch.objects.filter(pk=old_dispatch.pk).update(
+            created_at=timezone.now() - timedelta(days=settings.SMS_DISPATCH_RETENTION_DAYS + 1)
+        )
+
+        call_command('purge_otp_logs', batch_size=1, sleep=0, stdout=io.StringIO())
+        self.assertEqual(list(OTPLog.objects.values_list('pk', flat=True)), [new_log.pk])
+        self.assertEqual(list(SMSDispatch.objects.values_list('pk', flat=True)), [new_dispatch.pk])
+
+
+class UserTests(AccountsTestCase):
+    """User.objects.get_or_create_by_mobile"""
+
+    def test_creates_once_and_never_rewrites_the_row(self):
+        user = User.objects.get_or_create_by_mobile('9123456780')
+        self.assertEqual((user.auth_type, user.is_active), ('otp', True))
+
+        with CaptureQueriesContext(connection) as captured:
+            again = User.objects.get_or_create_by_mobile('9123456780')
+        self.assertEqual(again.pk, user.pk)
+        self.assertEqual(User.objects.count(), 1)
+        self.assertFalse(any('DO UPDATE' in query['sql'] or query['sql'].startswith('UPDATE') for query in captured))
+
+
+class SessionStoreTests(AccountsTestCase):
+    """accounts.session_backend: lazy writes"""
+
+    def test_unchanged_session_is_not_written(self):
+        session = SessionStore()
+        session['cart'] = [1, 2]
+        session.save()
+
+        loaded = SessionStore(session.session_key)
+        loaded['cart'] = [1, 2]
+        self.assertTrue(loaded.modified)
+        with self.assertNumQueries(0):
+            loaded.save()
+
+        loaded['cart'] = [1, 2, 3]
+        loaded.save()
+        self.assertEqual(SessionStore(session.session_key)['cart'], [1, 2, 3])
+
+
+@override_settings(AUTH_USER_CACHE_ENABLED=True)
+class UserCacheTests(AccountsTestCase):
+    """accounts.middleware: cached request.user"""
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.get_or_create_by_mobile('9123456780')
+        self.client.force_login(self.user, backend=MODEL_BACKEND)
+        self.request = RequestFactory().get('/')
+        self.request.session = self.client.session
+        self.request.session.load()
+
+    def test_warm_request_needs_no_query(self):
+        self.assertEqual(resolve_user(self.request), self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_user(self.request), self.user)
+
+    def test_bulk_updates_drop_the_entry(self):
+        resolve_user(self.request)
+        User.objects.bulk_update([User(pk=self.user.pk, last_login=timezone.now())], ['last_login'])
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+
+        resolve_user(self.request)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsInstance(resolve_user(self.request), AnonymousUser)
+
+    def test_bulk_update_reads_no_pks(self):
+        with CaptureQueriesContext(connection) as captured:
+            User.objects.bulk_update([User(pk=self.user.pk, last_login=timezone.now())], ['last_login'])
+        self.assertEqual([query['sql'].split()[0] for query in captured], ['UPDATE'])
+
+    def test_entry_cached_before_commit_is_dropped_on_commit(self):
+        resolve_user(self.request)
+        with self.captureOnCommitCallbacks(execute=True):
+            stale = cache.get(user_cache_key(self.user.pk))
+            User.objects.filter(pk=self.user.pk).update(is_active=False)
+            # A request that read the row before COMMIT caches it again
+            cache.set(user_cache_key(self.user.pk), stale)
+        self.assertIsInstance(resolve_user(self.request), AnonymousUser)
+
+    def test_update_of_every_user_retires_the_cache(self):
+        resolve_user(self.request)
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as captured:
+                User.objects.update(is_active=False)
+        self.assertEqual([query['sql'].split()[0] for query in captured], ['UPDATE'])
+        self.assertIsInstance(resolve_user(self.request), AnonymousUser)
+
+
+@override_settings(ROOT_URLCONF='accounts.tests')
+class AsyncLoginFlowTests(AccountsTestCase):
+    """AsyncMobileLoginView and AsyncVerifyOTPView"""
+
+    async def test_issue_verify_and_log_in(self):
+        response = await self.async_client.post('/async/login/mobile/', {'mobile': '9123456780'})
+        body = response.json()
+        self.assertTrue(body['success'])
+        otp = await SMSDispatch.objects.values_list('otp', flat=True).aget(pk=body['dispatch_id'])
+
+        response = await self.async_client.post(
+            '/async/verify-otp/', {'mobile': '9123456780', 'otp': otp, 'token': body['token'] or ''}
+        )
+        self.assertEqual(response.json()['redirect'], '/profile/start/')
+        user = await User.objects.aget(mobile='9123456780')
+        session = await self.async_client.asession()
+        self.assertEqual(await session.aget('_auth_user_id'), str(user.pk))
+
+        # Logged in: the login page sends the student on
+        response = await self.async_client.get('/async/login/mobile/')
+        self.assertEqual(response.status_code, 302)
+
+    async def test_wrong_otp_is_refused(self):
+        await self.async_client.post('/async/login/mobile/', {'mobile': '9123456780'})
+        response = await self.async_client.post('/async/verify-otp/', {'mobile': '9123456780', 'otp': '12345'})
+        self.assertFalse(response.json()['success'])
+        self.assertFalse(await User.objects.filter(mobile='9123456780').aexists())
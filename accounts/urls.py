@@ -1,9 +1,17 @@
+from django.conf import settings
 from django.urls import path
-from .views import LoginView, MobileLoginView, VerifyOTPView, LogoutView
+from .views import (
+    LoginView, MobileLoginView, VerifyOTPView, LogoutView, SMSStatusView,
+    AsyncMobileLoginView, AsyncVerifyOTPView
+)
+
+if settings.ASYNC_VIEWS:
+    MobileLoginView, VerifyOTPView = AsyncMobileLoginView, AsyncVerifyOTPView
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('login/mobile/', MobileLoginView.as_view(), name='mobile_login'),
     path('verify-otp/', VerifyOTPView.as_view(), name='verify_otp'),
+    path('otp-status/<uuid:dispatch_id>/', SMSStatusView.as_view(), name='sms_status'),
 ]
\ No newline at end of file
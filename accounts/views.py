@@ -1,17 +1,74 @@
-from django.shortcuts import render, redirect
-from django.contrib.auth import login, logout
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib.auth import alogin, login, logout
 from django.views import View
 from django.http import JsonResponse
-from django.utils import timezone
-from datetime import timedelta
-from django.conf import settings
-from .models import User, OTPLog
-import random
-import requests
+from django.db import transaction
+from .dispatch import aenqueue_otp_sms, enqueue_otp_sms
+from .models import User, SMSDispatch
+from .otp_store import get_otp_store, OTP_OK, OTP_EXPIRED, OTP_LOCKED
+from .ratelimit import acheck_rate_limit, check_rate_limit, retry_after_header
 
-def generate_otp():
-    """Generate a 6-digit OTP"""
-    return str(random.randint(100000, 999999))
+# Backend recorded in the session for OTP logins
+OTP_LOGIN_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+OTP_ERROR_MESSAGES = {
+    OTP_EXPIRED: 'OTP has expired',
+    OTP_LOCKED: 'Too many attempts. Please request a new OTP',
+}
+
+
+def rate_limited(retry_after):
+    """429 response for requests over the OTP rate limits"""
+    response = JsonResponse({
+        'success': False,
+        'message': 'Too many requests. Please try again later.'
+    }, status=429)
+    response['Retry-After'] = retry_after_header(retry_after)
+    return response
+
+
+def invalid_mobile(mobile):
+    return not mobile or len(mobile) < 10
+
+
+def otp_sent(mobile, challenge, dispatch):
+    return JsonResponse({
+        'success': True,
+        'message': "OTP sent successfully!",
+        'mobile': mobile,
+        'dispatch_id': str(dispatch.id),
+        'token': challenge.token
+    })
+
+
+def consume_otp(mobile, otp, token):
+    """
+    Consume the OTP and fetch/create the user in one transaction: a
+    conditional UPDATE (DatabaseOTPStore only) and an insert-if-missing.
+
+    Returns ``(result, user)``; ``user`` is None unless result is OTP_OK.
+    """
+    with transaction.atomic():
+        result = get_otp_store().verify(mobile, otp, token=token)
+        if result != OTP_OK:
+            return result, None
+        return result, User.objects.get_or_create_by_mobile(mobile)
+
+
+def otp_rejected(result):
+    return JsonResponse({
+        'success': False,
+        'message': OTP_ERROR_MESSAGES.get(result, 'Invalid OTP')
+    })
+
+
+def login_succeeded():
+    return JsonResponse({
+        'success': True,
+        'message': 'Login successful!',
+        'redirect': '/profile/start/'
+    })
 
 
 class HomeView(View):
@@ -81,7 +138,7 @@ class LogoutView(View):
 #         })
 
 class MobileLoginView(View):
-    """Mobile number login - sends OTP using 2Factor API"""
+    """Mobile number login - queues an OTP SMS for the 2Factor API"""
 
     def get(self, request):
         if request.user.is_authenticated:
@@ -92,51 +149,66 @@ class MobileLoginView(View):
         mobile = request.POST.get('mobile', '').strip()
 
         # Validate mobile number
-        if not mobile or len(mobile) < 10:
+        if invalid_mobile(mobile):
             return JsonResponse({'success': False, 'message': 'Invalid mobile number'})
 
-        # Generate OTP
-        otp = generate_otp()
-        expiry = timezone.now() + timedelta(seconds=settings.OTP_EXPIRY_SECONDS)
+        allowed, retry_after = check_rate_limit('issue', request, mobile)
+        if not allowed:
+            return rate_limited(retry_after)
 
-        # Store OTP in DB
-        OTPLog.objects.create(
-            mobile=mobile,
-            otp=otp,
-            expiry=expiry
-        )
-        print('otp: ', otp, )
+        # Generate and store OTP
+        challenge = get_otp_store().issue(mobile)
+        otp = challenge.otp
         # Normalize number with +91
         if not mobile.startswith("+91"):
             mobile = "+91" + mobile
-        # 2Factor API URL
-        api_key = settings.TWO_FACTOR_API_KEY
-        url = f"https://2factor.in/API/V1/{api_key}/SMS/{mobile}/{otp}/OneCore"
-
-        try:
-            response = requests.get(url, timeout=5)
-            result = response.json()
-
-            if result.get("Status") != "Success":
-                return JsonResponse({
-                    'success': False,
-                    'message': "Failed to send OTP. Please try again."
-                })
-
-        except Exception as e:
-            # Log the error
-            print("2Factor API Error:", str(e))
-            return JsonResponse({
-                'success': False,
-                'message': "OTP service unavailable. Please try again later."
-            })
 
+        # Queue the SMS; the SMS worker delivers it and retries on failure
+        dispatch = enqueue_otp_sms(mobile, otp)
+
+        return otp_sent(mobile, challenge, dispatch)
+
+
+class AsyncMobileLoginView(View):
+    """MobileLoginView for ASGI deployments (ASYNC_VIEWS)"""
+
+    async def get(self, request):
+        user = await request.auser()
+        if user.is_authenticated:
+            return redirect('profile_start')
+        return await sync_to_async(render)(request, 'accounts/mobile_login.html')
+
+    async def post(self, request):
+        mobile = request.POST.get('mobile', '').strip()
+
+        if invalid_mobile(mobile):
+            return JsonResponse({'success': False, 'message': 'Invalid mobile number'})
+
+        allowed, retry_after = await acheck_rate_limit('issue', request, mobile)
+        if not allowed:
+            return rate_limited(retry_after)
+
+        challenge = await get_otp_store().aissue(mobile)
+        otp = challenge.otp
+        if not mobile.startswith("+91"):
+            mobile = "+91" + mobile
+
+        dispatch = await aenqueue_otp_sms(mobile, otp)
+
+        return otp_sent(mobile, challenge, dispatch)
+
+
+class SMSStatusView(View):
+    """Delivery status of a queued OTP SMS"""
+
+    def get(self, request, dispatch_id):
+        dispatch = get_object_or_404(SMSDispatch, id=dispatch_id)
         return JsonResponse({
-            'success': True,
-            'message': "OTP sent successfully!",
-            'mobile': mobile
+            'status': dispatch.status,
+            'attempts': dispatch.attempts
         })
-    
+
+
 class VerifyOTPView(View):
     """Verify OTP and create/login user"""
     
@@ -146,48 +218,68 @@ class VerifyOTPView(View):
             return redirect('profile_start')
             
         mobile = request.GET.get('mobile', '')
-        return render(request, 'accounts/verify_otp.html', {'mobile': mobile})
+        token = request.GET.get('token', '')
+        return render(request, 'accounts/verify_otp.html', {'mobile': mobile, 'token': token})
     
     def post(self, request):
         mobile = request.POST.get('mobile', '').strip()
         otp = request.POST.get('otp', '').strip()
+        token = request.POST.get('token', '')
         
         if not mobile or not otp:
             return JsonResponse({'success': False, 'message': 'Mobile and OTP are required'})
         
-        # Get the most recent unverified OTP for this mobile
-        try:
-            otp_log = OTPLog.objects.filter(
-                mobile=mobile,
-                otp=otp,
-                verified=False
-            ).latest('created_at')
-        except OTPLog.DoesNotExist:
-            return JsonResponse({'success': False, 'message': 'Invalid OTP'})
+        allowed, retry_after = check_rate_limit('verify', request, mobile)
+        if not allowed:
+            return rate_limited(retry_after)
         
-        # Check if OTP is expired
-        if otp_log.is_expired():
-            return JsonResponse({'success': False, 'message': 'OTP has expired'})
+        result, user = consume_otp(mobile, otp, token)
+        if result != OTP_OK:
+            return otp_rejected(result)
         
-        # Mark OTP as verified
-        otp_log.verified = True
-        otp_log.verified_at = timezone.now()
-        otp_log.save()
-        
-        # Get or create user
-        user, created = User.objects.get_or_create(
-            mobile=mobile,
-            defaults={
-                'auth_type': 'otp',
-                'is_active': True
-            }
-        )
+        if not user.is_active:
+            return JsonResponse({'success': False, 'message': 'This account has been deactivated'})
         
         # Log the user in
-        login(request, user, backend='django.contrib.auth.backends.ModelBackend')
+        login(request, user, backend=OTP_LOGIN_BACKEND)
         
-        return JsonResponse({
-            'success': True,
-            'message': 'Login successful!',
-            'redirect': '/profile/start/'
-        })
\ No newline at end of file
+        return login_succeeded()
+
+
+class AsyncVerifyOTPView(View):
+    """VerifyOTPView for ASGI deployments (ASYNC_VIEWS)"""
+
+    async def get(self, request):
+        user = await request.auser()
+        if user.is_authenticated:
+            return redirect('profile_start')
+
+        mobile = request.GET.get('mobile', '')
+        token = request.GET.get('token', '')
+        return await sync_to_async(render)(
+            request, 'accounts/verify_otp.html', {'mobile': mobile, 'token': token}
+        )
+
+    async def post(self, request):
+        mobile = request.POST.get('mobile', '').strip()
+        otp = request.POST.get('otp', '').strip()
+        token = request.POST.get('token', '')
+
+        if not mobile or not otp:
+            return JsonResponse({'success': False, 'message': 'Mobile and OTP are required'})
+
+        allowed, retry_after = await acheck_rate_limit('verify', request, mobile)
+        if not allowed:
+            return rate_limited(retry_after)
+
+        # transaction.atomic() is sync-only, so the whole transaction runs in one thread
+        result, user = await sync_to_async(consume_otp)(mobile, otp, token)
+        if result != OTP_OK:
+            return otp_rejected(result)
+
+        if not user.is_active:
+            return JsonResponse({'success': False, 'message': 'This account has been deactivated'})
+
+        await alogin(request, user, backend=OTP_LOGIN_BACKEND)
+
+        return login_succeeded()
@@ -0,0 +1,20 @@
+"""
+Gunicorn settings for serving the ASGI application with uvicorn workers:
+
+    ASYNC_VIEWS=True gunicorn config.asgi -c python:config.gunicorn_asgi
+
+Each worker runs one event loop, so a request waiting on the database or the
+cache no longer holds the whole worker. Command-line flags override these
+values (e.g. ``-w 1 -b :8001`` for ``manage.py bench_concurrency``).
+"""
+# Every module-level name is read as a gunicorn setting, and 'config' is one
+import decouple
+
+bind = f"0.0.0.0:{decouple.config('PORT', default='8000')}"
+workers = decouple.config('WEB_CONCURRENCY', default=2, cast=int)
+worker_class = 'uvicorn_worker.UvicornWorker'
+timeout = 30
+keepalive = 5
+# Recycle workers now and then; jitter keeps them from restarting together
+max_requests = 5000
+max_requests_jitter = 500
@@ -47,7 +47,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
@@ -72,6 +72,12 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Route the login and registration pages to their async views. Enable together
+# with the ASGI server (config/gunicorn_asgi.py); under WSGI they still work
+# but each request pays for its own event loop.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
 
 # Database
 DATABASES = {
@@ -118,6 +124,15 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Served by students.views.media_file to the owning student or staff. Behind a
+# proxy, the view only authorizes and the proxy sends the file: 'nginx'
+# (X-Accel-Redirect to MEDIA_ACCEL_PREFIX, an `internal` location aliased to
+# MEDIA_ROOT) or 'sendfile' (X-Sendfile: Apache mod_xsendfile, lighttpd).
+# Empty: the worker sends it (os.sendfile under gunicorn).
+MEDIA_ACCEL = config('MEDIA_ACCEL', default='')
+MEDIA_ACCEL_PREFIX = config('MEDIA_ACCEL_PREFIX', default='/protected-media/')
+# Browsers may reuse a downloaded file this long; shared caches may not store it
+MEDIA_MAX_AGE = 3600
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -171,19 +186,137 @@ SOCIALACCOUNT_PROVIDERS = {
 }
 
 # Redis configuration for OTP storage
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# LocMemCache is per-process, so anything that must be shared between
+# gunicorn workers (OTPs, rate limits) needs REDIS_URL in production.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
     }
-}
 
 # Session configuration
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Cache-first sessions need a cache shared by all workers; without Redis keep
+# plain database sessions. Expired rows are removed by `manage.py sweep_sessions`.
+SESSION_ENGINE = 'accounts.session_backend' if REDIS_URL else 'django.contrib.sessions.backends.db'
+
+# Authenticated-user cache (accounts.middleware.CachedAuthenticationMiddleware)
+# Entries are dropped when the user is saved, which only reaches other workers
+# through a shared cache; without Redis the middleware always loads from the DB.
+AUTH_USER_CACHE_ENABLED = config('AUTH_USER_CACHE_ENABLED', default=bool(REDIS_URL), cast=bool)
+AUTH_USER_CACHE_TIMEOUT = 300
+# Load StudentProfile in the same query as the user on a cache miss
+AUTH_USER_CACHE_CO_LOAD_PROFILE = True
+
+# Rendered registration step forms, per profile (students.render_cache)
+# Entries are checked against the profile's updated_at, so a per-worker cache
+# never serves a stale form.
+PROFILE_STEP_CACHE_ENABLED = config('PROFILE_STEP_CACHE_ENABLED', default=True, cast=bool)
+PROFILE_STEP_CACHE_TIMEOUT = 3600
+
+# Full-profile snapshots for the review page and dashboard (students.snapshots)
+PROFILE_SNAPSHOT_CACHE_ENABLED = config('PROFILE_SNAPSHOT_CACHE_ENABLED', default=True, cast=bool)
+PROFILE_SNAPSHOT_CACHE_TIMEOUT = 3600
+# Longest a rebuild may hold its lock, and others wait for it
+PROFILE_SNAPSHOT_LOCK_TIMEOUT = 5
+
+# Resumable document uploads (students.uploads)
+# Chunks are staged here, outside MEDIA_ROOT, until the last one arrives. All
+# workers must see the same directory, as a session's chunks may reach any of them.
+UPLOAD_STAGING_DIR = config('UPLOAD_STAGING_DIR', default=str(BASE_DIR / 'upload_staging'))
+UPLOAD_CHUNK_SIZE = config('UPLOAD_CHUNK_SIZE', default=1024 * 1024, cast=int)
+# Unfinished sessions idle for longer are removed by `manage.py purge_upload_sessions`
+UPLOAD_SESSION_MAX_AGE_HOURS = 24
+
+# Student photo derivatives (students.photos), made by `manage.py run_photo_worker`
+# Larger photos are refused before they are decoded
+PHOTO_MAX_PIXELS = config('PHOTO_MAX_PIXELS', default=40_000_000, cast=int)
+PHOTO_JOB_MAX_ATTEMPTS = 3
+PHOTO_JOB_LEASE_SECONDS = 120
+
+# Deduplicated resumes, ID proofs and marksheets (students.documents)
+# Files no profile references any more are kept this long in case they are
+# uploaded again, then removed by `manage.py collect_document_blobs` (run daily)
+DOCUMENT_BLOB_GRACE_HOURS = 24
 
 # OTP Settings
 OTP_EXPIRY_SECONDS = 90
+OTP_MAX_ATTEMPTS = 5
+
+# Cache-backed OTPs need a shared cache; fall back to OTPLog rows without Redis.
+# 'accounts.otp_store.SignedOTPStore' verifies HMAC-signed challenges without
+# shared state (only a replay set of used nonces in the cache).
+OTP_STORE = config(
+    'OTP_STORE',
+    default='accounts.otp_store.CacheOTPStore' if REDIS_URL else 'accounts.otp_store.DatabaseOTPStore'
+)
+
+# Write the OTPLog audit trail from a background thread in batches
+OTP_AUDIT_ASYNC = config('OTP_AUDIT_ASYNC', default=True, cast=bool)
+
+# Persist last_login in batches from a background thread instead of one UPDATE per login
+LAST_LOGIN_WRITE_BEHIND = config('LAST_LOGIN_WRITE_BEHIND', default=True, cast=bool)
+
+# OTPLog rows older than this are removed by `manage.py purge_otp_logs` (run daily)
+OTP_LOG_RETENTION_DAYS = config('OTP_LOG_RETENTION_DAYS', default=30, cast=int)
+
+# Token-bucket limits for OTP issue/verify: "<tokens>/<period>", period in s/m/h.
+# Buckets are shared through Redis (REDIS_URL); LocMemCache limits per process only.
+RATELIMIT_ENABLED = config('RATELIMIT_ENABLED', default=True, cast=bool)
+OTP_RATE_LIMITS = {
+    'issue': {'mobile': '3/10m', 'ip': '20/h', 'global': '3000/m'},
+    'verify': {'mobile': '10/10m', 'ip': '100/h', 'global': '10000/m'},
+}
+
+# Number of reverse proxies (e.g. the Heroku router) that append to X-Forwarded-For
+NUM_PROXIES = config('NUM_PROXIES', default=1, cast=int)
 
 TWO_FACTOR_API_KEY = config('TWO_FACTOR_API_KEY')
+TWO_FACTOR_BASE_URL = config('TWO_FACTOR_BASE_URL', default='https://2factor.in')
+
+# SMS providers, tried in order. A provider that has not answered within
+# SMS_HEDGE_AFTER_MS is hedged with the next one; providers that keep failing
+# are skipped by their circuit breaker for SMS_BREAKER_RESET_SECONDS.
+SMS_PROVIDERS = [
+    {
+        'BACKEND': 'accounts.sms.TwoFactorProvider',
+        'NAME': '2factor',
+        'OPTIONS': {'api_key': TWO_FACTOR_API_KEY, 'base_url': TWO_FACTOR_BASE_URL},
+    },
+]
+
+TWO_FACTOR_BACKUP_API_KEY = config('TWO_FACTOR_BACKUP_API_KEY', default='')
+if TWO_FACTOR_BACKUP_API_KEY:
+    SMS_PROVIDERS.append({
+        'BACKEND': 'accounts.sms.TwoFactorProvider',
+        'NAME': '2factor-backup',
+        'OPTIONS': {
+            'api_key': TWO_FACTOR_BACKUP_API_KEY,
+            'base_url': config('TWO_FACTOR_BACKUP_BASE_URL', default=TWO_FACTOR_BASE_URL),
+        },
+    })
+
+SMS_PROVIDER_TIMEOUT_SECONDS = 5
+SMS_HEDGE_AFTER_MS = 1500
+SMS_BREAKER_FAILURE_THRESHOLD = 5
+SMS_BREAKER_RESET_SECONDS = 30
+
+# SMS dispatch queue (delivered by `manage.py run_sms_worker`)
+SMS_MAX_ATTEMPTS = 5
+SMS_RETRY_BASE_SECONDS = 2
+SMS_RETRY_MAX_SECONDS = 30
+SMS_LEASE_SECONDS = 30
+# SMSDispatch rows older than this are removed by `manage.py purge_otp_logs`
+SMS_DISPATCH_RETENTION_DAYS = config('SMS_DISPATCH_RETENTION_DAYS', default=7, cast=int)
 
 
@@ -9,7 +9,10 @@ from accounts.views import HomeView
 
 # Dashboard URL at root level
 from django.urls import path
-from students.views import dashboard
+from students.views import dashboard, async_dashboard, media_file
+
+if settings.ASYNC_VIEWS:
+    dashboard = async_dashboard
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -18,9 +21,10 @@ urlpatterns = [
     path('', include('accounts.urls')),
     path('profile/', include('students.urls')),
     path('dashboard/', dashboard, name='dashboard'),
+    # Uploaded files, authorized per request (students.media); in production too
+    path(f'{settings.MEDIA_URL.strip("/")}/<path:name>', media_file, name='media_file'),
 ]
 
-# Serve media files in development
+# Serve static files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
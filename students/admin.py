@@ -1,7 +1,10 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.http import HttpResponse
 import csv
-from .models import StudentProfile, Experience
+from .models import CORE_FIELDS, StudentProfile, Experience
+from .photos import photo_html
+from .steps import ADMIN_FIELDSETS, EXPORT_FIELDS
 
 
 class ExperienceInline(admin.TabularInline):
@@ -10,15 +13,24 @@ class ExperienceInline(admin.TabularInline):
     extra = 1
 
 
+class StudentProfileChangeList(ChangeList):
+    """Loads only the columns the list shows, plus the user's contact fields"""
+    
+    def get_queryset(self, request, exclude_parameters=None):
+        return super().get_queryset(request, exclude_parameters).select_related('user').only(
+            *CORE_FIELDS, 'photo', 'college_name', 'graduation_year', 'user__email', 'user__mobile'
+        )
+
+
 @admin.register(StudentProfile)
 class StudentProfileAdmin(admin.ModelAdmin):
     """Student Profile admin with CSV export"""
     
-    list_display = ['full_name', 'user_email', 'user_mobile', 'college_name', 'graduation_year', 
+    list_display = ['photo_thumbnail', 'full_name', 'user_email', 'user_mobile', 'college_name', 'graduation_year', 
                     'step_completed', 'is_complete', 'created_at']
     list_filter = ['is_complete', 'graduation_year', 'work_type', 'current_status', 'created_at']
     search_fields = ['full_name', 'user__email', 'user__mobile', 'college_name', 'university']
-    readonly_fields = ['created_at', 'updated_at', 'submitted_at']
+    readonly_fields = ['created_at', 'updated_at', 'submitted_at', 'photo_preview']
     ordering = ['-created_at']
     
     inlines = [ExperienceInline]
@@ -27,39 +39,10 @@ class StudentProfileAdmin(admin.ModelAdmin):
         ('User Information', {
             'fields': ('user',)
         }),
-        ('Basic Details', {
-            'fields': ('full_name', 'gender', 'date_of_birth', 'current_city', 'current_state', 
-                      'preferred_languages')
-        }),
-        ('Education', {
-            'fields': ('current_status', 'highest_qualification', 'stream_specialization', 
-                      'college_name', 'university', 'graduation_year', 'academic_scores', 
-                      'has_backlogs', 'num_backlogs')
-        }),
-        ('Skills', {
-            'fields': ('english_speaking', 'english_reading', 'english_writing', 
-                      'computer_skills', 'tool_exposure', 'typing_speed')
-        }),
-        ('Career Preferences', {
-            'fields': ('preferred_job_roles', 'preferred_industries', 'work_type', 
-                      'preferred_locations', 'willing_to_relocate', 'expected_salary')
-        }),
-        ('Availability', {
-            'fields': ('time_for_training', 'preferred_time_slots', 'has_mobile_access', 
-                      'has_laptop_access', 'internet_quality', 'constraints')
-        }),
-        ('Behavioural Fit', {
-            'fields': ('comfort_talking_strangers', 'comfort_handling_angry_customers', 
-                      'comfort_working_with_data', 'comfort_following_targets', 
-                      'comfort_writing_emails', 'people_vs_task_oriented', 'office_vs_remote', 
-                      'analysis_vs_communication', 'career_concerns', 'career_goal_3_years')
-        }),
-        ('Training Information', {
-            'fields': ('previous_training', 'discovery_source', 'commitment_confirmed', 
-                      'fee_preference')
-        }),
-        ('Documents', {
-            'fields': ('photo', 'resume', 'id_proof', 'marksheet')
+        # One fieldset per registration step (students/steps.py)
+        *ADMIN_FIELDSETS,
+        ('Photo Derivatives', {
+            'fields': ('photo_preview',)
         }),
         ('Progress', {
             'fields': ('step_completed', 'is_complete', 'submitted_at', 'created_at', 'updated_at')
@@ -68,6 +51,17 @@ class StudentProfileAdmin(admin.ModelAdmin):
     
     actions = ['export_as_csv']
     
+    def get_changelist(self, request, **kwargs):
+        return StudentProfileChangeList
+    
+    def photo_thumbnail(self, obj):
+        return photo_html(obj, 'thumb', style='width: 40px; height: 40px; object-fit: cover; border-radius: 4px;')
+    photo_thumbnail.short_description = 'Photo'
+    
+    def photo_preview(self, obj):
+        return photo_html(obj, 'medium') or '-'
+    photo_preview.short_description = 'Photo'
+    
     def user_email(self, obj):
         return obj.user.email or '-'
     user_email.short_description = 'Email'
@@ -80,12 +74,7 @@ class StudentProfileAdmin(admin.ModelAdmin):
         """Export selected student profiles as CSV"""
         
         meta = self.model._meta
-        field_names = [
-            'full_name', 'gender', 'date_of_birth', 'current_city', 'current_state',
-            'current_status', 'highest_qualification', 'college_name', 'university',
-            'graduation_year', 'academic_scores', 'preferred_job_roles', 'expected_salary',
-            'work_type', 'willing_to_relocate', 'typing_speed', 'is_complete'
-        ]
+        field_names = list(EXPORT_FIELDS)
         
         response = HttpResponse(content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename=student_profiles.csv'
@@ -93,6 +82,9 @@ class StudentProfileAdmin(admin.ModelAdmin):
         writer = csv.writer(response)
         writer.writerow(['Email', 'Mobile'] + field_names)
         
+        # Replaces the changelist's narrow column set with the exported one
+        queryset = queryset.select_related('user').only('user', *field_names, 'user__email', 'user__mobile')
+        
         for obj in queryset:
             row = [obj.user.email or '', obj.user.mobile or '']
             for field in field_names:
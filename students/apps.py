@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'students'
+
+    def ready(self):
+        # Connects the receivers that drop cached step renders and snapshots on
+        # save/delete, queue new photos for their derivatives and count document references
+        from . import documents, photos, render_cache, snapshots  # noqa: F401
@@ -0,0 +1,153 @@
+"""
+Deduplicated student documents.
+
+Resumes, ID proofs and marksheets are stored through
+``students.storage.ContentAddressedStorage``. A file is stored once, however
+often it is uploaded: a retried step 8, or the same PDF given as both resume
+and marksheet. Photos are not stored this way, because their derivatives are
+named after the original (students.photos).
+
+Each stored file has a ``DocumentBlob`` row that counts the profile fields
+pointing at it. The receivers below keep the count up to date as profiles are
+saved and deleted. A file whose count drops to zero is kept for
+``DOCUMENT_BLOB_GRACE_HOURS`` in case it is uploaded again, then removed by
+``manage.py collect_document_blobs``. Files saved before this storage keep
+their ``resumes/...`` names, and are neither counted nor collected, until
+``manage.py shard_media`` moves them in.
+"""
+import os
+from collections import Counter
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import DocumentBlob, StudentProfile
+from .storage import BLOB_PREFIX
+
+DOCUMENT_FIELDS = ('resume', 'id_proof', 'marksheet')
+
+
+def acquire(*names):
+    """Count a new reference from each name's field"""
+    _adjust_refcounts(names, 1)
+
+
+def release(*names):
+    """Drop a reference from each name's field"""
+    _adjust_refcounts(names, -1)
+
+
+def _adjust_refcounts(names, sign):
+    # One UPDATE per multiplicity; names of legacy files and empty fields match no row
+    by_count = {}
+    for name, count in Counter(name for name in names if name).items():
+        by_count.setdefault(count, []).append(name)
+    for count, group in by_count.items():
+        blobs = DocumentBlob.objects.filter(name__in=group)
+        if sign < 0:
+            blobs = blobs.filter(refcount__gte=count)
+        blobs.update(refcount=F('refcount') + sign * count, updated_at=timezone.now())
+
+
+def collect_blobs(cutoff, dry_run=False):
+    """
+    Delete the files unreferenced since ``cutoff``, and files under
+    ``documents/`` without a row (a save that died half way); returns
+    (files, bytes)
+    """
+    storage = StudentProfile._meta.get_field('resume').storage
+    files = freed = 0
+    for blob in DocumentBlob.objects.filter(refcount=0, updated_at__lt=cutoff).iterator():
+        if dry_run:
+            files, freed = files + 1, freed + blob.size
+        # Unless it was referenced or uploaded again since the query
+        elif DocumentBlob.objects.filter(pk=blob.pk, refcount=0, updated_at__lt=cutoff).delete()[0]:
+            storage.delete(blob.name)
+            files, freed = files + 1, freed + blob.size
+
+    root = storage.path(BLOB_PREFIX)
+    known = set(DocumentBlob.objects.values_list('name', flat=True))
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+            stat = os.stat(path)
+            if name not in known and stat.st_mtime < cutoff.timestamp():
+                if not dry_run:
+                    os.unlink(path)
+                files, freed = files + 1, freed + stat.st_size
+    return files, freed
+
+
+def recount_blobs():
+    """Set every count from the profile rows; returns how many were wrong"""
+    # Needed after writes that bypass the receivers (QuerySet.update(), raw SQL)
+    counts = Counter()
+    for names in StudentProfile.objects.values_list(*DOCUMENT_FIELDS):
+        counts.update(name for name in names if name)
+    wrong = 0
+    for name, refcount in DocumentBlob.objects.values_list('name', 'refcount'):
+        if refcount != counts[name]:
+            DocumentBlob.objects.filter(name=name).update(refcount=counts[name])
+            wrong += 1
+    return wrong
+
+
+def _saved_documents(instance, update_fields):
+    deferred = instance.get_deferred_fields()
+    return [
+        field for field in DOCUMENT_FIELDS
+        if field not in deferred and (update_fields is None or field in update_fields)
+    ]
+
+
+def remember_stored_documents(instance, fields=DOCUMENT_FIELDS):
+    """Note the names ``instance`` just loaded, so saves that leave them alone need no read"""
+    stored = instance.__dict__.setdefault('_stored_documents', {})
+    deferred = instance.get_deferred_fields()
+    for field in fields:
+        if field in DOCUMENT_FIELDS and field not in deferred:
+            stored[field] = getattr(instance, field).name or ''
+
+
+@receiver(post_init, sender=StudentProfile)
+def _remember_loaded_documents(sender, instance, **kwargs):
+    remember_stored_documents(instance)
+
+
+@receiver(pre_save, sender=StudentProfile)
+def _remember_replaced_documents(sender, instance, update_fields=None, **kwargs):
+    # The names being replaced; the new ones are only known after the save
+    previous = {}
+    if not instance._state.adding:
+        stored = instance.__dict__.get('_stored_documents', {})
+        fields = _saved_documents(instance, update_fields)
+        previous = {field: stored[field] for field in fields if field in stored}
+        # Deferred when the profile was loaded and assigned since
+        unknown = [field for field in fields if field not in stored]
+        if unknown:
+            previous.update(StudentProfile.objects.filter(pk=instance.pk).values(*unknown).first() or {})
+    instance._previous_documents = previous
+
+
+@receiver(post_save, sender=StudentProfile)
+def _count_documents(sender, instance, update_fields=None, **kwargs):
+    previous = instance.__dict__.pop('_previous_documents', {})
+    acquired, released = [], []
+    for field in _saved_documents(instance, update_fields):
+        old, new = previous.get(field) or '', getattr(instance, field).name or ''
+        instance.__dict__.setdefault('_stored_documents', {})[field] = new
+        # Uploading the same file again gives the same name: nothing changes
+        if old != new:
+            acquired.append(new)
+            released.append(old)
+    acquire(*acquired)
+    release(*released)
+
+
+@receiver(post_delete, sender=StudentProfile)
+def _release_documents(sender, instance, **kwargs):
+    deferred = instance.get_deferred_fields()
+    release(*(getattr(instance, field).name for field in DOCUMENT_FIELDS if field not in deferred))
@@ -1,17 +1,130 @@
 from django import forms
 from django.core.exceptions import ValidationError
+from django.forms.utils import ErrorDict
 from django.utils import timezone
 from datetime import date, timedelta
-from .models import StudentProfile, Experience
+from types import MappingProxyType
+from .models import StudentProfile, Experience, UploadSession
+from .steps import PROFILE_SECTIONS, STEPS_BY_NUMBER
 
 
-class Step1BasicInfoForm(forms.ModelForm):
+class StepFormMetaclass(forms.models.ModelFormMetaclass):
+    """Sets a step form's Meta.model and Meta.fields from its Step"""
+    
+    def __new__(mcs, name, bases, attrs):
+        step = attrs.get('step') or next((base.step for base in bases if getattr(base, 'step', None)), None)
+        meta = attrs.get('Meta')
+        if step is not None and meta is not None:
+            meta.model = StudentProfile
+            meta.fields = step.fields
+        return super().__new__(mcs, name, bases, attrs)
+
+
+class StepForm(forms.ModelForm, metaclass=StepFormMetaclass):
+    """Base for the step forms: fills and collects the step's multi-checkbox groups
+
+    The columns a step form edits come from ``steps.STEPS``; a subclass's Meta
+    only declares widgets and labels.
+    """
+    
+    step = None
+    # Set by for_changes(): only the submitted fields are bound and validated
+    partial = False
+    
+    @classmethod
+    def for_changes(cls, profile, changes):
+        """Form for an autosave delta ``changes`` (field name -> value) on ``profile``"""
+        form = cls(changes, instance=profile)
+        form.partial = True
+        form.fields = {
+            name: field for name, field in form.fields.items()
+            if name in changes and not isinstance(field, forms.FileField)
+        }
+        return form
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        
+        # A group's list column is filled from its checkboxes in clean(), which
+        # also enforces required_message; it is never posted itself
+        for group in self.step.checkbox_groups:
+            if group.model_field in self.fields:
+                self.fields[group.model_field].required = False
+        
+        # Tick the boxes for the labels stored on the profile
+        if self.instance and self.instance.pk:
+            for group in self.step.checkbox_groups:
+                for label in getattr(self.instance, group.model_field) or ():
+                    field_name = group.field_for_label.get(label)
+                    if field_name:
+                        self.initial[field_name] = True
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        
+        for group in self.step.checkbox_groups:
+            labels = [label for field, label in group.label_for_field.items() if cleaned_data.get(field)]
+            if not labels and group.required_message:
+                raise ValidationError(group.required_message)
+            cleaned_data[group.model_field] = labels
+        
+        return cleaned_data
+    
+    def full_clean(self):
+        if not self.partial:
+            return super().full_clean()
+        # Autosaved drafts get each field's own validation (field validators and
+        # clean_<field>); the cross-field checks run when the step is submitted
+        self._errors = ErrorDict()
+        self.cleaned_data = {}
+        self._clean_fields()
+    
+    def changed_columns(self):
+        """Column values for the valid fields of an autosave delta"""
+        section = PROFILE_SECTIONS[self.step.number]
+        values = {name: value for name, value in self.cleaned_data.items() if name in section}
+        
+        # Checkboxes toggle their label in the group's stored list
+        for group in self.step.checkbox_groups:
+            toggled = {
+                name: self.cleaned_data[name]
+                for name in group.label_for_field if name in self.cleaned_data
+            }
+            if toggled:
+                labels = [
+                    label for label in getattr(self.instance, group.model_field) or ()
+                    if group.field_for_label.get(label) not in toggled
+                ]
+                labels += [group.label_for_field[name] for name, checked in toggled.items() if checked]
+                values[group.model_field] = labels
+        return values
+    
+    def save(self, commit=True):
+        instance = super().save(commit=False)
+        for group in self.step.checkbox_groups:
+            setattr(instance, group.model_field, self.cleaned_data.get(group.model_field, []))
+        if commit:
+            instance.save()
+        return instance
+
+
+def step_form_base(number):
+    """StepForm subclass for step ``number`` with its checkbox fields declared"""
+    step = STEPS_BY_NUMBER[number]
+    attrs = {
+        choice.field: forms.BooleanField(required=False, label=choice.label)
+        for group in step.checkbox_groups
+        for choice in group.choices
+    }
+    attrs['step'] = step
+    attrs['Meta'] = type('Meta', (), {})
+    return type(f'Step{number}FormBase', (StepForm,), attrs)
+
+
+class Step1BasicInfoForm(step_form_base(1)):
     """Step 1: Basic Information Form"""
     
     class Meta:
-        model = StudentProfile
-        fields = ['full_name', 'gender', 'date_of_birth', 'current_city', 
-                  'current_state', 'preferred_languages']
         widgets = {
             'full_name': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -38,14 +151,6 @@ class Step1BasicInfoForm(forms.ModelForm):
             }),
         }
     
-    # Preferred languages as multiple checkboxes
-    lang_english = forms.BooleanField(required=False, label='English')
-    lang_hindi = forms.BooleanField(required=False, label='Hindi')
-    lang_tamil = forms.BooleanField(required=False, label='Tamil')
-    lang_telugu = forms.BooleanField(required=False, label='Telugu')
-    lang_kannada = forms.BooleanField(required=False, label='Kannada')
-    lang_bengali = forms.BooleanField(required=False, label='Bengali')
-    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         # Make fields required
@@ -54,13 +159,6 @@ class Step1BasicInfoForm(forms.ModelForm):
         self.fields['date_of_birth'].required = True
         self.fields['current_city'].required = True
         self.fields['current_state'].required = True
-        
-        # Pre-populate language checkboxes if editing
-        if self.instance and self.instance.pk and self.instance.preferred_languages:
-            for lang in self.instance.preferred_languages:
-                field_name = f'lang_{lang.lower()}'
-                if field_name in self.fields:
-                    self.initial[field_name] = True
     
     def clean_full_name(self):
         full_name = self.cleaned_data.get('full_name', '').strip()
@@ -79,38 +177,12 @@ class Step1BasicInfoForm(forms.ModelForm):
             if dob > today:
                 raise ValidationError('Date of birth cannot be in the future')
         return dob
-    
-    def clean(self):
-        cleaned_data = super().clean()
-        
-        # Collect selected languages
-        languages = []
-        for lang in ['English', 'Hindi', 'Tamil', 'Telugu', 'Kannada', 'Bengali']:
-            if cleaned_data.get(f'lang_{lang.lower()}'):
-                languages.append(lang)
-        
-        if not languages:
-            raise ValidationError('Please select at least one preferred language')
-        
-        cleaned_data['preferred_languages'] = languages
-        return cleaned_data
-    
-    def save(self, commit=True):
-        instance = super().save(commit=False)
-        instance.preferred_languages = self.cleaned_data.get('preferred_languages', [])
-        if commit:
-            instance.save()
-        return instance
 
 
-class Step2EducationForm(forms.ModelForm):
+class Step2EducationForm(step_form_base(2)):
     """Step 2: Education Details Form"""
     
     class Meta:
-        model = StudentProfile
-        fields = ['current_status', 'highest_qualification', 'stream_specialization',
-                  'college_name', 'university', 'graduation_year', 'academic_scores',
-                  'has_backlogs', 'num_backlogs']
         widgets = {
             'current_status': forms.RadioSelect(),
             'highest_qualification': forms.Select(attrs={
@@ -164,13 +236,10 @@ class Step2EducationForm(forms.ModelForm):
         return num_backlogs
 
 
-class Step3SkillsForm(forms.ModelForm):
+class Step3SkillsForm(step_form_base(3)):
     """Step 3: Skills & Exposure Form"""
     
     class Meta:
-        model = StudentProfile
-        fields = ['english_speaking', 'english_reading', 'english_writing',
-                   'typing_speed']
         widgets = {
             'english_speaking': forms.RadioSelect(choices=[(i, str(i)) for i in range(1, 6)]),
             'english_reading': forms.RadioSelect(choices=[(i, str(i)) for i in range(1, 6)]),
@@ -182,98 +251,8 @@ class Step3SkillsForm(forms.ModelForm):
                 'max': '200'
             }),
         }
-    
-    # Computer skills checkboxes (matching template exactly)
-    skill_ms_office = forms.BooleanField(required=False, label='MS Office')
-    skill_google_sheets = forms.BooleanField(required=False, label='Google Suite')
-    skill_email = forms.BooleanField(required=False, label='Email Communication')
-    skill_internet = forms.BooleanField(required=False, label='Internet Browsing & Research')
-    skill_social_media = forms.BooleanField(required=False, label='Social Media')
-    
-    # Tool exposure checkboxes (matching template exactly)
-    tool_excel = forms.BooleanField(required=False, label='MS Excel / Google Sheets')
-    tool_crm = forms.BooleanField(required=False, label='CRM Software')
-    tool_design = forms.BooleanField(required=False, label='Design Tools')
-    tool_video = forms.BooleanField(required=False, label='Video Conferencing')
-    tool_programming = forms.BooleanField(required=False, label='Programming / Coding')
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        
-        # Pre-populate computer skills
-        if self.instance and self.instance.pk and self.instance.computer_skills:
-            skill_map = {
-                'MS Office': 'skill_ms_office',
-                'Google Suite': 'skill_google_sheets',
-                'Email Communication': 'skill_email',
-                'Internet Browsing & Research': 'skill_internet',
-                'Social Media': 'skill_social_media'
-            }
-            for skill in self.instance.computer_skills:
-                field_name = skill_map.get(skill)
-                if field_name and field_name in self.fields:
-                    self.initial[field_name] = True
-        
-        # Pre-populate tool exposure
-        if self.instance and self.instance.pk and self.instance.tool_exposure:
-            tool_map = {
-                'MS Excel / Google Sheets': 'tool_excel',
-                'CRM Software': 'tool_crm',
-                'Design Tools': 'tool_design',
-                'Video Conferencing': 'tool_video',
-                'Programming / Coding': 'tool_programming'
-            }
-            for tool in self.instance.tool_exposure:
-                field_name = tool_map.get(tool)
-                if field_name and field_name in self.fields:
-                    self.initial[field_name] = True
-    
-    def clean(self):
-        cleaned_data = super().clean()
-        
-        # Collect computer skills
-        skills = []
-        skill_map = {
-            'skill_ms_office': 'MS Office',
-            'skill_google_sheets': 'Google Suite',
-            'skill_email': 'Email Communication',
-            'skill_internet': 'Internet Browsing & Research',
-            'skill_social_media': 'Social Media'
-        }
-        for field, label in skill_map.items():
-            if cleaned_data.get(field):
-                skills.append(label)
-        
-        if not skills:
-            raise ValidationError('Please select at least one computer skill')
-        
-        # Collect tool exposure
-        tools = []
-        tool_map = {
-            'tool_excel': 'MS Excel / Google Sheets',
-            'tool_crm': 'CRM Software',
-            'tool_design': 'Design Tools',
-            'tool_video': 'Video Conferencing',
-            'tool_programming': 'Programming / Coding'
-        }
-        for field, label in tool_map.items():
-            if cleaned_data.get(field):
-                tools.append(label)
-        
-        cleaned_data['computer_skills'] = skills
-        cleaned_data['tool_exposure'] = tools
-        
-        return cleaned_data
-    
-    def save(self, commit=True):
-        instance = super().save(commit=False)
-        instance.computer_skills = self.cleaned_data.get('computer_skills', [])
-        instance.tool_exposure = self.cleaned_data.get('tool_exposure', [])
-        if commit:
-            instance.save()
-        return instance
 
-class Step4CareerForm(forms.ModelForm):
+class Step4CareerForm(step_form_base(4)):
     """Step 4: Career Preferences Form"""
     
     # Custom field for locations (will be converted from comma-separated string to list)
@@ -287,9 +266,6 @@ class Step4CareerForm(forms.ModelForm):
     )
     
     class Meta:
-        model = StudentProfile
-        fields = ['work_type', 'expected_salary', 'willing_to_relocate',
-                  'preferred_job_roles', 'preferred_industries', 'preferred_locations']
         widgets = {
             'work_type': forms.Select(attrs={
                 'class': 'form-control'
@@ -303,67 +279,9 @@ class Step4CareerForm(forms.ModelForm):
             ]),
         }
     
-    # Job roles checkboxes (matching template exactly)
-    role_sales = forms.BooleanField(required=False, label='Sales / Business Development')
-    role_customer_support = forms.BooleanField(required=False, label='Customer Support')
-    role_marketing = forms.BooleanField(required=False, label='Marketing / Digital Marketing')
-    role_hr = forms.BooleanField(required=False, label='Human Resources')
-    role_content = forms.BooleanField(required=False, label='Content Writing')
-    role_software_developer = forms.BooleanField(required=False, label='Software Developer')
-    role_data_analyst = forms.BooleanField(required=False, label='Data Analyst')
-    role_operations = forms.BooleanField(required=False, label='Operations / Admin')
-    
-    # Industries checkboxes (matching template exactly)
-    industry_it_software = forms.BooleanField(required=False, label='IT / Software')
-    industry_ecommerce = forms.BooleanField(required=False, label='E-commerce')
-    industry_fintech = forms.BooleanField(required=False, label='Fintech / Banking')
-    industry_edtech = forms.BooleanField(required=False, label='EdTech / Education')
-    industry_healthcare = forms.BooleanField(required=False, label='Healthcare')
-    industry_consulting = forms.BooleanField(required=False, label='Consulting')
-    
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Pre-populate job roles
-        if self.instance and self.instance.pk and self.instance.preferred_job_roles:
-            role_map = {
-                'Sales': 'role_sales',
-                'Sales / Business Development': 'role_sales',
-                'Customer Support': 'role_customer_support',
-                'Marketing': 'role_marketing',
-                'Marketing / Digital Marketing': 'role_marketing',
-                'HR': 'role_hr',
-                'Human Resources': 'role_hr',
-                'Content': 'role_content',
-                'Content Writing': 'role_content',
-                'Software Developer': 'role_software_developer',
-                'Data Analyst': 'role_data_analyst',
-                'Operations': 'role_operations',
-                'Operations / Admin': 'role_operations'
-            }
-            for role in self.instance.preferred_job_roles:
-                field_name = role_map.get(role)
-                if field_name and field_name in self.fields:
-                    self.initial[field_name] = True
-        
-        # Pre-populate industries
-        if self.instance and self.instance.pk and self.instance.preferred_industries:
-            industry_map = {
-                'IT/Software': 'industry_it_software',
-                'IT / Software': 'industry_it_software',
-                'E-commerce': 'industry_ecommerce',
-                'Fintech': 'industry_fintech',
-                'Fintech / Banking': 'industry_fintech',
-                'EdTech': 'industry_edtech',
-                'EdTech / Education': 'industry_edtech',
-                'Healthcare': 'industry_healthcare',
-                'Consulting': 'industry_consulting'
-            }
-            for industry in self.instance.preferred_industries:
-                field_name = industry_map.get(industry)
-                if field_name and field_name in self.fields:
-                    self.initial[field_name] = True
-        
         # Pre-populate locations (convert list to comma-separated string)
         if self.instance and self.instance.pk and self.instance.preferred_locations:
             self.initial['preferred_locations'] = ', '.join(self.instance.preferred_locations)
@@ -386,63 +304,17 @@ class Step4CareerForm(forms.ModelForm):
             return locations
         return []
     
-    def clean(self):
-        cleaned_data = super().clean()
-        
-        # Collect job roles
-        roles = []
-        role_map = {
-            'role_sales': 'Sales / Business Development',
-            'role_customer_support': 'Customer Support',
-            'role_marketing': 'Marketing / Digital Marketing',
-            'role_hr': 'Human Resources',
-            'role_content': 'Content Writing',
-            'role_software_developer': 'Software Developer',
-            'role_data_analyst': 'Data Analyst',
-            'role_operations': 'Operations / Admin'
-        }
-        for field, label in role_map.items():
-            if cleaned_data.get(field):
-                roles.append(label)
-        
-        if not roles:
-            raise ValidationError('Please select at least one preferred job role')
-        
-        # Collect industries
-        industries = []
-        industry_map = {
-            'industry_it_software': 'IT / Software',
-            'industry_ecommerce': 'E-commerce',
-            'industry_fintech': 'Fintech / Banking',
-            'industry_edtech': 'EdTech / Education',
-            'industry_healthcare': 'Healthcare',
-            'industry_consulting': 'Consulting'
-        }
-        for field, label in industry_map.items():
-            if cleaned_data.get(field):
-                industries.append(label)
-        
-        cleaned_data['preferred_job_roles'] = roles
-        cleaned_data['preferred_industries'] = industries
-        
-        return cleaned_data
-    
     def save(self, commit=True):
         instance = super().save(commit=False)
-        instance.preferred_job_roles = self.cleaned_data.get('preferred_job_roles', [])
-        instance.preferred_industries = self.cleaned_data.get('preferred_industries', [])
         instance.preferred_locations = self.cleaned_data.get('preferred_locations', [])
         if commit:
             instance.save()
         return instance
     
-class Step5AvailabilityForm(forms.ModelForm):
+class Step5AvailabilityForm(step_form_base(5)):
     """Step 5: Availability & Constraints Form"""
     
     class Meta:
-        model = StudentProfile
-        fields = ['time_for_training', 'preferred_time_slots', 'has_mobile_access',
-                  'has_laptop_access', 'internet_quality', 'constraints']
         widgets = {
             'time_for_training': forms.Select(attrs={
                 'class': 'form-control'
@@ -459,52 +331,9 @@ class Step5AvailabilityForm(forms.ModelForm):
             }),
         }
     
-    # Time slots checkboxes
-    slot_morning = forms.BooleanField(required=False, label='Morning (6 AM - 12 PM)')
-    slot_afternoon = forms.BooleanField(required=False, label='Afternoon (12 PM - 5 PM)')
-    slot_evening = forms.BooleanField(required=False, label='Evening (5 PM - 9 PM)')
-    slot_night = forms.BooleanField(required=False, label='Night (9 PM - 12 AM)')
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        
-        # Pre-populate time slots
-        if self.instance and self.instance.pk and self.instance.preferred_time_slots:
-            slot_map = {
-                'Morning': 'slot_morning',
-                'Morning (6 AM - 12 PM)': 'slot_morning',
-                'Afternoon': 'slot_afternoon',
-                'Afternoon (12 PM - 5 PM)': 'slot_afternoon',
-                'Evening': 'slot_evening',
-                'Evening (5 PM - 9 PM)': 'slot_evening',
-                'Night': 'slot_night',
-                'Night (9 PM - 12 AM)': 'slot_night'
-            }
-            for slot in self.instance.preferred_time_slots:
-                field_name = slot_map.get(slot)
-                if field_name and field_name in self.fields:
-                    self.initial[field_name] = True
-    
     def clean(self):
         cleaned_data = super().clean()
         
-        # Collect time slots
-        slots = []
-        slot_map = {
-            'slot_morning': 'Morning (6 AM - 12 PM)',
-            'slot_afternoon': 'Afternoon (12 PM - 5 PM)',
-            'slot_evening': 'Evening (5 PM - 9 PM)',
-            'slot_night': 'Night (9 PM - 12 AM)'
-        }
-        for field, label in slot_map.items():
-            if cleaned_data.get(field):
-                slots.append(label)
-        
-        if not slots:
-            raise ValidationError('Please select at least one preferred time slot')
-        
-        cleaned_data['preferred_time_slots'] = slots
-        
         # Validate at least one device is selected
         has_mobile = cleaned_data.get('has_mobile_access', False)
         has_laptop = cleaned_data.get('has_laptop_access', False)
@@ -513,24 +342,11 @@ class Step5AvailabilityForm(forms.ModelForm):
             raise ValidationError('Please select at least one device you have access to')
         
         return cleaned_data
-    
-    def save(self, commit=True):
-        instance = super().save(commit=False)
-        instance.preferred_time_slots = self.cleaned_data.get('preferred_time_slots', [])
-        if commit:
-            instance.save()
-        return instance
 
-class Step6BehaviouralForm(forms.ModelForm):
+class Step6BehaviouralForm(step_form_base(6)):
     """Step 6: Behavioural Fit Form"""
     
     class Meta:
-        model = StudentProfile
-        fields = ['comfort_talking_strangers', 'comfort_handling_angry_customers',
-                  'comfort_working_with_data', 'comfort_following_targets',
-                  'comfort_writing_emails', 'people_vs_task_oriented',
-                  'office_vs_remote', 'analysis_vs_communication',
-                  'career_concerns', 'career_goal_3_years']
         widgets = {
             'comfort_talking_strangers': forms.RadioSelect(choices=[(i, str(i)) for i in range(1, 6)]),
             'comfort_handling_angry_customers': forms.RadioSelect(choices=[(i, str(i)) for i in range(1, 6)]),
@@ -547,32 +363,6 @@ class Step6BehaviouralForm(forms.ModelForm):
             }),
         }
     
-    # Career concerns checkboxes
-    concern_lack_of_experience = forms.BooleanField(required=False, label='Lack of Experience')
-    concern_lack_of_skills = forms.BooleanField(required=False, label='Lack of Skills')
-    concern_low_confidence = forms.BooleanField(required=False, label='Low Confidence')
-    concern_career_direction = forms.BooleanField(required=False, label='Career Direction')
-    
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        
-        # Pre-populate career concerns
-        if self.instance and self.instance.pk and self.instance.career_concerns:
-            concern_map = {
-                'Lack of Experience': 'concern_lack_of_experience',
-                'Lack of work experience': 'concern_lack_of_experience',
-                'Lack of Skills': 'concern_lack_of_skills',
-                'Need to develop more skills': 'concern_lack_of_skills',
-                'Low Confidence': 'concern_low_confidence',
-                'Low confidence': 'concern_low_confidence',
-                'Career Direction': 'concern_career_direction',
-                'Unclear about career direction': 'concern_career_direction'
-            }
-            for concern in self.instance.career_concerns:
-                field_name = concern_map.get(concern)
-                if field_name and field_name in self.fields:
-                    self.initial[field_name] = True
-    
     def clean_career_goal_3_years(self):
         goal = self.cleaned_data.get('career_goal_3_years', '').strip()
         if not goal:
@@ -580,40 +370,11 @@ class Step6BehaviouralForm(forms.ModelForm):
         if len(goal) < 20:
             raise ValidationError('Please provide more detail (minimum 20 characters)')
         return goal
-    
-    def clean(self):
-        cleaned_data = super().clean()
-        
-        # Collect career concerns
-        concerns = []
-        concern_map = {
-            'concern_lack_of_experience': 'Lack of Experience',
-            'concern_lack_of_skills': 'Lack of Skills',
-            'concern_low_confidence': 'Low Confidence',
-            'concern_career_direction': 'Career Direction'
-        }
-        for field, label in concern_map.items():
-            if cleaned_data.get(field):
-                concerns.append(label)
-        
-        cleaned_data['career_concerns'] = concerns
-        
-        return cleaned_data
-    
-    def save(self, commit=True):
-        instance = super().save(commit=False)
-        instance.career_concerns = self.cleaned_data.get('career_concerns', [])
-        if commit:
-            instance.save()
-        return instance
 
-class Step7TrainingForm(forms.ModelForm):
+class Step7TrainingForm(step_form_base(7)):
     """Step 7: Training Program Information Form"""
     
     class Meta:
-        model = StudentProfile
-        fields = ['previous_training', 'discovery_source', 'commitment_confirmed',
-                  'fee_preference']
         widgets = {
             'previous_training': forms.Textarea(attrs={
                 'class': 'form-control',
@@ -639,12 +400,10 @@ class Step7TrainingForm(forms.ModelForm):
             raise ValidationError('Please confirm your commitment to the program')
         return commitment
 
-class Step8DocumentsForm(forms.ModelForm):
+class Step8DocumentsForm(step_form_base(8)):
     """Step 8: Document Uploads Form"""
     
     class Meta:
-        model = StudentProfile
-        fields = ['photo', 'resume', 'id_proof', 'marksheet']
         widgets = {
             'photo': forms.FileInput(attrs={
                 'class': 'form-control',
@@ -668,7 +427,7 @@ class Step8DocumentsForm(forms.ModelForm):
         photo = self.cleaned_data.get('photo')
         if photo:
             # Check file size (max 5MB)
-            if photo.size > 5 * 1024 * 1024:
+            if photo.size > DOCUMENT_MAX_SIZES['photo']:
                 raise ValidationError('Photo size should not exceed 5MB')
             # Check file type
             if not photo.content_type.startswith('image/'):
@@ -679,6 +438,73 @@ class Step8DocumentsForm(forms.ModelForm):
         resume = self.cleaned_data.get('resume')
         if resume:
             # Check file size (max 10MB)
-            if resume.size > 10 * 1024 * 1024:
+            if resume.size > DOCUMENT_MAX_SIZES['resume']:
                 raise ValidationError('Resume size should not exceed 10MB')
-        return resume
\ No newline at end of file
+        return resume
+
+
+class ExperienceForm(forms.ModelForm):
+    """One entry of the experiences list carried by autosave and offline sync"""
+    
+    # Set for rows the client already has
+    id = forms.IntegerField(required=False, min_value=1)
+    
+    class Meta:
+        model = Experience
+        fields = Experience.SYNC_FIELDS
+
+
+def clean_experiences(entries):
+    """
+    Validate an experiences list entry by entry with ExperienceForm.
+    
+    Returns ``(experiences, errors)``: the cleaned entries for
+    Experience.sync_for_profile(), or None with the errors to report (one dict
+    of field errors per entry, empty for valid ones).
+    """
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        return None, ['Expected a list of experiences.']
+    entry_forms = [ExperienceForm(entry) for entry in entries]
+    errors = [
+        {} if form.is_valid() else {name: list(field_errors) for name, field_errors in form.errors.items()}
+        for form in entry_forms
+    ]
+    if any(errors):
+        return None, errors
+    return [form.cleaned_data for form in entry_forms], None
+
+
+# Largest accepted document per field, for uploads in one POST and in chunks
+DOCUMENT_MAX_SIZES = {
+    'photo': 5 * 1024 * 1024,
+    'resume': 10 * 1024 * 1024,
+    'id_proof': 10 * 1024 * 1024,
+    'marksheet': 10 * 1024 * 1024,
+}
+
+
+class DocumentUploadForm(forms.Form):
+    """Declared file of a resumable document upload, checked before any bytes are sent"""
+    
+    field = forms.ChoiceField(choices=UploadSession._meta.get_field('field').choices)
+    filename = forms.CharField(max_length=255)
+    content_type = forms.CharField(max_length=100, required=False)
+    size = forms.IntegerField(min_value=1)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        field, size = cleaned_data.get('field'), cleaned_data.get('size')
+        if field and size and size > DOCUMENT_MAX_SIZES[field]:
+            self.add_error('size', f'File size should not exceed {DOCUMENT_MAX_SIZES[field] // (1024 * 1024)}MB')
+        if field == 'photo' and not cleaned_data.get('content_type', '').startswith('image/'):
+            self.add_error('content_type', 'Only image files are allowed for photo')
+        return cleaned_data
+
+
+# Form for each step number
+STEP_FORMS = MappingProxyType({
+    form.step.number: form for form in (
+        Step1BasicInfoForm, Step2EducationForm, Step3SkillsForm, Step4CareerForm,
+        Step5AvailabilityForm, Step6BehaviouralForm, Step7TrainingForm, Step8DocumentsForm,
+    )
+})
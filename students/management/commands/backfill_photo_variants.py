@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from students.models import PhotoJob, StudentProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Queue photo jobs for profiles whose photo has no derivatives yet '
+        '(photos uploaded before the photo worker existed)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Queue photos whose last job failed again')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        missing = (
+            StudentProfile.objects
+            .exclude(Q(photo='') | Q(photo__isnull=True))
+            .filter(photo_variants={})
+            .only('photo')
+        )
+        if options['retry_failed']:
+            PhotoJob.objects.filter(status='failed', student_profile__in=missing).delete()
+
+        queued = 0
+        for profile in missing.iterator():
+            # Already queued, or failed and not retried
+            if PhotoJob.objects.filter(student_profile=profile, source=profile.photo.name).exists():
+                continue
+            queued += 1
+            if not options['dry_run']:
+                PhotoJob.objects.create(student_profile=profile, source=profile.photo.name)
+
+        verb = 'would be queued' if options['dry_run'] else 'queued'
+        self.stdout.write(self.style.SUCCESS(f'{queued} photos {verb}; run `manage.py run_photo_worker` to process them'))
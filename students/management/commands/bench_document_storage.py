@@ -0,0 +1,161 @@
+import os
+import random
+import tempfile
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.core.management.base import BaseCommand
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.test import override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from students import documents
+from students.documents import DOCUMENT_FIELDS, collect_blobs
+from students.models import DocumentBlob, StudentProfile
+
+# Field -> (median size in KB, file name students give it)
+DOCUMENTS = {
+    'resume': (180, 'resume.pdf'),
+    'id_proof': (450, 'aadhaar.pdf'),
+    'marksheet': (700, 'marksheet.pdf'),
+}
+
+
+def sample_uploads(rng, students):
+    """
+    Step 8 submissions of each student, as lists of {field: (filename, content key, size)}.
+
+    Every student sends all three documents once. A third send the same files
+    again once or twice (a validation error elsewhere on the step, a retry after
+    a timeout), a quarter later replace the resume with a new version (sent
+    again as often), and one in twenty give the same file as ID proof and
+    marksheet. Sizes are log-normal around the medians in DOCUMENTS.
+    """
+    def document(field):
+        median, filename = DOCUMENTS[field]
+        size = int(rng.lognormvariate(0, 0.6) * median * 1024)
+        return filename, rng.getrandbits(64), size
+
+    timelines = []
+    for _ in range(students):
+        files = {field: document(field) for field in DOCUMENT_FIELDS}
+        if rng.random() < 0.05:
+            files['marksheet'] = files['id_proof']
+        submissions = [dict(files)] * (1 + (rng.random() < 0.33) * rng.randint(1, 2))
+        if rng.random() < 0.25:
+            resume = {'resume': document('resume')}
+            submissions += [resume] * (1 + (rng.random() < 0.33))
+        timelines.append(submissions)
+    return timelines
+
+
+def uploaded_file(filename, key, size):
+    """The file as upload_documents receives it: in memory, or on disk above FILE_UPLOAD_MAX_MEMORY_SIZE"""
+    content = random.Random(key).randbytes(size)
+    if size <= settings.FILE_UPLOAD_MAX_MEMORY_SIZE:
+        return SimpleUploadedFile(filename, content, 'application/pdf')
+    file = TemporaryUploadedFile(filename, 'application/pdf', size, None)
+    file.write(content)
+    file.seek(0)
+    return file
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay a sample of step 8 document uploads, with retries and revised resumes, once '
+        'with the plain FileSystemStorage the documents used to have and once with the '
+        'content-addressed storage, and report the disk used and the time each upload takes '
+        'to save. Creates and deletes users 70008xxxxx; use a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=100)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        timelines = sample_uploads(random.Random(options['seed']), options['students'])
+        uploads = sum(len(submission) for submissions in timelines for submission in submissions)
+        sent = sum(size for submissions in timelines for submission in submissions
+                   for filename, key, size in submission.values())
+        self.stdout.write(
+            f'{options["students"]} students, {uploads} uploads, {sent / 1024 / 1024:.1f} MB sent'
+        )
+
+        results = {}
+        for mode in ('plain', 'deduplicated'):
+            with tempfile.TemporaryDirectory() as directory, override_settings(MEDIA_ROOT=directory):
+                results[mode] = self.replay(mode, timelines)
+
+        plain_bytes = results['plain'][0]
+        for mode, (used, files, seconds, collected) in results.items():
+            line = (
+                f'{mode:<12} {used / 1024 / 1024:7.1f} MB in {files:4} files '
+                f'(x{plain_bytes / used:.2f} less)  '
+                f'save {seconds / uploads * 1000:6.2f} ms/upload, {sent / 1024 / 1024 / seconds:6.0f} MB/s'
+            )
+            if collected is not None:
+                line += f'  after collection {collected / 1024 / 1024:.1f} MB'
+            self.stdout.write(line)
+
+    def replay(self, mode, timelines):
+        """Disk bytes and files, seconds spent saving, and bytes left after collecting unreferenced files"""
+        fields = [StudentProfile._meta.get_field(field) for field in DOCUMENT_FIELDS]
+        storages = [field.storage for field in fields]
+        receivers = [
+            (post_init, documents._remember_loaded_documents), (pre_save, documents._remember_replaced_documents), (post_save, documents._count_documents),
+            (post_delete, documents._release_documents),
+        ]
+        if mode == 'plain':
+            for field in fields:
+                field.storage = FileSystemStorage()
+            for signal, receiver in receivers:
+                signal.disconnect(receiver, sender=StudentProfile)
+
+        mobiles = [f'70008{number:05}' for number in range(len(timelines))]
+        User.objects.filter(mobile__in=mobiles).delete()
+        existing = set(DocumentBlob.objects.values_list('name', flat=True))
+        seconds = 0
+        try:
+            for mobile, submissions in zip(mobiles, timelines):
+                user = User.objects.get_or_create_by_mobile(mobile)
+                profile = StudentProfile.objects.create(user=user, step_completed=7)
+                for submission in submissions:
+                    received = {field: uploaded_file(*upload) for field, upload in submission.items()}
+                    for field, file in received.items():
+                        setattr(profile, field, file)
+                    started = time.perf_counter()
+                    # What upload_documents does
+                    profile.save_section(8)
+                    seconds += time.perf_counter() - started
+                    for file in received.values():
+                        # Removes a temporary upload file, as the request's end would
+                        file.close()
+
+            used, files = self.disk_usage()
+            collected = None
+            if mode == 'deduplicated':
+                # As if the grace period had passed
+                collect_blobs(timezone.now() + timedelta(seconds=1))
+                collected = self.disk_usage()[0]
+        finally:
+            User.objects.filter(mobile__in=mobiles).delete()
+            if mode == 'plain':
+                for field, storage in zip(fields, storages):
+                    field.storage = storage
+                for signal, receiver in receivers:
+                    signal.connect(receiver, sender=StudentProfile)
+            else:
+                DocumentBlob.objects.exclude(name__in=existing).delete()
+        return used, files, seconds, collected
+
+    def disk_usage(self):
+        used = files = 0
+        for directory, _, filenames in os.walk(settings.MEDIA_ROOT):
+            for filename in filenames:
+                used += os.path.getsize(os.path.join(directory, filename))
+                files += 1
+        return used, files
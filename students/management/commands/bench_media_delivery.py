@@ -0,0 +1,149 @@
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from accounts.models import User
+from students.models import StudentProfile
+
+# Label -> (MEDIA_ACCEL, extra gunicorn arguments)
+MODES = {
+    'streamed by Python (before)': ('', ['--no-sendfile']),
+    'os.sendfile': ('', []),
+    'X-Accel-Redirect': ('nginx', []),
+}
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of a process so far"""
+    with open(f'/proc/{pid}/stat') as stat:
+        fields = stat.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+
+class Command(BaseCommand):
+    help = (
+        'Start a one-worker gunicorn for each way of delivering media: the worker streaming the '
+        'file through Python as static() did, the worker handing it to os.sendfile, and the worker '
+        'answering with X-Accel-Redirect for nginx. Download a document as its student, and report '
+        'the worker CPU and wall time per download, and how long a request waits while the worker '
+        'delivers to a slow client. Linux only. Creates and deletes user 7000999999 and its file; '
+        'use a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=10)
+        parser.add_argument('--downloads', type=int, default=50)
+        parser.add_argument('--slow-mbps', type=float, default=4, help='Read rate of the slow client, MB/s')
+        parser.add_argument('--mobile', default='7000999999')
+
+    def handle(self, *args, **options):
+        User.objects.filter(mobile=options['mobile']).delete()
+        user = User.objects.get_or_create_by_mobile(options['mobile'])
+        profile = StudentProfile.objects.create(user=user, step_completed=7)
+        size = int(options['size_mb'] * 1024 * 1024)
+        profile.resume.save('bench.pdf', ContentFile(b'%PDF-1.4\n' + os.urandom(size - 9)), save=False)
+        profile.save_section(8)
+        client = Client()
+        client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+        self.cookie = f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+        self.url = profile.resume.url
+
+        try:
+            for label, (accel, arguments) in MODES.items():
+                with self.gunicorn(accel, arguments) as worker:
+                    self.download()  # warm up
+                    cpu, started = cpu_seconds(worker), time.perf_counter()
+                    received = sum(self.download() for _ in range(options['downloads']))
+                    wall = (time.perf_counter() - started) / options['downloads']
+                    cpu = (cpu_seconds(worker) - cpu) / options['downloads']
+                    waited = self.wait_behind_slow_client(options['slow_mbps'] * 1024 * 1024)
+                self.stdout.write(
+                    f'{label:<28} worker CPU {cpu * 1000:7.2f} ms  wall {wall * 1000:7.2f} ms per download '
+                    f'({received / options["downloads"] / 1024 / 1024:.1f} MB from the worker)  '
+                    f'request behind a slow download waited {waited * 1000:7.1f} ms'
+                )
+        finally:
+            User.objects.filter(mobile=options['mobile']).delete()
+            # Unreferenced now that the profile is gone
+            profile.resume.storage.delete(profile.resume.name)
+
+    def gunicorn(self, accel, arguments):
+        command = self
+
+        class Server:
+            def __enter__(self):
+                command.port = free_port()
+                self.process = subprocess.Popen(
+                    [sys.executable, '-m', 'gunicorn', 'config.wsgi', '--workers', '1', '--worker-class', 'sync',
+                     '--bind', f'127.0.0.1:{command.port}', '--log-level', 'warning', *arguments],
+                    env={**os.environ, 'MEDIA_ACCEL': accel},
+                )
+                deadline = time.monotonic() + 20
+                while True:
+                    try:
+                        with open(f'/proc/{self.process.pid}/task/{self.process.pid}/children') as children:
+                            worker = int(children.read().split()[0])
+                        socket.create_connection(('127.0.0.1', command.port), timeout=1).close()
+                        return worker
+                    except (OSError, IndexError):
+                        if time.monotonic() > deadline or self.process.poll() is not None:
+                            self.process.kill()
+                            raise CommandError('gunicorn did not start')
+                        time.sleep(0.1)
+
+            def __exit__(self, *exc_info):
+                self.process.terminate()
+                self.process.wait()
+
+        return Server()
+
+    def request(self, method='GET'):
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        connection.request(method, self.url, headers={'Cookie': self.cookie})
+        return connection, connection.getresponse()
+
+    def download(self):
+        """Bytes of the body the worker sent"""
+        connection, response = self.request()
+        if response.status != 200:
+            raise CommandError(f'Download failed with {response.status}')
+        received = len(response.read())
+        connection.close()
+        return received
+
+    def wait_behind_slow_client(self, rate):
+        """Seconds a HEAD waits when it arrives while a download is being read at ``rate``"""
+        def slow_download():
+            connection, response = self.request()
+            started = time.perf_counter()
+            received = 0
+            while block := response.read(64 * 1024):
+                received += len(block)
+                time.sleep(max(0, received / rate - (time.perf_counter() - started)))
+            connection.close()
+
+        reader = threading.Thread(target=slow_download)
+        reader.start()
+        time.sleep(0.2)
+        started = time.perf_counter()
+        connection, response = self.request('HEAD')
+        response.read()
+        connection.close()
+        waited = time.perf_counter() - started
+        reader.join()
+        return waited
@@ -0,0 +1,101 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from students.storage import shard
+
+LAYOUTS = {
+    'flat': lambda key: f'student_photos/{key}.jpg',
+    'sharded': lambda key: f'student_photos/{shard(key)}{key}.jpg',
+}
+
+
+def drop_page_cache():
+    """Have the next lookups go to disk; only possible as root on Linux"""
+    try:
+        os.sync()
+        with open('/proc/sys/vm/drop_caches', 'w') as control:
+            control.write('3\n')
+        return True
+    except OSError:
+        return False
+
+
+def timed(operation, arguments):
+    """Microseconds each call of ``operation`` took"""
+    times = []
+    for argument in arguments:
+        started = time.perf_counter()
+        operation(argument)
+        times.append((time.perf_counter() - started) * 1e6)
+    return times
+
+
+def open_close(path):
+    os.close(os.open(path, os.O_RDONLY))
+
+
+class Command(BaseCommand):
+    help = (
+        'Create --files empty photos in the flat layout and in the sharded one, then time stat() '
+        'and open() of random files, lookups of names that do not exist (what picking a free name '
+        'for each upload does) and listing the directory that holds a file. Uses two inodes per '
+        'file on the volume of --dir; a million files take a few minutes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=1_000_000)
+        parser.add_argument('--samples', type=int, default=20_000)
+        parser.add_argument('--listings', type=int, default=5)
+        parser.add_argument('--dir', help='Directory on the media volume (default: the temp directory)')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        keys = [uuid.UUID(int=rng.getrandbits(128)).hex for _ in range(options['files'])]
+        sample = rng.sample(keys, min(options['samples'], len(keys)))
+        absent = [uuid.UUID(int=rng.getrandbits(128)).hex for _ in range(len(sample))]
+
+        with tempfile.TemporaryDirectory(dir=options['dir']) as root:
+            for layout, name_of in LAYOUTS.items():
+                base = os.path.join(root, layout)
+                path_of = lambda key: os.path.join(base, name_of(key))  # noqa: E731
+
+                directories = set()
+                started = time.perf_counter()
+                for key in keys:
+                    path = path_of(key)
+                    directory = os.path.dirname(path)
+                    if directory not in directories:
+                        os.makedirs(directory, exist_ok=True)
+                        directories.add(directory)
+                    os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+                create = (time.perf_counter() - started) / len(keys) * 1e6
+
+                self.stdout.write(
+                    f'{layout:<8} {len(keys)} files in {len(directories)} directories, '
+                    f'created at {create:.1f} us/file'
+                )
+                operations = {
+                    'stat': (os.stat, [path_of(key) for key in sample]),
+                    'open': (open_close, [path_of(key) for key in sample]),
+                    'missing': (os.path.exists, [path_of(key) for key in absent]),
+                }
+                for operation, (function, paths) in operations.items():
+                    # From disk, then again from the kernel's caches
+                    cold = drop_page_cache()
+                    for cache, times in (('cold' if cold else 'warm', timed(function, paths)),
+                                         ('warm', timed(function, paths))):
+                        times.sort()
+                        self.stdout.write(
+                            f'  {operation:<8} {cache}  p50 {statistics.median(times):8.1f} us  '
+                            f'p99 {times[int(len(times) * 0.99)]:8.1f} us  mean {statistics.fmean(times):8.1f} us'
+                        )
+                drop_page_cache()
+                listing = timed(os.listdir, [os.path.dirname(path_of(key)) for key in sample[:options['listings']]])
+                self.stdout.write(f'  listdir  {statistics.fmean(listing) / 1000:10.2f} ms per directory')
@@ -0,0 +1,103 @@
+import io
+import os
+import re
+import tempfile
+import time
+from html import unescape
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from accounts.models import User
+from students.management.commands.bench_profile_writes import SAMPLE_VALUES
+from students.models import PROFILE_SECTIONS, StudentProfile
+from students.photos import claim_due, render_variants, run_job
+
+# WebP <source> where there is one (what current browsers load), else the <img>
+PICTURE = re.compile(r'<picture><source srcset="([^"]+)" type="image/webp"><img [^>]*></picture>|<img src="([^"]+)"')
+
+
+def camera_photo(width, height):
+    """A JPEG about the size a phone camera writes (noise keeps it from compressing away)"""
+    noise = Image.effect_noise((width, height), 24).convert('RGB')
+    gradient = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    buffer = io.BytesIO()
+    Image.blend(gradient, noise, 0.5).save(buffer, 'JPEG', quality=92)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the pages that show a student photo before and after the photo worker has made '
+        'its derivatives, and report the HTML and image bytes each page view downloads. '
+        'Creates and deletes user 7000699999; use a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=4000)
+        parser.add_argument('--height', type=int, default=3000)
+        parser.add_argument('--mobile', default='7000699999')
+
+    def handle(self, *args, **options):
+        photo = camera_photo(options['width'], options['height'])
+        started = time.perf_counter()
+        render_variants(io.BytesIO(photo))
+        self.stdout.write(
+            f'photo {options["width"]}x{options["height"]} {len(photo) / 1024:.0f} KB, '
+            f'all derivatives made in {(time.perf_counter() - started) * 1000:.0f} ms'
+        )
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(MEDIA_ROOT=directory):
+            User.objects.filter(mobile=options['mobile']).delete()
+            user = User.objects.get_or_create_by_mobile(options['mobile'])
+            user.is_staff = user.is_superuser = True
+            user.save()
+            profile = StudentProfile.objects.create(user=user, step_completed=8, is_complete=True, **{
+                field: SAMPLE_VALUES[field]
+                for step, fields in PROFILE_SECTIONS.items() if step != 8
+                for field in fields
+            })
+            profile.photo.save('camera.jpg', ContentFile(photo), save=False)
+            profile.save_section(8)
+
+            client = Client()
+            client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+            pages = {
+                'step 8': reverse('profile_step', kwargs={'step': 8}),
+                'review': reverse('profile_review'),
+                'dashboard': reverse('dashboard'),
+                'admin list': reverse('admin:students_studentprofile_changelist'),
+                'admin change': reverse('admin:students_studentprofile_change', args=[profile.pk]),
+            }
+
+            try:
+                before = {name: self.page_bytes(client, url) for name, url in pages.items()}
+                for job in claim_due(10):
+                    run_job(job)
+                after = {name: self.page_bytes(client, url) for name, url in pages.items()}
+            finally:
+                User.objects.filter(mobile=options['mobile']).delete()
+
+        for name in pages:
+            (html_before, images_before), (html_after, images_after) = before[name], after[name]
+            total_before, total_after = html_before + images_before, html_after + images_after
+            self.stdout.write(
+                f'{name:<12} before {total_before / 1024:8.1f} KB (images {images_before / 1024:8.1f})  '
+                f'after {total_after / 1024:6.1f} KB (images {images_after / 1024:5.1f})  '
+                f'x{total_before / total_after:.0f} less'
+            )
+
+    def page_bytes(self, client, url):
+        """HTML bytes and bytes of the distinct media images the page references"""
+        response = client.get(url)
+        html = response.content.decode()
+        images = set()
+        for webp, img in PICTURE.findall(html):
+            src = unescape(webp or img)
+            if src.startswith(settings.MEDIA_URL):
+                images.add(src[len(settings.MEDIA_URL):])
+        return len(response.content), sum(os.path.getsize(os.path.join(settings.MEDIA_ROOT, name)) for name in images)
@@ -0,0 +1,93 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import User
+from students.management.commands.bench_profile_writes import SAMPLE_VALUES
+from students.models import PROFILE_SECTIONS, StudentProfile
+
+MOBILE_PREFIX = '71'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare StudentProfile reads loading the full row against the core and per-step '
+        'field groups. Seeds profiles for users 71xxxxxxxx up to --rows (kept between runs; '
+        'remove them with --cleanup); use a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000)
+        parser.add_argument('--samples', type=int, default=2000, help='Point reads per variant')
+        parser.add_argument('--page-size', type=int, default=100, help='Rows per list read')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--cleanup', action='store_true', help='Delete the seeded rows and exit')
+
+    def handle(self, *args, **options):
+        seeded = User.objects.filter(mobile__startswith=MOBILE_PREFIX)
+        if options['cleanup']:
+            deleted, _ = seeded.delete()
+            self.stdout.write(f'Deleted {deleted} rows')
+            return
+
+        self.seed(seeded.count(), options['rows'], options['batch_size'])
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE student_profiles')
+
+        user_ids = list(
+            StudentProfile.objects.filter(user__mobile__startswith=MOBILE_PREFIX)
+            .values_list('user_id', flat=True)[:200000]
+        )
+        sample = random.choices(user_ids, k=options['samples'])
+        variants = {
+            'full row': StudentProfile.objects.all(),
+            'core': StudentProfile.objects.core(),
+            'core + step 6': StudentProfile.objects.with_sections(6),
+        }
+
+        for name, queryset in variants.items():
+            timings = []
+            for user_id in sample:
+                started = time.perf_counter()
+                queryset.get(user_id=user_id)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+
+            started = time.perf_counter()
+            pages = 20
+            for page in range(pages):
+                offset = page * options['page_size']
+                list(queryset.order_by('-created_at')[offset:offset + options['page_size']])
+            page_ms = (time.perf_counter() - started) * 1000 / pages
+
+            self.stdout.write(
+                f'{name:<14} point read mean {statistics.mean(timings):6.3f} ms  '
+                f'p99 {timings[int(len(timings) * 0.99) - 1]:6.3f} ms  '
+                f'list of {options["page_size"]} {page_ms:7.2f} ms'
+            )
+
+    def seed(self, existing, target, batch_size):
+        profile_values = {
+            field: SAMPLE_VALUES[field]
+            for step, fields in PROFILE_SECTIONS.items() if step != 8
+            for field in fields
+        }
+        started = time.perf_counter()
+        for start in range(existing, target, batch_size):
+            end = min(start + batch_size, target)
+            with transaction.atomic():
+                users = User.objects.bulk_create(
+                    User(mobile=f'{MOBILE_PREFIX}{i:08d}', auth_type='otp') for i in range(start, end)
+                )
+                if not connection.features.can_return_rows_from_bulk_insert:
+                    users = User.objects.filter(mobile__in=[user.mobile for user in users])
+                StudentProfile.objects.bulk_create(
+                    StudentProfile(user=user, step_completed=7, **profile_values) for user in users
+                )
+            self.stdout.write(f'seeded {end}/{target}', ending='\r')
+        if target > existing:
+            self.stdout.write(f'Seeded {target - existing} profiles in {time.perf_counter() - started:.0f}s')
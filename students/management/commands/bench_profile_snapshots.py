@@ -0,0 +1,82 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from accounts.models import User
+from students.management.commands.bench_profile_writes import SAMPLE_VALUES
+from students.models import PROFILE_SECTIONS, Experience, StudentProfile
+from students.snapshots import build_snapshot, get_snapshot, stats
+
+MOBILE_PREFIX = '72'
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay review/dashboard reads over a set of completed profiles, with a share of '
+        'profile saves mixed in, and report the snapshot cache hit ratio and the time saved '
+        'per read against reading the row and experiences. Creates and deletes users '
+        '72xxxxxxxx; use a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=200)
+        parser.add_argument('--requests', type=int, default=5000)
+        parser.add_argument('--write-ratio', type=float, default=0.02,
+                            help='Share of requests that save the profile first')
+
+    def handle(self, *args, **options):
+        values = {
+            field: SAMPLE_VALUES[field]
+            for step, fields in PROFILE_SECTIONS.items() if step != 8
+            for field in fields
+        }
+        profiles = []
+        for i in range(options['profiles']):
+            user = User.objects.get_or_create_by_mobile(f'{MOBILE_PREFIX}{i:08d}')
+            profile, _ = StudentProfile.objects.update_or_create(
+                user=user, defaults={**values, 'step_completed': 8, 'is_complete': True}
+            )
+            Experience.sync_for_profile(profile, [
+                {'company_name': 'Benchmark Co', 'role': 'Intern', 'duration': '6 months',
+                 'description': 'Support desk'},
+            ])
+            profiles.append(StudentProfile.objects.core().get(pk=profile.pk))
+
+        # Popular profiles are read more often, as on a dashboard
+        rng = random.Random(0)
+        weights = [1 / (rank + 1) for rank in range(len(profiles))]
+        trace = [
+            (rng.choices(profiles, weights)[0], rng.random() < options['write_ratio'])
+            for _ in range(options['requests'])
+        ]
+
+        try:
+            results = {}
+            for enabled in (False, True):
+                stats.reset()
+                timings = []
+                with override_settings(PROFILE_SNAPSHOT_CACHE_ENABLED=enabled):
+                    for profile, write in trace:
+                        if write:
+                            profile.save_section(1)
+                        started = time.perf_counter()
+                        get_snapshot(profile) if enabled else build_snapshot(profile.pk)
+                        timings.append((time.perf_counter() - started) * 1000)
+                timings.sort()
+                results[enabled] = (statistics.mean(timings), timings[int(len(timings) * 0.99) - 1])
+                self.stdout.write(
+                    f'{"snapshot cache" if enabled else "database":<14} mean {results[enabled][0]:6.3f} ms  '
+                    f'p99 {results[enabled][1]:6.3f} ms'
+                )
+
+            saved = results[False][0] - results[True][0]
+            self.stdout.write(
+                f'hit ratio {stats.hit_ratio:.1%} ({stats.hits} hits, {stats.misses} misses, '
+                f'{stats.rebuilds} rebuilds)  saved {saved:.3f} ms per read '
+                f'({saved * len(trace) / 1000:.2f} s over {len(trace)} reads)'
+            )
+        finally:
+            User.objects.filter(mobile__startswith=MOBILE_PREFIX).delete()
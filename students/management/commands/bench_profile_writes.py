@@ -0,0 +1,113 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from students.models import PROFILE_SECTIONS, StudentProfile
+
+# Values written by each step of the simulated registration
+SAMPLE_VALUES = {
+    'full_name': 'Benchmark Student', 'gender': 'female', 'date_of_birth': date(2001, 5, 17),
+    'current_city': 'Pune', 'current_state': 'Maharashtra', 'preferred_languages': ['English', 'Hindi'],
+    'current_status': 'graduate', 'highest_qualification': 'B.Com', 'stream_specialization': 'Commerce',
+    'college_name': 'Benchmark College', 'university': 'Benchmark University', 'graduation_year': 2023,
+    'academic_scores': '72%', 'has_backlogs': False, 'num_backlogs': 0,
+    'english_speaking': 4, 'english_reading': 4, 'english_writing': 3,
+    'computer_skills': ['MS Excel', 'MS Word', 'Email'], 'tool_exposure': ['Tally'], 'typing_speed': 35,
+    'preferred_job_roles': ['Customer Support', 'Data Entry'], 'preferred_industries': ['BPO', 'Retail'],
+    'work_type': 'hybrid', 'preferred_locations': ['Pune', 'Mumbai'], 'willing_to_relocate': True,
+    'expected_salary': '3-4 LPA',
+    'time_for_training': 'full_time', 'preferred_time_slots': ['Morning'], 'has_mobile_access': True,
+    'has_laptop_access': True, 'internet_quality': 'good', 'constraints': 'None ' * 40,
+    'comfort_talking_strangers': 4, 'comfort_handling_angry_customers': 3, 'comfort_working_with_data': 4,
+    'comfort_following_targets': 3, 'comfort_writing_emails': 4, 'people_vs_task_oriented': 'people',
+    'office_vs_remote': 'office', 'analysis_vs_communication': 'communication',
+    'career_concerns': ['Salary', 'Growth'], 'career_goal_3_years': 'Lead a support team. ' * 20,
+    'previous_training': 'Spoken English course. ' * 10, 'discovery_source': 'Friend',
+    'commitment_confirmed': True, 'fee_preference': 'emi',
+    'photo': 'student_photos/bench.jpg', 'resume': 'resumes/bench.pdf',
+    'id_proof': 'id_proofs/bench.pdf', 'marksheet': 'marksheets/bench.pdf',
+}
+
+
+def table_counters():
+    """(WAL insert position, dead tuples in student_profiles) on PostgreSQL, else None"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        try:
+            # PostgreSQL 15+: publish this backend's pending table stats now
+            cursor.execute('SELECT pg_stat_force_next_flush()')
+        except Exception:
+            time.sleep(1)  # older servers: let the stats collector catch up
+        cursor.execute('SELECT pg_stat_clear_snapshot()')
+        cursor.execute(
+            "SELECT pg_current_wal_insert_lsn(), n_dead_tup FROM pg_stat_user_tables "
+            "WHERE relname = 'student_profiles'"
+        )
+        return cursor.fetchone()
+
+
+def wal_bytes(start_lsn, end_lsn):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_wal_lsn_diff(%s, %s)', [end_lsn, start_lsn])
+        return int(cursor.fetchone()[0])
+
+
+class Command(BaseCommand):
+    help = (
+        'Walk registrations through steps 1-8 with full-row saves and with section saves, '
+        'and report bytes written and dead tuples per completed registration. '
+        'Creates and deletes users 70003xxxxx; use a dev DB (WAL and tuple stats need PostgreSQL).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--registrations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        count = options['registrations']
+
+        for mode in ('full-row', 'section'):
+            mobiles = [f'70003{i:05d}' for i in range(count)]
+            profiles = [
+                StudentProfile.objects.create(user=User.objects.get_or_create_by_mobile(mobile))
+                for mobile in mobiles
+            ]
+
+            before = table_counters()
+            sql_bytes = 0
+            started = time.perf_counter()
+            for profile in profiles:
+                for step, fields in PROFILE_SECTIONS.items():
+                    for field in fields:
+                        setattr(profile, field, SAMPLE_VALUES[field])
+                    profile.step_completed = step
+                    if step == 8:
+                        profile.is_complete = True
+                        profile.submitted_at = timezone.now()
+
+                    with CaptureQueriesContext(connection) as captured:
+                        if mode == 'section':
+                            profile.save_section(step)
+                        else:
+                            profile.save()
+                    sql_bytes += sum(len(query['sql']) for query in captured)
+            elapsed = time.perf_counter() - started
+            after = table_counters()
+
+            line = (
+                f'{mode:<9} {sql_bytes / count:9.0f} SQL bytes/registration  '
+                f'{elapsed / count * 1000:7.2f} ms/registration'
+            )
+            if before and after:
+                line += (
+                    f'  {wal_bytes(before[0], after[0]) / count:9.0f} WAL bytes/registration'
+                    f'  {(after[1] - before[1]) / count:5.2f} dead tuples/registration'
+                )
+            self.stdout.write(line)
+
+            User.objects.filter(mobile__in=mobiles).delete()
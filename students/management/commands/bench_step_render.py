@@ -0,0 +1,68 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.template import TemplateSyntaxError
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+
+from accounts.models import User
+from students.forms import STEP_FORMS
+from students.management.commands.bench_profile_writes import SAMPLE_VALUES
+from students.models import PROFILE_SECTIONS, StudentProfile
+from students.steps import STEP_TEMPLATES
+from students.views import step_context
+
+
+class Command(BaseCommand):
+    help = (
+        'Time rendering each registration step page with and without the per-profile '
+        'render cache (PROFILE_STEP_CACHE_ENABLED). Uses a benchmark user; run against a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500)
+        parser.add_argument('--mobile', default='7000399999', help='Benchmark user to render for')
+
+    def handle(self, *args, **options):
+        user = User.objects.get_or_create_by_mobile(options['mobile'])
+        profile, _ = StudentProfile.objects.update_or_create(user=user, defaults={
+            'step_completed': 7,
+            **{
+                field: SAMPLE_VALUES[field]
+                for step, fields in PROFILE_SECTIONS.items() if step != 8
+                for field in fields
+            },
+        })
+        request = RequestFactory().get('/')
+        request.user = user
+
+        for step, template_name in STEP_TEMPLATES.items():
+            results = {}
+            try:
+                for enabled in (False, True):
+                    with override_settings(PROFILE_STEP_CACHE_ENABLED=enabled):
+                        results[enabled] = self.time_render(
+                            request, profile, step, template_name, options['iterations']
+                        )
+            except TemplateSyntaxError as e:
+                self.stdout.write(self.style.ERROR(f'step {step}  {template_name} does not compile: {e}'))
+                continue
+            uncached, cached = results[False], results[True]
+            self.stdout.write(
+                f'step {step}  uncached mean {uncached[0]:6.3f} ms  p99 {uncached[1]:6.3f} ms  '
+                f'cached mean {cached[0]:6.3f} ms  p99 {cached[1]:6.3f} ms  '
+                f'x{uncached[0] / cached[0]:.1f}'
+            )
+
+    def time_render(self, request, profile, step, template_name, iterations):
+        # One warm-up render fills the cache when it is enabled
+        timings = []
+        for _ in range(iterations + 1):
+            started = time.perf_counter()
+            form = STEP_FORMS[step](instance=profile)
+            experiences = profile.experiences.all() if step == 2 else []
+            render_to_string(template_name, step_context(step, profile, form, experiences), request)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings = sorted(timings[1:])
+        return statistics.mean(timings), timings[int(len(timings) * 0.99) - 1]
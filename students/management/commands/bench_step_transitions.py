@@ -0,0 +1,89 @@
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import User
+from students.models import StudentProfile
+from students.steps import TOTAL_STEPS
+
+# Form posts of one registration, as the step pages send them
+REGISTRATION = {
+    1: {'full_name': 'Benchmark Student', 'gender': 'female', 'date_of_birth': '2001-05-17',
+        'current_city': 'Pune', 'current_state': 'Maharashtra', 'lang_english': 'on', 'lang_hindi': 'on'},
+    2: {'current_status': 'graduate', 'highest_qualification': 'graduate', 'stream_specialization': 'Commerce',
+        'college_name': 'Benchmark College', 'university': 'Benchmark University', 'graduation_year': '2023',
+        'academic_scores': '72%', 'has_backlogs': 'false', 'num_backlogs': '0'},
+    3: {'english_speaking': '4', 'english_reading': '4', 'english_writing': '3', 'skill_email': 'on',
+        'skill_ms_office': 'on', 'tool_excel': 'on', 'typing_speed': '35'},
+    4: {'role_customer_support': 'on', 'industry_ecommerce': 'on', 'work_type': 'hybrid',
+        'preferred_locations': 'Pune, Mumbai', 'willing_to_relocate': 'true', 'expected_salary': '3-5 LPA'},
+    5: {'time_for_training': 'full_time', 'slot_morning': 'on', 'has_mobile_access': 'true',
+        'has_laptop_access': 'true', 'internet_quality': 'poor', 'constraints': ''},
+    6: {'comfort_talking_strangers': '4', 'comfort_handling_angry_customers': '3',
+        'comfort_working_with_data': '4', 'comfort_following_targets': '3', 'comfort_writing_emails': '4',
+        'people_vs_task_oriented': 'people', 'office_vs_remote': 'office',
+        'analysis_vs_communication': 'communication', 'concern_lack_of_skills': 'on',
+        'career_goal_3_years': 'Lead a customer support team and train new joiners. ' * 3},
+    7: {'previous_training': '', 'discovery_source': 'Friend Referral', 'commitment_confirmed': 'on',
+        'fee_preference': 'emi'},
+    8: {},
+}
+
+
+def response_bytes(response):
+    """Status line, headers and body as sent (before any compression)"""
+    headers = sum(len(f'{name}: {value}\r\n') for name, value in response.headers.items())
+    return len('HTTP/1.1 200 OK\r\n\r\n') + headers + len(response.content)
+
+
+class Command(BaseCommand):
+    help = (
+        'Walk one registration through all steps with full-page POST-redirect-GET and with '
+        'fragment responses (X-Step-Fragment), and report round trips and bytes up to the '
+        'completion redirect, which both modes follow the same way. '
+        'Creates and deletes user 7000499999; use a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mobile', default='7000499999')
+
+    def handle(self, *args, **options):
+        for mode in ('full page', 'fragment'):
+            User.objects.filter(mobile=options['mobile']).delete()
+            user = User.objects.get_or_create_by_mobile(options['mobile'])
+            StudentProfile.objects.create(user=user)
+            client = Client()
+            client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+
+            trips, sent, received = 0, 0, 0
+
+            def request(method, url, data=None, **headers):
+                nonlocal trips, sent, received
+                response = getattr(client, method)(url, data, headers=headers)
+                trips += 1
+                sent += len(urlencode(data or {}))
+                received += response_bytes(response)
+                if response.status_code >= 400:
+                    raise CommandError(f'{method.upper()} {url} returned {response.status_code}')
+                return response
+
+            request('get', reverse('profile_step', kwargs={'step': 1}))
+            for step in range(1, TOTAL_STEPS + 1):
+                url = reverse('profile_step', kwargs={'step': step})
+                if mode == 'full page':
+                    response = request('post', url, REGISTRATION[step])
+                    if response.status_code != 302:
+                        raise CommandError(f'step {step} did not validate')
+                    if step < TOTAL_STEPS:
+                        request('get', response.url)
+                else:
+                    response = request('post', url, REGISTRATION[step], x_step_fragment='1').json()
+                    if step < TOTAL_STEPS and response.get('step') != step + 1:
+                        raise CommandError(f'step {step} did not validate')
+
+            self.stdout.write(
+                f'{mode:<9} {trips:3d} round trips  {sent:7d} bytes sent  {received:8d} bytes received'
+            )
+        User.objects.filter(mobile=options['mobile']).delete()
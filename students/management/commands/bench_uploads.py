@@ -0,0 +1,214 @@
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from accounts.models import User
+from students.models import StudentProfile
+
+CSRF_TOKEN = 'b' * 32
+BOUNDARY = 'BenchBoundary'
+
+
+class Link:
+    """A connection that drops after a random number of bytes (exponential, mean ``mean_bytes``)"""
+
+    def __init__(self, rng, mean_bytes):
+        self.rng = rng
+        self.mean_bytes = mean_bytes
+        self.sent = 0
+        self.drops = 0
+        self.next_drop()
+
+    def next_drop(self):
+        self.drop_at = self.sent + self.rng.expovariate(1 / self.mean_bytes) if self.mean_bytes else float('inf')
+
+
+class LinkStream:
+    """Request body read from ``file`` through ``link``; raises OSError where the link drops"""
+
+    def __init__(self, file, length, link):
+        self.file = file
+        self.remaining = length
+        self.link = link
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        if self.link.sent + size > self.link.drop_at:
+            self.link.sent = int(self.link.drop_at)
+            self.link.drops += 1
+            self.link.next_drop()
+            raise OSError('connection dropped')
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        self.link.sent += len(data)
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+class Command(BaseCommand):
+    help = (
+        'Upload a resume in one multipart POST (upload_documents) and in resumable chunks over '
+        'a simulated link that drops the connection at random, and report the completion rate, '
+        'bytes sent and the peak RSS growth of the worker. Requests go through the WSGI handler '
+        'with the body streamed from disk. Creates and deletes user 7000599999; use a dev DB.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=float, default=8)
+        parser.add_argument('--trials', type=int, default=50)
+        parser.add_argument('--mean-mb-between-drops', type=float, default=4,
+                            help='Mean transfer between connection drops (0 = lossless)')
+        parser.add_argument('--budget', type=float, default=4,
+                            help='Give up after sending this many times the file size')
+        parser.add_argument('--mobile', default='7000599999')
+
+    def handle(self, *args, **options):
+        size = int(options['size_mb'] * 1024 * 1024)
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            MEDIA_ROOT=os.path.join(directory, 'media'),
+            UPLOAD_STAGING_DIR=os.path.join(directory, 'staging'),
+            # Resumes up to 10MB, whatever size is benchmarked
+            DATA_UPLOAD_MAX_MEMORY_SIZE=None,
+        ):
+            self.source = os.path.join(directory, 'resume.pdf')
+            with open(self.source, 'wb') as source:
+                source.write(b'%PDF-1.4\n' + os.urandom(size - 9))
+            self.multipart = os.path.join(directory, 'multipart.body')
+            with open(self.multipart, 'wb') as body, open(self.source, 'rb') as source:
+                body.write(
+                    f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="resume"; filename="resume.pdf"\r\n'
+                    f'Content-Type: application/pdf\r\n\r\n'.encode()
+                )
+                while block := source.read(1024 * 1024):
+                    body.write(block)
+                body.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+
+            User.objects.filter(mobile=options['mobile']).delete()
+            user = User.objects.get_or_create_by_mobile(options['mobile'])
+            StudentProfile.objects.create(user=user, step_completed=7)
+            client = Client()
+            client.force_login(user, backend='django.contrib.auth.backends.ModelBackend')
+            self.cookie = (
+                f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}; '
+                f'{settings.CSRF_COOKIE_NAME}={CSRF_TOKEN}'
+            )
+            self.handler = WSGIHandler()
+
+            # Errors of requests whose connection dropped are expected
+            logging.getLogger('django.request').setLevel(logging.CRITICAL)
+            try:
+                # Before the trials, so the workers fork from the same footprint
+                rss = {mode: self.peak_rss(getattr(self, f'upload_{mode}'), size) for mode in ('multipart', 'chunked')}
+                for mode in ('multipart', 'chunked'):
+                    upload = getattr(self, f'upload_{mode}')
+                    rng = random.Random(0)
+                    completed, sent = 0, []
+                    for _ in range(options['trials']):
+                        link = Link(rng, options['mean_mb_between_drops'] * 1024 * 1024)
+                        if upload(size, link, options['budget'] * size):
+                            completed += 1
+                            sent.append(link.sent)
+                    mean_sent = sum(sent) / len(sent) / size if sent else 0
+                    self.stdout.write(
+                        f'{mode:<9} completed {completed}/{options["trials"]} ({completed / options["trials"]:.0%})  '
+                        f'sent x{mean_sent:.2f} of the file per completed upload  '
+                        f'peak RSS growth {rss[mode] / 1024:.1f} MB'
+                    )
+            finally:
+                User.objects.filter(mobile=options['mobile']).delete()
+
+    def request(self, method, path, body, length, content_type, link, **headers):
+        environ = {
+            'REQUEST_METHOD': method, 'PATH_INFO': path, 'SCRIPT_NAME': '', 'QUERY_STRING': '',
+            'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1', 'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+            'wsgi.input': LinkStream(body, length, link), 'wsgi.errors': sys.stderr,
+            'wsgi.multithread': False, 'wsgi.multiprocess': True, 'wsgi.run_once': False,
+            'CONTENT_LENGTH': str(length), 'CONTENT_TYPE': content_type,
+            'HTTP_COOKIE': self.cookie, 'HTTP_X_CSRFTOKEN': CSRF_TOKEN,
+            **{f'HTTP_{name.upper()}': value for name, value in headers.items()},
+        }
+        drops = link.drops
+        response = self.handler(environ, lambda status, headers: None)
+        # As the WSGI server would; also removes the request's temporary upload files
+        response.close()
+        # The client sees no response on a dropped connection, whatever the server made of it
+        return response if link.drops == drops else None
+
+    def upload_multipart(self, size, link, budget):
+        length = os.path.getsize(self.multipart)
+        while link.sent < budget:
+            with open(self.multipart, 'rb') as body:
+                response = self.request(
+                    'POST', reverse('upload_documents'), body, length,
+                    f'multipart/form-data; boundary={BOUNDARY}', link,
+                )
+            if response is not None and response.status_code == 200:
+                return True
+        return False
+
+    def upload_chunked(self, size, link, budget):
+        metadata = json.dumps({
+            'field': 'resume', 'filename': 'resume.pdf', 'content_type': 'application/pdf', 'size': size,
+        }).encode()
+        session = None
+        while session is None:
+            if link.sent >= budget:
+                return False
+            response = self.request(
+                'POST', reverse('upload_session_create'), io.BytesIO(metadata), len(metadata), 'application/json', link,
+            )
+            if response is not None:
+                session = json.loads(response.content)
+
+        offset = 0
+        with open(self.source, 'rb') as source:
+            while offset < size:
+                if link.sent >= budget:
+                    return False
+                length = min(session['chunk_size'], size - offset)
+                source.seek(offset)
+                checksum = hashlib.sha256(source.read(length)).hexdigest()
+                source.seek(offset)
+                response = self.request(
+                    'PUT', session['url'], source, length, 'application/octet-stream', link,
+                    upload_offset=str(offset), upload_checksum=checksum,
+                )
+                if response is not None and response.status_code in (200, 409):
+                    offset = json.loads(response.content)['offset']
+        return True
+
+    def peak_rss(self, upload, size):
+        """Growth of the peak RSS (KB) of a forked worker over one lossless upload"""
+        connections.close_all()
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+
+        def run():
+            baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            upload(size, Link(random.Random(0), 0), float('inf'))
+            connections.close_all()
+            sender.send(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline)
+
+        process = multiprocessing.get_context('fork').Process(target=run)
+        process.start()
+        process.join()
+        if not receiver.poll():
+            raise CommandError(f'{upload.__name__} failed in the worker (exit code {process.exitcode})')
+        return receiver.recv()
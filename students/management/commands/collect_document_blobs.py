@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from students.documents import collect_blobs, recount_blobs
+
+
+class Command(BaseCommand):
+    help = 'Delete stored documents that no profile has referenced for the grace period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.DOCUMENT_BLOB_GRACE_HOURS,
+                            help='Keep documents referenced or uploaded within this many hours')
+        parser.add_argument('--recount', action='store_true',
+                            help='First recompute the reference counts from the profile rows')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+
+        if options['recount'] and not options['dry_run']:
+            self.stdout.write(f'Corrected {recount_blobs()} reference counts')
+
+        files, freed = collect_blobs(cutoff, dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{files} documents ({freed / 1024 / 1024:.1f} MB) unreferenced since '
+                              f'{cutoff:%Y-%m-%d %H:%M} would be deleted')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {files} documents ({freed / 1024 / 1024:.1f} MB) unreferenced since {cutoff:%Y-%m-%d %H:%M}'
+        ))
@@ -0,0 +1,48 @@
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from students.models import UploadSession
+from students.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete resumable uploads that have not received a chunk for the maximum age, '
+        'and staging files without a session'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.UPLOAD_SESSION_MAX_AGE_HOURS,
+                            help='Keep sessions active within this many hours')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = UploadSession.objects.filter(updated_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f'{stale.count()} upload sessions idle since {cutoff:%Y-%m-%d %H:%M} would be deleted')
+            return
+
+        sessions = 0
+        for session in stale.iterator():
+            discard_upload(session)
+            sessions += 1
+
+        # Left behind when a session row was removed some other way (e.g. with its profile)
+        orphans = 0
+        staging = Path(settings.UPLOAD_STAGING_DIR)
+        if staging.is_dir():
+            live = {f'{pk}.part' for pk in UploadSession.objects.values_list('pk', flat=True)}
+            for path in staging.glob('*.part'):
+                if path.name not in live and path.stat().st_mtime < cutoff.timestamp():
+                    path.unlink(missing_ok=True)
+                    orphans += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {sessions} upload sessions idle since {cutoff:%Y-%m-%d %H:%M} and {orphans} orphaned staging files'
+        ))
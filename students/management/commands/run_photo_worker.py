@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from students.photos import claim_due, run_job
+
+
+class Command(BaseCommand):
+    help = 'Make thumbnails and WebP variants of uploaded student photos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Photos processed at once (Pillow releases the GIL)')
+        parser.add_argument('--batch-size', type=int, default=20,
+                            help='Jobs leased per poll')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when no job is due instead of polling')
+
+    def handle(self, *args, **options):
+        totals = {'done': 0, 'pending': 0, 'failed': 0}
+
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            try:
+                while True:
+                    close_old_connections()
+                    batch = claim_due(options['batch_size'])
+                    if not batch:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll_interval'])
+                        continue
+
+                    for status in pool.map(self._run, batch):
+                        totals[status] += 1
+                    self.stdout.write(
+                        f"done={totals['done']} retrying={totals['pending']} failed={totals['failed']}"
+                    )
+            except KeyboardInterrupt:
+                pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Photo worker stopped: done={totals['done']} retrying={totals['pending']} failed={totals['failed']}"
+        ))
+
+    def _run(self, job):
+        try:
+            return run_job(job)
+        finally:
+            close_old_connections()
@@ -0,0 +1,170 @@
+import os
+import time
+from collections import deque
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from students.documents import DOCUMENT_FIELDS
+from students.models import StudentProfile
+from students.photos import PHOTO_FORMATS, PHOTO_VARIANTS, variant_name
+from students.storage import BLOB_PREFIX, is_sharded, link_or_copy
+
+FIELDS = ('photo', *DOCUMENT_FIELDS)
+# Directories of the flat layout
+FLAT_DIRECTORIES = ('student_photos', 'resumes', 'id_proofs', 'marksheets')
+
+
+class Command(BaseCommand):
+    help = (
+        'Move photos and documents saved in the flat layout (student_photos/, resumes/, id_proofs/, '
+        'marksheets/, documents/<ab>/) to the sharded one, a batch of profiles at a time, while the '
+        'site runs. Each file is linked at its new name before the row is switched, and the old file '
+        'is kept for --grace seconds so pages rendered before the switch still load it. Safe to '
+        'interrupt and run again: moved profiles are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--after', type=int, default=0, help='Start after this profile id')
+        parser.add_argument('--limit', type=int, help='Stop after moving this many profiles')
+        parser.add_argument('--grace', type=float, default=300,
+                            help='Seconds to keep the old files after their rows are switched')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches')
+        parser.add_argument('--sweep', action='store_true',
+                            help='After a full pass, delete files left in the flat directories by interrupted runs')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['sweep'] and (options['after'] or options['limit'] or options['dry_run']):
+            raise CommandError('--sweep needs a full pass: drop --after, --limit and --dry-run')
+        self.photo_storage = StudentProfile._meta.get_field('photo').storage
+        self.document_storage = StudentProfile._meta.get_field('resume').storage
+        # (switched at, paths of the old files)
+        self.retiring = deque()
+        self.totals = {'profiles': 0, 'files': 0, 'missing': 0, 'conflicts': 0}
+
+        last = options['after']
+        while options['limit'] is None or self.totals['profiles'] < options['limit']:
+            rows = list(
+                StudentProfile.objects.filter(pk__gt=last).order_by('pk')
+                .values_list('pk', 'photo_variants', *FIELDS)[:options['batch_size']]
+            )
+            if not rows:
+                break
+            for pk, variants, *names in rows:
+                flat = {field: name for field, name in zip(FIELDS, names) if name and not is_sharded(name)}
+                if not flat:
+                    continue
+                if options['dry_run']:
+                    self.totals['profiles'] += 1
+                    self.totals['files'] += len(flat)
+                else:
+                    self.move_profile(pk, flat, variants)
+                if options['limit'] is not None and self.totals['profiles'] >= options['limit']:
+                    break
+            last = pk
+            self.retire(options['grace'])
+            self.stdout.write(
+                f'up to profile {last}: {self.totals["files"]} files of {self.totals["profiles"]} profiles '
+                f'{"to move" if options["dry_run"] else "moved"}'
+            )
+            time.sleep(options['pause'])
+
+        if self.retiring:
+            wait = max(0, self.retiring[-1][0] + options['grace'] - time.monotonic())
+            self.stdout.write(f'Keeping the old files of the last batches for another {wait:.0f}s')
+            time.sleep(wait)
+            self.retire(0)
+        swept = self.sweep() if options['sweep'] else 0
+
+        if options['dry_run']:
+            self.stdout.write(f'{self.totals["files"]} files of {self.totals["profiles"]} profiles would be moved')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved {self.totals["files"]} files of {self.totals["profiles"]} profiles; '
+            f'{self.totals["missing"]} missing from disk, {self.totals["conflicts"]} replaced meanwhile, '
+            f'{swept} left-over files swept'
+        ))
+
+    def move_profile(self, pk, flat, variants):
+        """Link the profile's flat files at sharded names, then switch its row to them"""
+        new, linked, retiring = {}, [], []
+        for field, name in flat.items():
+            try:
+                if field == 'photo':
+                    new[field] = StudentProfile._meta.get_field('photo').upload_to(None, name)
+                    link_or_copy(self.photo_storage.path(name), self.photo_storage.path(new[field]))
+                    linked.append(new[field])
+                else:
+                    new[field] = self.document_storage.adopt(name)
+            except FileNotFoundError:
+                new.pop(field, None)
+                self.totals['missing'] += 1
+
+        # The derivatives are named after the photo; they move with it
+        new_variants = {}
+        if 'photo' in new and variants.get('source') == flat['photo']:
+            old_stem, new_stem = os.path.splitext(flat['photo'])[0], os.path.splitext(new['photo'])[0]
+            try:
+                for key, name in variants.items():
+                    new_variants[key] = new_stem + name[len(old_stem):]
+                    if key != 'source':
+                        link_or_copy(self.photo_storage.path(name), self.photo_storage.path(new_variants[key]))
+                        linked.append(new_variants[key])
+            except FileNotFoundError:
+                # The photo worker makes them again
+                new_variants = {}
+
+        with transaction.atomic():
+            profile = StudentProfile.objects.select_for_update().only(*new, 'photo_variants').filter(pk=pk).first()
+            switched = [field for field in new if profile and getattr(profile, field).name == flat[field]]
+            for field in switched:
+                setattr(profile, field, new[field])
+            if 'photo' in switched:
+                # Unless the worker wrote other derivatives since they were read
+                profile.photo_variants = new_variants if profile.photo_variants == variants else {}
+                for variant in PHOTO_VARIANTS:
+                    for extension, options in PHOTO_FORMATS.values():
+                        retiring.append(self.photo_storage.path(variant_name(flat['photo'], variant, extension)))
+                retiring.append(self.photo_storage.path(flat['photo']))
+            if switched:
+                # Not updated_at: the row's content is unchanged, and autosaves compare it
+                profile.save(update_fields=[*switched, 'photo_variants'] if 'photo' in switched else switched)
+
+        if 'photo' in new and 'photo' not in switched:
+            for name in linked:
+                self.photo_storage.delete(name)
+        for field in switched:
+            # Shared digest-named files are released by the save and collected
+            # by collect_document_blobs
+            if field != 'photo' and not flat[field].startswith(f'{BLOB_PREFIX}/'):
+                retiring.append(self.document_storage.path(flat[field]))
+        self.totals['conflicts'] += len(new) - len(switched)
+        if switched:
+            self.totals['profiles'] += 1
+            self.totals['files'] += len(switched)
+            self.retiring.append((time.monotonic(), retiring))
+
+    def retire(self, grace):
+        """Delete the old files switched more than ``grace`` seconds ago"""
+        while self.retiring and self.retiring[0][0] + grace <= time.monotonic():
+            for path in self.retiring.popleft()[1]:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+    def sweep(self):
+        """Delete the files left in the flat directories; only safe once no row names them"""
+        swept = 0
+        for directory in FLAT_DIRECTORIES:
+            path = self.photo_storage.path(directory)
+            if not os.path.isdir(path):
+                continue
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        os.unlink(entry.path)
+                        swept += 1
+        return swept
@@ -0,0 +1,143 @@
+"""
+Authorized delivery of uploaded files.
+
+Every URL under MEDIA_URL goes through ``students.views.media_file``. It
+serves a file to staff, and to a student whose profile references it (a
+document, the photo, or one of the photo's derivatives). Anyone else gets a
+404, so the response does not reveal whether the file exists.
+
+Once authorized, the transfer is handed off according to ``MEDIA_ACCEL``:
+
+* ``'nginx'``: an empty response with ``X-Accel-Redirect: MEDIA_ACCEL_PREFIX
+  + name``. nginx serves the file from an ``internal`` location aliased to
+  MEDIA_ROOT, and handles Range and conditional requests itself.
+* ``'sendfile'``: ``X-Sendfile`` with the absolute path, for Apache
+  mod_xsendfile or lighttpd.
+* ``''`` (no proxy): a FileResponse. gunicorn sends it with ``os.sendfile``
+  from the file's offset. A single byte range is answered with 206, and a
+  range that starts past the end with 416. Multiple ranges get the whole file.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .models import StudentProfile
+from .photos import PHOTO_FORMATS, PHOTO_VARIANTS
+
+# '<photo stem>.<variant>.<extension>': a photo derivative (students.photos.variant_name)
+DERIVATIVE = re.compile(r'(.+)\.(?:{})\.(?:{})'.format(
+    '|'.join(map(re.escape, PHOTO_VARIANTS)),
+    '|'.join(re.escape(extension) for extension, options in PHOTO_FORMATS.values()),
+))
+SINGLE_RANGE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class FileRange:
+    """``length`` bytes of ``file`` from its current offset, still with a fileno() for sendfile"""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def can_access(user, name):
+    """Whether ``user`` may download the stored file ``name``"""
+    if not user.is_authenticated:
+        return False
+    if user.is_staff:
+        return True
+    references = Q(photo=name) | Q(resume=name) | Q(id_proof=name) | Q(marksheet=name)
+    derivative = DERIVATIVE.fullmatch(name)
+    if derivative:
+        references |= Q(photo__startswith=f'{derivative[1]}.')
+    return StudentProfile.objects.filter(references, user=user).exists()
+
+
+def byte_range(header, size):
+    """
+    (first, last) byte of a single-range ``Range`` header; None to send the
+    whole file, or False when the range starts past the end
+    """
+    match = SINGLE_RANGE.fullmatch(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # The last ``last`` bytes
+        return (max(size - int(last), 0), size - 1) if int(last) and size else False
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size:
+        return False
+    # A last byte before the first makes the header invalid, which means ignore it
+    return (first, last) if first <= last else None
+
+
+def media_response(request, storage, name):
+    """
+    Response delivering the stored file ``name``, which the caller has
+    authorized; raises SuspiciousFileOperation for names outside the storage
+    """
+    path = storage.path(name)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if settings.MEDIA_ACCEL == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        relative = os.path.relpath(path, storage.location).replace(os.sep, '/')
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + quote(relative)
+    elif settings.MEDIA_ACCEL == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        response = file_response(request, path, content_type)
+    patch_cache_control(response, private=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
+
+
+def file_response(request, path, content_type):
+    """FileResponse for ``path`` with conditional GET and single byte ranges; raises FileNotFoundError"""
+    stat = os.stat(path)
+    last_modified = http_date(stat.st_mtime)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    requested = None
+    # If-Range: the range only applies to the version the client already has part of
+    if request.META.get('HTTP_IF_RANGE', last_modified) == last_modified:
+        requested = byte_range(request.META.get('HTTP_RANGE'), stat.st_size)
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+
+    file = open(path, 'rb')
+    if requested:
+        first, last = requested
+        file.seek(first)
+        response = FileResponse(FileRange(file, last - first + 1), content_type=content_type, status=206)
+        response['Content-Range'] = f'bytes {first}-{last}/{stat.st_size}'
+        response['Content-Length'] = last - first + 1
+    else:
+        response = FileResponse(file, content_type=content_type)
+    response['Last-Modified'] = last_modified
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:25
+
+import students.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_photo_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('name', models.CharField(help_text='Storage name', max_length=255, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField(help_text='Size in bytes')),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Document Blob',
+                'verbose_name_plural': 'Document Blobs',
+                'db_table': 'document_blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='id_proof',
+            field=models.FileField(blank=True, null=True, storage=students.models.document_storage, upload_to='id_proofs/'),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='marksheet',
+            field=models.FileField(blank=True, null=True, storage=students.models.document_storage, upload_to='marksheets/'),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='resume',
+            field=models.FileField(blank=True, null=True, storage=students.models.document_storage, upload_to='resumes/'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:31
+
+import students.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_document_blobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, upload_to=students.storage.ShardedPath('student_photos')),
+        ),
+    ]
@@ -1,5 +1,43 @@
-from django.db import models
+import uuid
+from collections import namedtuple
+from pathlib import Path
+
+from django.db import connection, models, transaction
 from django.conf import settings
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .steps import PROFILE_SECTIONS, SAVE_DEFAULTS, TOTAL_STEPS
+from .storage import ContentAddressedStorage, ShardedPath
+
+# Sent by Experience.sync_for_profile() with ``profile`` when it changed rows;
+# its bulk writes send no post_save/post_delete
+experiences_synced = Signal()
+
+# Written together with any section
+PROGRESS_FIELDS = ('step_completed', 'is_complete', 'submitted_at', 'updated_at')
+
+# Narrow columns that step gating, dashboards and admin lists rely on; the
+# section columns are deferred until a page asks for them
+CORE_FIELDS = ('user', 'full_name', 'step_completed', 'is_complete', 'submitted_at',
+               'created_at', 'updated_at', 'photo_variants')
+
+
+def document_storage():
+    """Storage of resumes, ID proofs and marksheets"""
+    return ContentAddressedStorage()
+
+
+class StudentProfileQuerySet(models.QuerySet):
+    """Field groups for StudentProfile reads"""
+    
+    def core(self):
+        """Load only CORE_FIELDS"""
+        return self.only(*CORE_FIELDS)
+    
+    def with_sections(self, *steps):
+        """Load CORE_FIELDS and the columns of the given steps"""
+        return self.only(*CORE_FIELDS, *(field for step in steps for field in PROFILE_SECTIONS[step]))
 
 
 class StudentProfile(models.Model):
@@ -91,10 +129,14 @@ class StudentProfile(models.Model):
     ])
     
     # SECTION H - Document Uploads
-    photo = models.ImageField(upload_to='student_photos/', blank=True, null=True)
-    resume = models.FileField(upload_to='resumes/', blank=True, null=True)
-    id_proof = models.FileField(upload_to='id_proofs/', blank=True, null=True)
-    marksheet = models.FileField(upload_to='marksheets/', blank=True, null=True)
+    photo = models.ImageField(upload_to=ShardedPath('student_photos'), blank=True, null=True)
+    # Stored once per distinct content (students.documents)
+    resume = models.FileField(upload_to='resumes/', storage=document_storage, blank=True, null=True)
+    id_proof = models.FileField(upload_to='id_proofs/', storage=document_storage, blank=True, null=True)
+    marksheet = models.FileField(upload_to='marksheets/', storage=document_storage, blank=True, null=True)
+    # Storage names of the photo's derivatives (students.photos), keyed by
+    # variant and format, plus the photo they were made from ('source')
+    photo_variants = models.JSONField(default=dict, blank=True)
     
     # Progress Tracking
     step_completed = models.IntegerField(default=0, help_text='Last completed step (0-8)')
@@ -105,6 +147,11 @@ class StudentProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = StudentProfileQuerySet.as_manager()
+    
+    # Read by the auth middleware to co-load only these columns with the user
+    CORE_FIELDS = CORE_FIELDS
+    
     class Meta:
         db_table = 'student_profiles'
         verbose_name = 'Student Profile'
@@ -113,9 +160,86 @@ class StudentProfile(models.Model):
     def __str__(self):
         return f'{self.full_name} - {self.user.email or self.user.mobile}'
     
+    def save(self, *args, update_fields=None, **kwargs):
+        # A new photo drops the derivatives of the old one until the photo worker redoes them
+        if 'photo' not in self.get_deferred_fields() and (update_fields is None or 'photo' in update_fields):
+            if self.photo_variants.get('source') != (self.photo.name or None):
+                self.photo_variants = {}
+                if update_fields is not None:
+                    update_fields = {*update_fields, 'photo_variants'}
+        # The document reference counts (students.documents) commit with the row
+        with transaction.atomic(savepoint=False):
+            super().save(*args, update_fields=update_fields, **kwargs)
+    
     def get_progress_percentage(self):
         """Calculate completion percentage"""
-        return int((self.step_completed / 8) * 100)
+        return int((self.step_completed / TOTAL_STEPS) * 100)
+    
+    def save_section(self, *steps):
+        """UPDATE only the columns of ``steps`` plus the progress columns"""
+        self.save(update_fields=[
+            *(field for step in steps for field in PROFILE_SECTIONS.get(step, ())),
+            *PROGRESS_FIELDS,
+        ])
+    
+    def _deferred_section_fields(self, steps):
+        deferred = self.get_deferred_fields()
+        return [field for step in steps for field in PROFILE_SECTIONS[step] if field in deferred]
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Document names loaded late are known to the reference counts too
+        from .documents import DOCUMENT_FIELDS, remember_stored_documents
+        remember_stored_documents(self, fields or DOCUMENT_FIELDS)
+    
+    def load_sections(self, *steps):
+        """Fetch the still-deferred columns of ``steps`` in one query"""
+        fields = self._deferred_section_fields(steps)
+        if fields:
+            self.refresh_from_db(fields=fields)
+    
+    async def aload_sections(self, *steps):
+        fields = self._deferred_section_fields(steps)
+        if fields:
+            await self.arefresh_from_db(fields=fields)
+    
+    def save_changes(self, values, version):
+        """
+        UPDATE only the ``values`` columns (and updated_at), provided the row is still
+        at ``version`` (its updated_at). Returns False, writing nothing, when it is not.
+        """
+        now = timezone.now()
+        updated = type(self).objects.filter(pk=self.pk, updated_at=version).update(updated_at=now, **values)
+        if not updated:
+            return False
+        for name, value in values.items():
+            setattr(self, name, value)
+        self.updated_at = now
+        return True
+    
+    def apply_section_data(self, step, data):
+        """
+        Set the columns of ``step`` from a JSON payload; missing keys take the
+        step's save default, or else the field default
+        """
+        defaults = SAVE_DEFAULTS.get(step, {})
+        for field in SECTION_DATA_FIELDS.get(step, ()):
+            if field.name in data:
+                value = data[field.name]
+            else:
+                value = defaults[field.name] if field.name in defaults else field.get_default()
+            setattr(self, field.attname, field.to_python(value))
+
+
+# Model fields behind each step's JSON save, resolved once; uploads go
+# through upload_documents instead
+SECTION_DATA_FIELDS = {
+    step: tuple(
+        field for field in map(StudentProfile._meta.get_field, fields)
+        if not isinstance(field, models.FileField)
+    )
+    for step, fields in PROFILE_SECTIONS.items()
+}
 
 
 class Experience(models.Model):
@@ -129,6 +253,9 @@ class Experience(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Columns compared and written by sync_for_profile()
+    SYNC_FIELDS = ('company_name', 'role', 'duration', 'description')
+    
     class Meta:
         db_table = 'experiences'
         verbose_name = 'Experience'
@@ -136,4 +263,145 @@ class Experience(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f'{self.role} at {self.company_name}'
\ No newline at end of file
+        return f'{self.role} at {self.company_name}'
+    
+    @classmethod
+    def sync_for_profile(cls, profile, entries):
+        """
+        Make ``profile``'s experiences match ``entries`` (dicts of SYNC_FIELDS, with
+        ``id`` for rows the client already has) by creating, updating and deleting only
+        what differs, in one transaction. Entries without an ``id`` that equal an
+        existing row keep that row. Returns an ExperienceSync.
+        """
+        statements = 0
+        
+        def count(execute, sql, params, many, context):
+            nonlocal statements
+            statements += 1
+            return execute(sql, params, many, context)
+        
+        with transaction.atomic(), connection.execute_wrapper(count):
+            existing = {experience.pk: experience for experience in profile.experiences.all()}
+            unclaimed = dict(existing)
+            to_create, to_update, pending = [], [], []
+            
+            for entry in entries:
+                values = {field: entry.get(field, '') for field in cls.SYNC_FIELDS}
+                experience = unclaimed.pop(entry.get('id'), None)
+                if experience is None:
+                    pending.append(values)
+                elif any(getattr(experience, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(experience, field, value)
+                    to_update.append(experience)
+            
+            # Entries without a known id: reuse an identical unclaimed row, else create
+            by_content = {}
+            for experience in unclaimed.values():
+                key = tuple(getattr(experience, field) for field in cls.SYNC_FIELDS)
+                by_content.setdefault(key, []).append(experience)
+            for values in pending:
+                matches = by_content.get(tuple(values.values()))
+                if matches:
+                    del unclaimed[matches.pop().pk]
+                else:
+                    to_create.append(cls(student_profile=profile, **values))
+            
+            if to_create:
+                cls.objects.bulk_create(to_create)
+            if to_update:
+                cls.objects.bulk_update(to_update, cls.SYNC_FIELDS)
+            if unclaimed:
+                cls.objects.filter(pk__in=list(unclaimed)).delete()
+        
+        if to_create or to_update:
+            experiences_synced.send(sender=cls, profile=profile)
+        return ExperienceSync(len(to_create), len(to_update), len(unclaimed), statements)
+
+
+# Outcome of Experience.sync_for_profile(); ``statements`` counts every SQL
+# statement it ran, including the read of the existing rows
+ExperienceSync = namedtuple('ExperienceSync', ['created', 'updated', 'deleted', 'statements'])
+
+
+class UploadSession(models.Model):
+    """Resumable upload of one document, staged in chunks until it is complete (students.uploads)"""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student_profile = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='upload_sessions')
+    field = models.CharField(max_length=20, choices=[
+        (name, StudentProfile._meta.get_field(name).verbose_name) for name in PROFILE_SECTIONS[8]
+    ])
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField(help_text='Declared size in bytes')
+    offset = models.PositiveBigIntegerField(default=0, help_text='Bytes received so far')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'upload_sessions'
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+    
+    def __str__(self):
+        return f'{self.field} upload {self.offset}/{self.size}'
+    
+    @property
+    def staging_path(self):
+        return Path(settings.UPLOAD_STAGING_DIR) / f'{self.pk}.part'
+    
+    @property
+    def is_complete(self):
+        return self.offset == self.size
+
+
+class PhotoJob(models.Model):
+    """Queued derivatives of a student photo, made by the photo worker (manage.py run_photo_worker)"""
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    student_profile = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='photo_jobs')
+    source = models.CharField(max_length=255, help_text='Storage name of the photo to process')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'photo_jobs'
+        ordering = ['-created_at']
+        verbose_name = 'Photo Job'
+        verbose_name_plural = 'Photo Jobs'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='photo_job_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.source} - {self.status} ({self.attempts} attempts)'
+
+
+class DocumentBlob(models.Model):
+    """A stored document file and the number of profile fields that reference it (students.documents)"""
+    
+    name = models.CharField(max_length=255, primary_key=True, help_text='Storage name')
+    size = models.PositiveBigIntegerField(help_text='Size in bytes')
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last time it was referenced, released or uploaded again
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'document_blobs'
+        verbose_name = 'Document Blob'
+        verbose_name_plural = 'Document Blobs'
+    
+    def __str__(self):
+        return f'{self.name} ({self.refcount} references)'
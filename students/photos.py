@@ -0,0 +1,189 @@
+"""
+Derivatives of student photos, made off the request.
+
+Saving a profile with a new photo clears its ``photo_variants`` and queues a
+``PhotoJob``; the photo worker (``manage.py run_photo_worker``) leases due jobs
+and processes them on a thread pool (Pillow releases the GIL while it decodes,
+resizes and encodes). Each photo is decoded once: JPEGs at the smallest DCT
+scale that still covers the largest variant. Photos over ``PHOTO_MAX_PIXELS``
+are refused before decoding (decompression bombs). The image is turned upright
+from its EXIF orientation, and the variants are written without EXIF (camera
+details, GPS) in WebP and JPEG next to the original, e.g.
+``student_photos/3f/a2/<key>.thumb.webp``.
+
+Pages show photos through ``{% profile_photo %}`` (students.templatetags.student_photos),
+which serves a variant once it exists and the original until then. A job whose
+photo has been replaced meanwhile is finished without writing anything; the
+new photo has its own job.
+"""
+import io
+import os
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import PhotoJob, StudentProfile
+
+# Variant name -> (width, height, crop to fill instead of fit inside)
+PHOTO_VARIANTS = {
+    'thumb': (96, 96, True),
+    'medium': (320, 320, False),
+}
+
+# Format -> (extension, Pillow save options)
+PHOTO_FORMATS = {
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+class PhotoRejected(Exception):
+    """The photo cannot be processed and will not be retried"""
+
+
+def variant_name(source, variant, extension):
+    """Storage name of a derivative, next to the original"""
+    return f'{os.path.splitext(source)[0]}.{variant}.{extension}'
+
+
+def photo_html(profile, variant, alt='', **attrs):
+    """
+    <picture> of ``variant`` of the profile's photo in WebP with a JPEG fallback,
+    or the original until the variants exist; empty without a photo
+    """
+    variants = profile.photo_variants
+    if variants:
+        storage = StudentProfile._meta.get_field('photo').storage
+        return format_html(
+            '<picture><source srcset="{}" type="image/webp"><img src="{}" alt="{}"{}></picture>',
+            storage.url(variants[f'{variant}.webp']), storage.url(variants[f'{variant}.jpeg']), alt, flatatt(attrs),
+        )
+    if profile.photo:
+        return format_html('<img src="{}" alt="{}"{}>', profile.photo.url, alt, flatatt(attrs))
+    return ''
+
+
+def enqueue_photo(profile):
+    """Queue derivatives of the profile's current photo, unless it already has a job"""
+    source = profile.photo.name
+    if not PhotoJob.objects.filter(student_profile=profile, source=source).exists():
+        PhotoJob.objects.create(student_profile=profile, source=source)
+
+
+def render_variants(file):
+    """Decode the photo in ``file`` once and return {(variant, format): encoded bytes}"""
+    try:
+        with Image.open(file) as image:
+            # Only the header has been read so far
+            if image.width * image.height > settings.PHOTO_MAX_PIXELS:
+                raise PhotoRejected(f'{image.width}x{image.height} is over the pixel budget')
+            # JPEG only: decode straight at 1/2, 1/4 or 1/8 scale where that still covers every variant
+            largest = max(max(width, height) for width, height, crop in PHOTO_VARIANTS.values())
+            image.draft('RGB', (largest * 2, largest * 2))
+            image = ImageOps.exif_transpose(image).convert('RGB')
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise PhotoRejected(f'Cannot decode photo: {e}')
+
+    rendered = {}
+    for variant, (width, height, crop) in PHOTO_VARIANTS.items():
+        if crop:
+            resized = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((width, height), Image.Resampling.LANCZOS)
+        for format_name, (extension, options) in PHOTO_FORMATS.items():
+            buffer = io.BytesIO()
+            # No exif= argument: the derivatives carry no metadata
+            resized.save(buffer, **options)
+            rendered[variant, format_name] = buffer.getvalue()
+    return rendered
+
+
+def process_photo(job):
+    """Make and record the derivatives of a leased job's photo"""
+    profile = StudentProfile.objects.only('photo').get(pk=job.student_profile_id)
+    if profile.photo.name != job.source:
+        return
+
+    with profile.photo.open('rb') as file:
+        rendered = render_variants(file)
+
+    storage = profile.photo.storage
+    variants = {'source': job.source}
+    for (variant, format_name), content in rendered.items():
+        name = variant_name(job.source, variant, PHOTO_FORMATS[format_name][0])
+        storage.delete(name)
+        variants[f'{variant}.{format_name}'] = storage.save(name, ContentFile(content))
+
+    with transaction.atomic():
+        profile = StudentProfile.objects.select_for_update().only('photo', 'photo_variants').get(pk=profile.pk)
+        if profile.photo.name != job.source:
+            # Replaced while we worked; the new photo has its own job
+            for name in variants.values():
+                if name != job.source:
+                    storage.delete(name)
+            return
+        profile.photo_variants = variants
+        profile.save(update_fields=['photo_variants', 'updated_at'])
+
+
+def claim_due(batch_size):
+    """Lease up to ``batch_size`` due photo jobs for this worker"""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            PhotoJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        PhotoJob.objects.filter(id__in=ids).update(
+            attempts=F('attempts') + 1,
+            next_attempt_at=now + timedelta(seconds=settings.PHOTO_JOB_LEASE_SECONDS),
+        )
+    return list(PhotoJob.objects.filter(id__in=ids))
+
+
+def run_job(job):
+    """Process one leased job and record the outcome; returns the new status"""
+    try:
+        process_photo(job)
+    except (PhotoRejected, StudentProfile.DoesNotExist) as e:
+        return _finish(job, 'failed', last_error=str(e)[:255])
+    except Exception as e:
+        # Storage or database trouble: try again later
+        if job.attempts >= settings.PHOTO_JOB_MAX_ATTEMPTS:
+            return _finish(job, 'failed', last_error=str(e)[:255])
+        delay = settings.PHOTO_JOB_LEASE_SECONDS * random.uniform(0.5, 1.0)
+        return _finish(job, 'pending', last_error=str(e)[:255],
+                       next_attempt_at=timezone.now() + timedelta(seconds=delay))
+    return _finish(job, 'done')
+
+
+def _finish(job, status, **fields):
+    if status != 'pending':
+        fields['finished_at'] = timezone.now()
+    PhotoJob.objects.filter(id=job.id).update(status=status, **fields)
+    return status
+
+
+@receiver(post_save, sender=StudentProfile)
+def _queue_new_photo(sender, instance, update_fields=None, **kwargs):
+    # StudentProfile.save() cleared the variants if the photo changed
+    if 'photo' in instance.get_deferred_fields() or (update_fields is not None and 'photo' not in update_fields):
+        return
+    if instance.photo and not instance.photo_variants:
+        transaction.on_commit(lambda: enqueue_photo(instance))
@@ -0,0 +1,90 @@
+"""
+Per-profile cache of the rendered registration step forms.
+
+``step_base.html`` wraps the ``form_content`` block in ``{% stepcache %}``
+(students.templatetags.step_cache). For an unbound form the block's output is
+stored under ``students:step:<profile id>:<step>`` together with a stamp of
+the profile's ``updated_at`` and the template version (a hash of the step
+template and ``step_base.html`` sources). An entry is only served while both
+still match. Saving the profile or one of its experiences also deletes the
+profile's entries outright. Forms with submitted data (validation errors) are
+always rendered.
+
+Everything outside the block (CSRF token, messages, navigation) is rendered
+on each request as before. Controlled by ``PROFILE_STEP_CACHE_ENABLED``.
+"""
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.template.loader import get_template
+
+from .models import Experience, StudentProfile, experiences_synced
+from .steps import STEP_TEMPLATES, TOTAL_STEPS
+
+STEP_BASE_TEMPLATE = 'students/step_base.html'
+
+
+def step_cache_key(profile_id, step):
+    return f'students:step:{profile_id}:{step}'
+
+
+@lru_cache(maxsize=32)
+def _source_hash(*sources):
+    # Template sources are the same str objects while the loader caches them,
+    # so repeat lookups only hash the tuple
+    return hashlib.md5('\0'.join(sources).encode()).hexdigest()[:12]
+
+
+def template_version(step):
+    """Hash of the markup a cached step fragment was rendered from"""
+    return _source_hash(*(
+        get_template(name).template.source for name in (STEP_TEMPLATES[step], STEP_BASE_TEMPLATE)
+    ))
+
+
+class StepFragment:
+    """Cache slot for one profile's rendered step form"""
+
+    def __init__(self, profile, step):
+        self.key = step_cache_key(profile.pk, step)
+        self.stamp = (profile.updated_at.isoformat(), template_version(step))
+
+    def get(self):
+        cached = cache.get(self.key)
+        if cached is not None and cached[0] == self.stamp:
+            return cached[1]
+        return None
+
+    def set(self, html):
+        cache.set(self.key, (self.stamp, html), settings.PROFILE_STEP_CACHE_TIMEOUT)
+
+
+def step_fragment(profile, step, form):
+    """The cache slot for a step page, or None when it must be rendered"""
+    if not settings.PROFILE_STEP_CACHE_ENABLED or form.is_bound:
+        return None
+    return StepFragment(profile, step)
+
+
+def invalidate_profile_steps(profile_id):
+    cache.delete_many([step_cache_key(profile_id, step) for step in range(1, TOTAL_STEPS + 1)])
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def _invalidate_profile(sender, instance, **kwargs):
+    invalidate_profile_steps(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Experience)
+def _invalidate_experience_profile(sender, instance, **kwargs):
+    # Experiences are rendered on step 2 but do not touch the profile row
+    invalidate_profile_steps(instance.student_profile_id)
+
+
+@receiver(experiences_synced)
+def _invalidate_synced_profile(sender, profile, **kwargs):
+    invalidate_profile_steps(profile.pk)
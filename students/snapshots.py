@@ -0,0 +1,123 @@
+"""
+Read-through cache of complete profile snapshots for the review page and the
+dashboard.
+
+A snapshot is the whole StudentProfile row (every section) with its
+experiences, pickled under ``students:snapshot:<profile id>`` together with
+the profile's ``updated_at``. The views only need the core columns, which are
+co-loaded with ``request.user``, and render from the snapshot while its
+``updated_at`` still matches, so a hit runs no query. Saving or deleting the
+profile or one of its experiences (also through Experience.sync_for_profile)
+deletes the entry.
+
+On a miss a single request rebuilds the snapshot (it holds a lock entry in the
+cache); concurrent requests for the same profile wait for its result instead of
+all reading the database at once. Hits, misses and rebuild time are counted
+per process in ``stats``. Controlled by ``PROFILE_SNAPSHOT_CACHE_ENABLED``.
+"""
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Experience, StudentProfile, experiences_synced
+
+Snapshot = namedtuple('Snapshot', ['profile', 'experiences'])
+
+# Poll interval of requests waiting for another request's rebuild
+WAIT_INTERVAL = 0.02
+
+
+class SnapshotStats:
+    """Per-process snapshot cache counters"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        # Misses served by another request's rebuild
+        self.waits = 0
+        self.rebuilds = 0
+        self.rebuild_seconds = 0.0
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+stats = SnapshotStats()
+
+
+def snapshot_key(profile_id):
+    return f'students:snapshot:{profile_id}'
+
+
+def build_snapshot(profile_id):
+    """Read the full profile row and its experiences"""
+    profile = StudentProfile.objects.get(pk=profile_id)
+    return Snapshot(profile, list(profile.experiences.all()))
+
+
+def _cached(key, updated_at):
+    cached = cache.get(key)
+    # A newer snapshot than the caller's row is as good
+    if cached is not None and cached[0] >= updated_at:
+        return cached[1]
+    return None
+
+
+def get_snapshot(profile):
+    """Snapshot of ``profile``, of which only the core columns need to be loaded"""
+    if not settings.PROFILE_SNAPSHOT_CACHE_ENABLED:
+        return build_snapshot(profile.pk)
+
+    key = snapshot_key(profile.pk)
+    snapshot = _cached(key, profile.updated_at)
+    if snapshot is not None:
+        stats.hits += 1
+        return snapshot
+    stats.misses += 1
+
+    lock_key = f'{key}:lock'
+    locked = cache.add(lock_key, 1, settings.PROFILE_SNAPSHOT_LOCK_TIMEOUT)
+    if not locked:
+        # Another request is rebuilding; fall back to our own read if it takes too long
+        deadline = time.monotonic() + settings.PROFILE_SNAPSHOT_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_INTERVAL)
+            snapshot = _cached(key, profile.updated_at)
+            if snapshot is not None:
+                stats.waits += 1
+                return snapshot
+
+    try:
+        started = time.perf_counter()
+        snapshot = build_snapshot(profile.pk)
+        stats.rebuilds += 1
+        stats.rebuild_seconds += time.perf_counter() - started
+        cache.set(key, (snapshot.profile.updated_at, snapshot), settings.PROFILE_SNAPSHOT_CACHE_TIMEOUT)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return snapshot
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def _invalidate_profile(sender, instance, **kwargs):
+    cache.delete(snapshot_key(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=Experience)
+def _invalidate_experience_profile(sender, instance, **kwargs):
+    cache.delete(snapshot_key(instance.student_profile_id))
+
+
+@receiver(experiences_synced)
+def _invalidate_synced_profile(sender, profile, **kwargs):
+    cache.delete(snapshot_key(profile.pk))
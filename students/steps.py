@@ -0,0 +1,208 @@
+"""
+Declarative schema of the registration steps.
+
+``STEPS`` is the single place that says which ``StudentProfile`` columns each
+step owns, which template renders it, how its admin fieldset is titled, which
+columns go into the CSV export, which multi-checkbox groups it has and what the
+AJAX save stores for keys its payload leaves out. Every other step table
+(``PROFILE_SECTIONS``, the step forms' columns, checkbox fields and label
+maps, the admin fieldsets, the export columns, the AJAX save handler) is
+compiled from it once at import into read-only lookups.
+
+Adding a step means adding a ``Step`` here, its form class (forms.py, for
+widgets and validation) and its template.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+# A checkbox field that stores ``label`` in a JSON list column. ``aliases`` are
+# older stored labels that should still tick the box.
+Choice = namedtuple('Choice', ['field', 'label', 'aliases'], defaults=[()])
+
+# A set of checkboxes kept in one JSON list column; ``required_message`` makes
+# at least one choice mandatory
+CheckboxGroup = namedtuple('CheckboxGroup', [
+    'model_field', 'choices', 'required_message',
+    'label_for_field', 'field_for_label',
+])
+
+# ``save_defaults``: values the AJAX save handler stores for keys missing from
+# its payload where they differ from the model field default
+Step = namedtuple('Step', [
+    'number', 'title', 'template', 'fields', 'export_fields', 'checkbox_groups', 'save_defaults',
+], defaults=[MappingProxyType({})])
+
+
+def checkbox_group(model_field, choices, required_message=None):
+    """Build a CheckboxGroup with its lookups in both directions"""
+    choices = tuple(Choice(*choice) for choice in choices)
+    field_for_label = {}
+    for choice in choices:
+        for label in (choice.label, *choice.aliases):
+            field_for_label[label] = choice.field
+    return CheckboxGroup(
+        model_field,
+        choices,
+        required_message,
+        MappingProxyType({choice.field: choice.label for choice in choices}),
+        MappingProxyType(field_for_label),
+    )
+
+
+STEPS = (
+    Step(
+        number=1,
+        title='Basic Details',
+        template='students/step1_basic.html',
+        fields=('full_name', 'gender', 'date_of_birth', 'current_city', 'current_state',
+                'preferred_languages'),
+        export_fields=('full_name', 'gender', 'date_of_birth', 'current_city', 'current_state'),
+        checkbox_groups=(
+            checkbox_group('preferred_languages', [
+                ('lang_english', 'English'),
+                ('lang_hindi', 'Hindi'),
+                ('lang_tamil', 'Tamil'),
+                ('lang_telugu', 'Telugu'),
+                ('lang_kannada', 'Kannada'),
+                ('lang_bengali', 'Bengali'),
+            ], 'Please select at least one preferred language'),
+        ),
+        save_defaults={'current_city': '', 'current_state': ''},
+    ),
+    Step(
+        number=2,
+        title='Education',
+        template='students/step2_education.html',
+        fields=('current_status', 'highest_qualification', 'stream_specialization',
+                'college_name', 'university', 'graduation_year', 'academic_scores',
+                'has_backlogs', 'num_backlogs'),
+        export_fields=('current_status', 'highest_qualification', 'college_name', 'university',
+                       'graduation_year', 'academic_scores'),
+        checkbox_groups=(),
+        save_defaults={'current_status': '', 'highest_qualification': '', 'stream_specialization': '',
+                       'college_name': '', 'university': '', 'graduation_year': 2024},
+    ),
+    Step(
+        number=3,
+        title='Skills',
+        template='students/step3_skills.html',
+        fields=('english_speaking', 'english_reading', 'english_writing', 'computer_skills',
+                'tool_exposure', 'typing_speed'),
+        # typing_speed is exported after the step 4 columns, where the CSV has always had it
+        export_fields=(),
+        checkbox_groups=(
+            checkbox_group('computer_skills', [
+                ('skill_ms_office', 'MS Office'),
+                ('skill_google_sheets', 'Google Suite'),
+                ('skill_email', 'Email Communication'),
+                ('skill_internet', 'Internet Browsing & Research'),
+                ('skill_social_media', 'Social Media'),
+            ], 'Please select at least one computer skill'),
+            checkbox_group('tool_exposure', [
+                ('tool_excel', 'MS Excel / Google Sheets'),
+                ('tool_crm', 'CRM Software'),
+                ('tool_design', 'Design Tools'),
+                ('tool_video', 'Video Conferencing'),
+                ('tool_programming', 'Programming / Coding'),
+            ]),
+        ),
+        save_defaults={'english_speaking': 3, 'english_reading': 3, 'english_writing': 3},
+    ),
+    Step(
+        number=4,
+        title='Career Preferences',
+        template='students/step4_career.html',
+        fields=('preferred_job_roles', 'preferred_industries', 'work_type', 'preferred_locations',
+                'willing_to_relocate', 'expected_salary'),
+        export_fields=('preferred_job_roles', 'expected_salary', 'work_type', 'willing_to_relocate',
+                       'typing_speed'),
+        checkbox_groups=(
+            checkbox_group('preferred_job_roles', [
+                ('role_sales', 'Sales / Business Development', ('Sales',)),
+                ('role_customer_support', 'Customer Support'),
+                ('role_marketing', 'Marketing / Digital Marketing', ('Marketing',)),
+                ('role_hr', 'Human Resources', ('HR',)),
+                ('role_content', 'Content Writing', ('Content',)),
+                ('role_software_developer', 'Software Developer'),
+                ('role_data_analyst', 'Data Analyst'),
+                ('role_operations', 'Operations / Admin', ('Operations',)),
+            ], 'Please select at least one preferred job role'),
+            checkbox_group('preferred_industries', [
+                ('industry_it_software', 'IT / Software', ('IT/Software',)),
+                ('industry_ecommerce', 'E-commerce'),
+                ('industry_fintech', 'Fintech / Banking', ('Fintech',)),
+                ('industry_edtech', 'EdTech / Education', ('EdTech',)),
+                ('industry_healthcare', 'Healthcare'),
+                ('industry_consulting', 'Consulting'),
+            ]),
+        ),
+        save_defaults={'work_type': ''},
+    ),
+    Step(
+        number=5,
+        title='Availability',
+        template='students/step5_availability.html',
+        fields=('time_for_training', 'preferred_time_slots', 'has_mobile_access',
+                'has_laptop_access', 'internet_quality', 'constraints'),
+        export_fields=(),
+        checkbox_groups=(
+            checkbox_group('preferred_time_slots', [
+                ('slot_morning', 'Morning (6 AM - 12 PM)', ('Morning',)),
+                ('slot_afternoon', 'Afternoon (12 PM - 5 PM)', ('Afternoon',)),
+                ('slot_evening', 'Evening (5 PM - 9 PM)', ('Evening',)),
+                ('slot_night', 'Night (9 PM - 12 AM)', ('Night',)),
+            ], 'Please select at least one preferred time slot'),
+        ),
+    ),
+    Step(
+        number=6,
+        title='Behavioural Fit',
+        template='students/step6_behavioural.html',
+        fields=('comfort_talking_strangers', 'comfort_handling_angry_customers',
+                'comfort_working_with_data', 'comfort_following_targets', 'comfort_writing_emails',
+                'people_vs_task_oriented', 'office_vs_remote', 'analysis_vs_communication',
+                'career_concerns', 'career_goal_3_years'),
+        export_fields=(),
+        checkbox_groups=(
+            checkbox_group('career_concerns', [
+                ('concern_lack_of_experience', 'Lack of Experience', ('Lack of work experience',)),
+                ('concern_lack_of_skills', 'Lack of Skills', ('Need to develop more skills',)),
+                ('concern_low_confidence', 'Low Confidence', ('Low confidence',)),
+                ('concern_career_direction', 'Career Direction', ('Unclear about career direction',)),
+            ]),
+        ),
+        save_defaults={'people_vs_task_oriented': '', 'office_vs_remote': '', 'analysis_vs_communication': ''},
+    ),
+    Step(
+        number=7,
+        title='Training Information',
+        template='students/step7_training.html',
+        fields=('previous_training', 'discovery_source', 'commitment_confirmed', 'fee_preference'),
+        export_fields=(),
+        checkbox_groups=(),
+    ),
+    Step(
+        number=8,
+        title='Documents',
+        template='students/step8_documents.html',
+        fields=('photo', 'resume', 'id_proof', 'marksheet'),
+        export_fields=(),
+        checkbox_groups=(),
+    ),
+)
+
+# Lookups compiled from STEPS
+
+STEPS_BY_NUMBER = MappingProxyType({step.number: step for step in STEPS})
+TOTAL_STEPS = len(STEPS)
+
+# Columns owned by each registration step (sections A-H)
+PROFILE_SECTIONS = MappingProxyType({step.number: step.fields for step in STEPS})
+
+STEP_TEMPLATES = MappingProxyType({step.number: step.template for step in STEPS})
+
+SAVE_DEFAULTS = MappingProxyType({step.number: MappingProxyType(step.save_defaults) for step in STEPS})
+
+ADMIN_FIELDSETS = tuple((step.title, {'fields': step.fields}) for step in STEPS)
+
+EXPORT_FIELDS = tuple(field for step in STEPS for field in step.export_fields) + ('is_complete',)
@@ -0,0 +1,171 @@
+"""
+File layout of student uploads.
+
+Files are spread over two levels of directories named after the first four
+hex digits of a random or content key: ``student_photos/3f/a2/<key>.jpg`` for
+a key starting 3fa2. With a million students no directory holds more than a
+few dozen entries, where the flat ``student_photos/`` and ``resumes/`` held
+every file. ``ShardedPath`` names photos this way (``upload_to``).
+
+``ContentAddressedStorage`` keeps documents as
+``documents/<ab>/<cd>/<digest><extension>``, where the digest is the content's
+SHA-256, hashed while the upload is streamed to disk. The name does not depend
+on what the file was called or which field it was saved for. Saving content
+that is already stored writes nothing and returns the existing name. The
+reference counting of these shared files lives in students.documents.
+``manage.py shard_media`` moves files saved in the older layouts.
+"""
+import hashlib
+import os
+import re
+import shutil
+import uuid
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+BLOB_PREFIX = 'documents'
+# Read size while hashing a file that is already on disk
+READ_BLOCK = 64 * 1024
+
+# '<prefix>/ab/cd/abcd…': a name in the sharded layout
+SHARDED_NAME = re.compile(r'[^/]+/([0-9a-f]{2})/([0-9a-f]{2})/\1\2[^/]*')
+
+
+def shard(key):
+    """Directories of a file whose name starts with the hex ``key``: 'ab/cd/'"""
+    return f'{key[:2]}/{key[2:4]}/'
+
+
+def is_sharded(name):
+    return bool(SHARDED_NAME.fullmatch(name))
+
+
+def link_or_copy(source, target):
+    """Make ``target`` the same file as ``source``: a hard link, or a copy on another volume"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+    except OSError:
+        partial = f'{target}.{uuid.uuid4().hex}.part'
+        shutil.copy2(source, partial)
+        os.replace(partial, target)
+
+
+@deconstructible
+class ShardedPath:
+    """``upload_to`` that names each file by a random key under ``prefix/ab/cd/``"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix.strip('/')
+
+    def __call__(self, instance, filename):
+        key = uuid.uuid4().hex
+        return f'{self.prefix}/{shard(key)}{key}{os.path.splitext(filename)[1].lower()[:10]}'
+
+    def __eq__(self, other):
+        return isinstance(other, ShardedPath) and self.prefix == other.prefix
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that keeps one file per distinct content, named by its digest"""
+
+    def blob_name(self, digest, extension):
+        return f'{BLOB_PREFIX}/{shard(digest)}{digest}{extension}'
+
+    def get_available_name(self, name, max_length=None):
+        # Only the extension of the name is kept
+        return name
+
+    def _save(self, name, content):
+        from .models import DocumentBlob
+
+        # Bounded, so names fit the FileField's 100 characters
+        extension = os.path.splitext(name)[1].lower()[:10]
+        incoming = self.path(BLOB_PREFIX)
+        os.makedirs(incoming, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+
+        if hasattr(content, 'temporary_file_path'):
+            # Already on disk (large uploads, assembled chunked uploads): hash
+            # it in place and move it rather than copy it
+            source = content.temporary_file_path()
+            with open(source, 'rb') as file:
+                while block := file.read(READ_BLOCK):
+                    digest.update(block)
+                    size += len(block)
+            partial = None
+        else:
+            # Hash while writing a partial file next to the blobs; the name is
+            # only known at the end
+            partial = os.path.join(incoming, f'.{uuid.uuid4().hex}.part')
+            try:
+                with open(partial, 'xb') as file:
+                    for chunk in content.chunks():
+                        digest.update(chunk)
+                        file.write(chunk)
+                        size += len(chunk)
+            except BaseException:
+                os.unlink(partial)
+                raise
+            source = partial
+
+        name = self.blob_name(digest.hexdigest(), extension)
+        full_path = self.path(name)
+        stored = os.path.exists(full_path)
+        if stored:
+            # A temporary upload file stays with its owner, which deletes it
+            if partial:
+                os.unlink(partial)
+        else:
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            # Two uploads of the same content may race here; both write the same bytes
+            file_move_safe(source, full_path, allow_overwrite=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(full_path, self.file_permissions_mode)
+
+        # Saving it again restarts the grace period of an unreferenced blob
+        if not stored or not DocumentBlob.objects.filter(name=name).update(updated_at=timezone.now()):
+            DocumentBlob.objects.bulk_create([DocumentBlob(name=name, size=size)], ignore_conflicts=True)
+        return name
+
+    def delete(self, name):
+        """Delete a stored file, unless a profile still references it"""
+        from .models import DocumentBlob
+
+        if DocumentBlob.objects.filter(name=name, refcount__gt=0).exists():
+            return
+        DocumentBlob.objects.filter(name=name).delete()
+        super().delete(name)
+
+    def adopt(self, name):
+        """
+        Store the file at ``name``, saved in an older layout, under its content
+        name without copying it where the volume allows; returns the new name.
+        The old file is left in place.
+        """
+        from .models import DocumentBlob
+
+        stem, extension = os.path.splitext(os.path.basename(name))
+        if name.startswith(f'{BLOB_PREFIX}/') and re.fullmatch(r'[0-9a-f]{64}', stem):
+            # Named by its digest already
+            digest = stem
+            size = self.size(name)
+        else:
+            digest, size = hashlib.sha256(), 0
+            with self.open(name, 'rb') as file:
+                while block := file.read(READ_BLOCK):
+                    digest.update(block)
+                    size += len(block)
+            digest = digest.hexdigest()
+
+        new_name = self.blob_name(digest, extension.lower()[:10])
+        if not self.exists(new_name):
+            link_or_copy(self.path(name), self.path(new_name))
+        DocumentBlob.objects.bulk_create([DocumentBlob(name=new_name, size=size)], ignore_conflicts=True)
+        return new_name
@@ -0,0 +1,36 @@
+from django import template
+
+register = template.Library()
+
+
+class StepCacheNode(template.Node):
+    def __init__(self, nodelist, fragment):
+        self.nodelist = nodelist
+        self.fragment = fragment
+
+    def render(self, context):
+        fragment = self.fragment.resolve(context)
+        if not fragment:
+            return self.nodelist.render(context)
+
+        html = fragment.get()
+        if html is None:
+            html = self.nodelist.render(context)
+            fragment.set(html)
+        return html
+
+
+@register.tag
+def stepcache(parser, token):
+    """
+    {% stepcache fragment %}...{% endstepcache %}
+
+    Serve the enclosed markup from ``fragment`` (a students.render_cache.StepFragment);
+    renders it uncached when ``fragment`` is None or missing.
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag takes exactly one argument")
+    nodelist = parser.parse(('endstepcache',))
+    parser.delete_first_token()
+    return StepCacheNode(nodelist, parser.compile_filter(bits[1]))
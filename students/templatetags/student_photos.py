@@ -0,0 +1,16 @@
+from django import template
+
+from students.photos import photo_html
+
+register = template.Library()
+
+
+@register.simple_tag
+def profile_photo(profile, variant='thumb', alt='', **attrs):
+    """
+    {% profile_photo profile 'thumb' 'Photo' style="..." %}
+
+    A derivative of the profile's photo (students.photos), in WebP where the
+    browser takes it; the original until the derivatives exist.
+    """
+    return photo_html(profile, variant, alt, **attrs)
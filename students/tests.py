@@ -1,3 +1,774 @@
-from django.test import TestCase
+import fcntl
+import csv
+import hashlib
+import io
+import itertools
+import json
+import tempfile
+from datetime import timedelta
+from pathlib import Path
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib import admin
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from accounts.models import User
+from .admin import StudentProfileAdmin
+from .documents import collect_blobs, recount_blobs
+from .forms import Step4CareerForm, StepForm
+from .models import DocumentBlob, Experience, PhotoJob, StudentProfile, UploadSession
+from .photos import claim_due, photo_html, run_job, variant_name
+from .steps import ADMIN_FIELDSETS, EXPORT_FIELDS, STEPS_BY_NUMBER
+from .storage import is_sharded
+
+
+class ProfileStepQueryBudgetTests(TestCase):
+    """The per-step query budget documented above students.views.profile_step"""
+
+    def setUp(self):
+        self.user = User.objects.get_or_create_by_mobile('9000000001')
+        self.profile = StudentProfile.objects.create(user=self.user, full_name='Asha Rao')
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+    def profile_queries(self, method, step, data=None):
+        url = reverse('profile_step', kwargs={'step': step})
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(url, data)
+        # The auth lookup may co-load the core columns; it is outside the budget
+        sql = [query['sql'] for query in captured if 'FROM "users"' not in query['sql']]
+        reads = [q for q in sql if q.startswith('SELECT') and 'student_profiles' in q]
+        writes = [q for q in sql if not q.startswith('SELECT') and 'student_profiles' in q]
+        return response, reads, writes, sql
+
+    def test_get_reads_profile_once(self):
+        response, reads, writes, _ = self.profile_queries('get', 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(writes, [])
+
+    def test_get_step2_adds_one_experiences_read(self):
+        self.profile.step_completed = 1
+        self.profile.save()
+        Experience.objects.create(
+            student_profile=self.profile, company_name='Acme', role='Intern',
+            duration='6 months', description='Support desk'
+        )
+        response, reads, writes, sql = self.profile_queries('get', 2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(len([q for q in sql if 'FROM "experiences"' in q]), 1)
+        self.assertEqual(writes, [])
+
+    def test_post_is_one_read_and_one_update(self):
+        response, reads, writes, _ = self.profile_queries('post', 1, {
+            'full_name': 'Asha Rao',
+            'gender': 'female',
+            'date_of_birth': '2000-01-15',
+            'current_city': 'Pune',
+            'current_state': 'Maharashtra',
+            'lang_english': 'on',
+        })
+        self.assertRedirects(response, reverse('profile_step', kwargs={'step': 2}), fetch_redirect_response=False)
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('UPDATE'))
+        # Only step 1's section and the progress columns are written
+        self.assertIn('"preferred_languages"', writes[0])
+        self.assertNotIn('"career_goal_3_years"', writes[0])
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.step_completed, 1)
+        self.assertEqual(self.profile.preferred_languages, ['English'])
+
+    def test_final_step_sets_completion_in_the_same_update(self):
+        self.profile.step_completed = 7
+        self.profile.save()
+        response, reads, writes, _ = self.profile_queries('post', 8, {})
+        self.assertRedirects(response, reverse('profile_complete'), fetch_redirect_response=False)
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(len(writes), 1)
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.step_completed, 8)
+        self.assertTrue(self.profile.is_complete)
+        self.assertIsNotNone(self.profile.submitted_at)
+
+    def test_invalid_post_does_not_write(self):
+        response, reads, writes, _ = self.profile_queries('post', 1, {'full_name': 'A'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(reads), 1)
+        self.assertEqual(writes, [])
+
+
+class ProfileStepRenderCacheTests(TestCase):
+    """students.render_cache: per-profile cached step forms"""
+
+    def setUp(self):
+        self.user = User.objects.get_or_create_by_mobile('9000000002')
+        self.profile = StudentProfile.objects.create(user=self.user, full_name='Asha Rao', step_completed=1)
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.url = reverse('profile_step', kwargs={'step': 2})
+
+    def experience_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        return response, [query for query in captured if 'FROM "experiences"' in query['sql']]
+
+    def test_repeat_get_serves_cached_form(self):
+        self.client.get(self.url)
+        response, queries = self.experience_queries()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(queries, [])
+
+    def test_saving_an_experience_invalidates(self):
+        self.client.get(self.url)
+        Experience.objects.create(
+            student_profile=self.profile, company_name='Acme', role='Intern',
+            duration='6 months', description='Support desk'
+        )
+        response, queries = self.experience_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'Acme')
+
+
+class ProfileAutosaveTests(TestCase):
+    """students.views.profile_autosave"""
+
+    def setUp(self):
+        self.user = User.objects.get_or_create_by_mobile('9000000003')
+        self.profile = StudentProfile.objects.create(
+            user=self.user, full_name='Asha Rao', preferred_languages=['English', 'Tamil']
+        )
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+    def autosave(self, changes, version=None, step=1):
+        version = version or self.profile.updated_at
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.patch(
+                reverse('profile_autosave', kwargs={'step': step}),
+                json.dumps({'version': version.isoformat(), 'changes': changes}),
+                content_type='application/json',
+            )
+        writes = [
+            query['sql'] for query in captured
+            if not query['sql'].startswith('SELECT') and 'student_profiles' in query['sql']
+        ]
+        return response, writes
+
+    def test_writes_only_the_changed_columns(self):
+        response, writes = self.autosave({'current_city': 'Pune', 'lang_tamil': False, 'lang_hindi': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['errors'], {})
+        self.assertEqual(len(writes), 1)
+        self.assertIn('"current_city"', writes[0])
+        self.assertNotIn('"full_name"', writes[0])
+
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.current_city, 'Pune')
+        self.assertEqual(self.profile.preferred_languages, ['English', 'Hindi'])
+        self.assertEqual(response.json()['version'], self.profile.updated_at.isoformat())
+
+    def test_invalid_field_is_reported_and_not_written(self):
+        response, writes = self.autosave({'full_name': 'A', 'current_city': 'Pune'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('full_name', response.json()['errors'])
+        self.assertEqual(len(writes), 1)
+        self.assertNotIn('"full_name"', writes[0])
+
+    def test_invalid_experiences_are_reported_per_entry_and_not_synced(self):
+        self.profile.step_completed = 1
+        self.profile.save()
+        response, writes = self.autosave({'experiences': [
+            {'company_name': 'Acme', 'role': 'Intern', 'duration': '6 months', 'description': 'Support desk'},
+            {'id': [1], 'company_name': None, 'role': 'R' * 300, 'duration': '1 year', 'description': 'Sales'},
+        ]}, step=2)
+        self.assertEqual(response.status_code, 200)
+        first, second = response.json()['errors']['experiences']
+        self.assertEqual(first, {})
+        self.assertEqual(set(second), {'id', 'company_name', 'role'})
+        self.assertEqual(writes, [])
+        self.assertFalse(self.profile.experiences.exists())
+
+    def test_stale_version_is_rejected(self):
+        stale = self.profile.updated_at
+        self.profile.save()
+        response, writes = self.autosave({'current_city': 'Pune'}, version=stale)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(writes, [])
+
+
+class ExperienceSyncTests(TestCase):
+    """Experience.sync_for_profile"""
+
+    def setUp(self):
+        user = User.objects.get_or_create_by_mobile('9000000004')
+        self.profile = StudentProfile.objects.create(user=user, full_name='Asha Rao')
+        self.rows = [
+            Experience.objects.create(
+                student_profile=self.profile, company_name=f'Company {i}', role='Intern',
+                duration='6 months', description='Support desk'
+            )
+            for i in range(3)
+        ]
+
+    def entries(self):
+        return [
+            {field: getattr(row, field) for field in ('id', *Experience.SYNC_FIELDS)}
+            for row in self.rows
+        ]
+
+    def test_unchanged_list_only_reads(self):
+        result = Experience.sync_for_profile(self.profile, self.entries())
+        self.assertEqual(result, (0, 0, 0, 1))
+
+    def test_entries_without_ids_keep_identical_rows(self):
+        entries = [{field: entry[field] for field in Experience.SYNC_FIELDS} for entry in self.entries()]
+        result = Experience.sync_for_profile(self.profile, entries)
+        self.assertEqual(result.statements, 1)
+        self.assertEqual(
+            set(self.profile.experiences.values_list('pk', flat=True)), {row.pk for row in self.rows}
+        )
+
+    def test_writes_only_the_differences(self):
+        entries = self.entries()
+        entries[0]['role'] = 'Analyst'
+        del entries[1]
+        entries.append({'company_name': 'Acme', 'role': 'Trainee', 'duration': '1 year', 'description': ''})
+
+        result = Experience.sync_for_profile(self.profile, entries)
+        self.assertEqual((result.created, result.updated, result.deleted), (1, 1, 1))
+        self.assertEqual(
+            sorted(self.profile.experiences.values_list('company_name', 'role')),
+            [('Acme', 'Trainee'), ('Company 0', 'Analyst'), ('Company 2', 'Intern')],
+        )
+
+
+class SectionDataTests(TestCase):
+    """StudentProfile.apply_section_data, behind the AJAX step save"""
+
+    def setUp(self):
+        user = User.objects.get_or_create_by_mobile('9000000016')
+        self.profile = StudentProfile.objects.create(user=user, full_name='Asha Rao')
+
+    def test_missing_keys_take_the_save_defaults(self):
+        self.profile.apply_section_data(2, {'college_name': 'City College'})
+        self.profile.apply_section_data(3, {'typing_speed': '40'})
+        self.assertEqual(self.profile.college_name, 'City College')
+        self.assertEqual(self.profile.university, '')
+        self.assertEqual(self.profile.graduation_year, 2024)
+        self.assertEqual(self.profile.num_backlogs, 0)
+        self.assertEqual(self.profile.typing_speed, 40)
+        self.assertEqual(
+            (self.profile.english_speaking, self.profile.english_reading, self.profile.english_writing),
+            (3, 3, 3),
+        )
+
+
+
+class StepSchemaTests(TestCase):
+    """students.steps and the tables compiled from it"""
+
+    def test_step_forms_edit_the_step_columns(self):
+        for step_form in StepForm.__subclasses__():
+            for form_class in step_form.__subclasses__():
+                with self.subTest(form_class.__name__):
+                    self.assertEqual(form_class._meta.model, StudentProfile)
+                    self.assertEqual(tuple(form_class._meta.fields), STEPS_BY_NUMBER[form_class.step.number].fields)
+
+    def test_checkboxes_round_trip_through_the_label_list(self):
+        user = User.objects.get_or_create_by_mobile('9000000017')
+        profile = StudentProfile.objects.create(user=user, full_name='Asha Rao')
+        data = {
+            'role_sales': 'on', 'role_hr': 'on', 'industry_fintech': 'on',
+            'work_type': 'remote', 'expected_salary': '3-5 LPA', 'willing_to_relocate': 'True',
+            'preferred_locations': 'Pune, Mumbai',
+        }
+        form = Step4CareerForm(data, instance=profile)
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
+
+        profile.refresh_from_db()
+        self.assertEqual(profile.preferred_job_roles, ['Sales / Business Development', 'Human Resources'])
+        self.assertEqual(profile.preferred_industries, ['Fintech / Banking'])
+        initial = Step4CareerForm(instance=profile).initial
+        self.assertEqual(
+            {name for name in ('role_sales', 'role_hr', 'role_marketing', 'industry_fintech') if initial.get(name)},
+            {'role_sales', 'role_hr', 'industry_fintech'},
+        )
+
+        # Labels stored before the schema still tick their box
+        profile.preferred_job_roles = ['Sales', 'Marketing']
+        initial = Step4CareerForm(instance=profile).initial
+        self.assertTrue(initial.get('role_sales') and initial.get('role_marketing'))
+
+    def test_a_required_group_needs_one_box(self):
+        form = Step4CareerForm({'work_type': 'remote', 'expected_salary': '3-5 LPA', 'willing_to_relocate': 'True'})
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.non_field_errors(), ['Please select at least one preferred job role'])
+
+    def test_admin_fieldsets_follow_the_steps(self):
+        self.assertEqual(ADMIN_FIELDSETS, (
+            ('Basic Details', {'fields': (
+                'full_name', 'gender', 'date_of_birth', 'current_city', 'current_state', 'preferred_languages',
+            )}),
+            ('Education', {'fields': (
+                'current_status', 'highest_qualification', 'stream_specialization', 'college_name',
+                'university', 'graduation_year', 'academic_scores', 'has_backlogs', 'num_backlogs',
+            )}),
+            ('Skills', {'fields': (
+                'english_speaking', 'english_reading', 'english_writing', 'computer_skills', 'tool_exposure',
+                'typing_speed',
+            )}),
+            ('Career Preferences', {'fields': (
+                'preferred_job_roles', 'preferred_industries', 'work_type', 'preferred_locations',
+                'willing_to_relocate', 'expected_salary',
+            )}),
+            ('Availability', {'fields': (
+                'time_for_training', 'preferred_time_slots', 'has_mobile_access', 'has_laptop_access',
+                'internet_quality', 'constraints',
+            )}),
+            ('Behavioural Fit', {'fields': (
+                'comfort_talking_strangers', 'comfort_handling_angry_customers', 'comfort_working_with_data',
+                'comfort_following_targets', 'comfort_writing_emails', 'people_vs_task_oriented',
+                'office_vs_remote', 'analysis_vs_communication', 'career_concerns', 'career_goal_3_years',
+            )}),
+            ('Training Information', {'fields': (
+                'previous_training', 'discovery_source', 'commitment_confirmed', 'fee_preference',
+            )}),
+            ('Documents', {'fields': ('photo', 'resume', 'id_proof', 'marksheet')}),
+        ))
+
+    def test_export_keeps_its_column_order(self):
+        self.assertEqual(EXPORT_FIELDS, (
+            'full_name', 'gender', 'date_of_birth', 'current_city', 'current_state',
+            'current_status', 'highest_qualification', 'college_name', 'university',
+            'graduation_year', 'academic_scores', 'preferred_job_roles', 'expected_salary',
+            'work_type', 'willing_to_relocate', 'typing_speed', 'is_complete',
+        ))
+
+        user = User.objects.get_or_create_by_mobile('9000000018')
+        StudentProfile.objects.create(
+            user=user, full_name='Asha Rao', preferred_job_roles=['Customer Support', 'Data Analyst'],
+        )
+        model_admin = StudentProfileAdmin(StudentProfile, admin.site)
+        response = model_admin.export_as_csv(RequestFactory().get('/'), StudentProfile.objects.all())
+        header, row = csv.reader(io.StringIO(response.content.decode()))
+        self.assertEqual(header, ['Email', 'Mobile', *EXPORT_FIELDS])
+        self.assertEqual(row[1], '9000000018')
+        self.assertEqual(row[2 + EXPORT_FIELDS.index('preferred_job_roles')], 'Customer Support, Data Analyst')
+
+
+class ProfileSyncTests(TestCase):
+    """students.views.profile_sync"""
+
+    def setUp(self):
+        self.user = User.objects.get_or_create_by_mobile('9000000005')
+        self.profile = StudentProfile.objects.create(user=self.user, full_name='Asha Rao')
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+    def sync(self, steps):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.post(
+                reverse('profile_sync'), json.dumps({'steps': steps}), content_type='application/json'
+            )
+        writes = [
+            query['sql'] for query in captured
+            if not query['sql'].startswith('SELECT') and 'student_profiles' in query['sql']
+        ]
+        return response, writes
+
+    def test_valid_steps_are_written_in_one_update(self):
+        response, writes = self.sync({
+            '1': {
+                'full_name': 'Asha Rao', 'gender': 'female', 'date_of_birth': '2000-01-15',
+                'current_city': 'Pune', 'current_state': 'Maharashtra', 'lang_english': True,
+            },
+            '2': {
+                'current_status': 'graduate', 'highest_qualification': 'graduate',
+                'stream_specialization': 'Commerce', 'college_name': 'City College',
+                'university': 'Pune University', 'graduation_year': 2022,
+                'academic_scores': '72%', 'has_backlogs': False, 'num_backlogs': 0,
+            },
+            '3': {'english_speaking': 4},
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['saved'], [1, 2])
+        self.assertEqual(list(body['errors']), ['3'])
+        self.assertEqual(body['step_completed'], 2)
+        self.assertEqual(len(writes), 1)
+
+        self.profile.refresh_from_db()
+        self.assertEqual((self.profile.current_city, self.profile.college_name), ('Pune', 'City College'))
+
+    def test_invalid_experiences_fail_their_step(self):
+        self.profile.step_completed = 1
+        self.profile.save()
+        response, writes = self.sync({'2': {
+            'current_status': 'graduate', 'highest_qualification': 'graduate',
+            'stream_specialization': 'Commerce', 'college_name': 'City College',
+            'university': 'Pune University', 'graduation_year': 2022,
+            'academic_scores': '72%', 'has_backlogs': False, 'num_backlogs': 0,
+            'experiences': [{'company_name': 'Acme', 'role': None, 'duration': '6 months', 'description': ''}],
+        }})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['saved'], [])
+        self.assertEqual(
+            response.json()['errors']['2']['experiences'],
+            [{'role': ['This field is required.'], 'description': ['This field is required.']}],
+        )
+        self.assertEqual(writes, [])
+        self.assertFalse(self.profile.experiences.exists())
+
+    def test_steps_cannot_be_skipped(self):
+        response, writes = self.sync({'3': {'english_speaking': 4}})
+        self.assertEqual(response.json()['saved'], [])
+        self.assertIn('3', response.json()['errors'])
+        self.assertEqual(writes, [])
+
+
+class ProfileStepFragmentTests(TestCase):
+    """Step transitions in place (X-Step-Fragment)"""
+
+    def setUp(self):
+        self.user = User.objects.get_or_create_by_mobile('9000000006')
+        StudentProfile.objects.create(user=self.user, full_name='Asha Rao')
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+    def test_saved_step_answers_with_the_next_step(self):
+        response = self.client.post(reverse('profile_step', kwargs={'step': 1}), {
+            'full_name': 'Asha Rao',
+            'gender': 'female',
+            'date_of_birth': '2000-01-15',
+            'current_city': 'Pune',
+            'current_state': 'Maharashtra',
+            'lang_english': 'on',
+        }, headers={'X-Step-Fragment': '1'})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['step'], body['step_completed']), (2, 1))
+        self.assertEqual(body['url'], reverse('profile_step', kwargs={'step': 2}))
+        self.assertIn('id="step-page"', body['html'])
+        self.assertNotIn('<html', body['html'])
+
+    def test_without_the_header_pages_render_in_full(self):
+        response = self.client.post(reverse('profile_step', kwargs={'step': 1}), {'full_name': 'A'})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<html')
+
+
+class ProfileSnapshotTests(TestCase):
+    """students.snapshots: review page served from the cached profile snapshot"""
+
+    def setUp(self):
+        self.user = User.objects.get_or_create_by_mobile('9000000007')
+        self.profile = StudentProfile.objects.create(user=self.user, full_name='Asha Rao', step_completed=7)
+        Experience.objects.create(
+            student_profile=self.profile, company_name='Acme', role='Intern',
+            duration='6 months', description='Support desk'
+        )
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.url = reverse('profile_review')
+
+    def experience_queries(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.url)
+        return response, [query for query in captured if 'FROM "experiences"' in query['sql']]
+
+    def test_repeat_review_reads_the_snapshot(self):
+        self.client.get(self.url)
+        response, queries = self.experience_queries()
+        self.assertEqual(queries, [])
+        self.assertEqual([e.company_name for e in response.context['experiences']], ['Acme'])
+
+    def test_experience_sync_invalidates(self):
+        self.client.get(self.url)
+        Experience.sync_for_profile(self.profile, [
+            {'company_name': 'Globex', 'role': 'Analyst', 'duration': '1 year', 'description': 'Reports'},
+        ])
+        response, queries = self.experience_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([e.company_name for e in response.context['experiences']], ['Globex'])
+
+
+class MediaTestCase(TestCase):
+    """Base for the upload and media tests: MEDIA_ROOT and UPLOAD_STAGING_DIR in a temporary directory"""
+
+    # Further settings overridden for every test of the class
+    media_settings = {}
+    # Fields of the student profile created for each test
+    profile_fields = {}
+    mobiles = itertools.count(1)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.media = Path(directory.name) / 'media'
+        overrides = override_settings(
+            MEDIA_ROOT=str(self.media), UPLOAD_STAGING_DIR=f'{directory.name}/staging', **self.media_settings
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.user, self.profile = self.create_student(**self.profile_fields)
+
+    def create_student(self, full_name='Asha Rao', **fields):
+        """A new user and their student profile"""
+        user = User.objects.get_or_create_by_mobile(f'91000{next(self.mobiles):05d}')
+        return user, StudentProfile.objects.create(user=user, full_name=full_name, **fields)
+
+
+class ResumableUploadTests(MediaTestCase):
+    """students.uploads: chunked document uploads"""
+
+    media_settings = {'UPLOAD_CHUNK_SIZE': 4}
+    profile_fields = {'step_completed': 7}
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+    def open_session(self, size, field='resume'):
+        response = self.client.post(reverse('upload_session_create'), {
+            'field': field, 'filename': 'cv.pdf', 'content_type': 'application/pdf', 'size': size,
+        }, content_type='application/json')
+        return response
+
+    def put(self, url, offset, chunk, checksum=None):
+        return self.client.put(url, chunk, content_type='application/octet-stream', headers={
+            'Upload-Offset': str(offset), 'Upload-Checksum': checksum or hashlib.sha256(chunk).hexdigest(),
+        })
+
+    def test_chunks_resume_and_attach(self):
+        content = b'%PDF-1.4 resume'
+        session = self.open_session(len(content)).json()
+        self.assertEqual(self.put(session['url'], 0, content[:4]).json()['offset'], 4)
+
+        # A chunk the server already has (its response was lost) is refused with the offset
+        response = self.put(session['url'], 0, content[:4])
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 4))
+        self.assertEqual(self.client.head(session['url'])['Upload-Offset'], '4')
+
+        for offset in range(4, len(content), 4):
+            response = self.put(session['url'], offset, content[offset:offset + 4])
+        self.assertTrue(response.json()['complete'])
+
+        self.profile.refresh_from_db()
+        with self.profile.resume.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(list(Path(settings.UPLOAD_STAGING_DIR).iterdir()), [])
+
+    def test_damaged_chunk_is_cut_off(self):
+        session = self.open_session(8).json()
+        response = self.put(session['url'], 0, b'abcd', checksum='0' * 64)
+        self.assertEqual((response.status_code, response.json()['offset']), (400, 0))
+        self.assertEqual(UploadSession.objects.get().staging_path.stat().st_size, 0)
+        self.assertEqual(self.put(session['url'], 0, b'abcd').json()['offset'], 4)
+
+    def test_chunk_in_flight_blocks_a_concurrent_one(self):
+        session = self.open_session(8).json()
+        self.put(session['url'], 0, b'abcd')
+        staging = UploadSession.objects.get().staging_path
+        with open(staging, 'r+b') as in_flight:
+            fcntl.flock(in_flight, fcntl.LOCK_EX)
+            response = self.put(session['url'], 4, b'efgx', checksum='0' * 64)
+        # Refused before writing, so the bytes of the chunk in flight are kept
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 4))
+        self.assertEqual(staging.read_bytes(), b'abcd')
+        self.assertEqual(self.put(session['url'], 4, b'efgh').json()['offset'], 8)
+
+    def test_oversized_file_is_refused_up_front(self):
+        response = self.open_session(11 * 1024 * 1024)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('size', response.json()['errors'])
+
+
+class PhotoDerivativeTests(MediaTestCase):
+    """students.photos: thumbnails and WebP variants made by the photo worker"""
+
+    def upload_photo(self, size=(800, 600)):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees to display
+        exif[0x010F] = 'PhoneMaker'
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'teal').save(buffer, 'JPEG', exif=exif)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.profile.photo.save('camera.jpg', ContentFile(buffer.getvalue()), save=False)
+            self.profile.save_section(8)
+
+    def test_new_photo_is_queued_and_processed(self):
+        self.upload_photo()
+        self.assertEqual([run_job(job) for job in claim_due(10)], ['done'])
+
+        self.profile.refresh_from_db()
+        variants = self.profile.photo_variants
+        self.assertEqual(variants['source'], self.profile.photo.name)
+        with self.profile.photo.storage.open(variants['medium.webp']) as file, Image.open(file) as medium:
+            # Turned upright: the 800x600 landscape is stored as portrait
+            self.assertEqual((medium.format, medium.size), ('WEBP', (240, 320)))
+            self.assertNotIn(0x010F, medium.getexif())
+        with self.profile.photo.storage.open(variants['thumb.jpeg']) as file, Image.open(file) as thumb:
+            self.assertEqual(thumb.size, (96, 96))
+            self.assertEqual(dict(thumb.getexif()), {})
+        self.assertIn('.thumb.webp" type="image/webp"', photo_html(self.profile, 'thumb'))
+
+    def test_photo_over_the_pixel_budget_is_refused(self):
+        self.upload_photo()
+        with override_settings(PHOTO_MAX_PIXELS=1000):
+            self.assertEqual([run_job(job) for job in claim_due(10)], ['failed'])
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.photo_variants, {})
+        self.assertIn('pixel budget', PhotoJob.objects.get().last_error)
+        # The original is still shown
+        self.assertIn(self.profile.photo.url, photo_html(self.profile, 'thumb'))
+
+    def test_replacing_the_photo_drops_old_variants(self):
+        self.upload_photo()
+        run_job(claim_due(10)[0])
+        self.profile.refresh_from_db()
+        self.upload_photo()
+        self.assertEqual(self.profile.photo_variants, {})
+        self.assertEqual(PhotoJob.objects.filter(status='pending').count(), 1)
+
+
+class DocumentStorageTests(MediaTestCase):
+    """students.documents: each distinct document stored once, with reference counts"""
+
+    def setUp(self):
+        super().setUp()
+        _, self.other = self.create_student('Ravi Kumar')
+
+    def upload(self, profile, field, content, filename='scan.pdf'):
+        getattr(profile, field).save(filename, ContentFile(content), save=False)
+        profile.save_section(8)
+        return getattr(profile, field).name
+
+    def test_same_content_is_stored_once(self):
+        name = self.upload(self.profile, 'resume', b'%PDF-1.4 resume', 'cv.pdf')
+        self.assertEqual(self.upload(self.other, 'marksheet', b'%PDF-1.4 resume', 'marks.pdf'), name)
+        self.assertTrue(name.startswith('documents/'))
+        self.assertEqual(DocumentBlob.objects.get().refcount, 2)
+
+        # Sent again with the rest of step 8: no new file, no new reference
+        self.upload(self.profile, 'resume', b'%PDF-1.4 resume')
+        self.assertEqual(DocumentBlob.objects.get().refcount, 2)
+        self.assertEqual(len([path for path in self.media.rglob('*') if path.is_file()]), 1)
+
+    def test_replaced_document_is_collected_after_the_grace_period(self):
+        old = self.upload(self.profile, 'resume', b'version 1')
+        new = self.upload(self.profile, 'resume', b'version 2')
+        self.assertEqual(dict(DocumentBlob.objects.values_list('name', 'refcount')), {old: 0, new: 1})
+
+        self.assertEqual(collect_blobs(timezone.now() - timedelta(hours=1)), (0, 0))
+        self.assertEqual(collect_blobs(timezone.now() + timedelta(seconds=1)), (1, 9))
+        storage = self.profile.resume.storage
+        self.assertFalse(storage.exists(old))
+        self.assertTrue(storage.exists(new))
+
+    def test_deleting_a_profile_releases_its_documents(self):
+        name = self.upload(self.profile, 'id_proof', b'id card')
+        self.upload(self.other, 'id_proof', b'id card')
+        self.profile.user.delete()
+        self.assertEqual(DocumentBlob.objects.get(name=name).refcount, 1)
+        self.assertEqual(recount_blobs(), 0)
+
+
+class ShardedMediaTests(MediaTestCase):
+    """students.storage: two-level directory layout, and manage.py shard_media"""
+
+    def test_uploads_are_sharded(self):
+        self.profile.photo.save('Camera.JPG', ContentFile(b'photo'), save=False)
+        self.profile.resume.save('cv.pdf', ContentFile(b'resume'), save=False)
+        self.assertTrue(is_sharded(self.profile.photo.name))
+        self.assertTrue(self.profile.photo.name.endswith('.jpg'))
+        self.assertTrue(is_sharded(self.profile.resume.name))
+
+    def test_flat_files_are_moved_and_rows_switched(self):
+        for name, content in [('student_photos/asha.jpg', b'photo'), ('student_photos/asha.thumb.webp', b'thumb'),
+                              ('resumes/asha_cv.pdf', b'resume')]:
+            (self.media / name).parent.mkdir(parents=True, exist_ok=True)
+            (self.media / name).write_bytes(content)
+        StudentProfile.objects.filter(pk=self.profile.pk).update(
+            photo='student_photos/asha.jpg', resume='resumes/asha_cv.pdf',
+            photo_variants={'source': 'student_photos/asha.jpg', 'thumb.webp': 'student_photos/asha.thumb.webp'},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('shard_media', grace=0, stdout=io.StringIO())
+        self.profile.refresh_from_db()
+        photo, resume, variants = self.profile.photo.name, self.profile.resume.name, self.profile.photo_variants
+        self.assertTrue(is_sharded(photo) and is_sharded(resume))
+        self.assertEqual(variants['source'], photo)
+        self.assertEqual((self.media / variants['thumb.webp']).read_bytes(), b'thumb')
+        self.assertEqual((self.media / resume).read_bytes(), b'resume')
+        self.assertEqual(DocumentBlob.objects.get(name=resume).refcount, 1)
+        self.assertFalse((self.media / 'student_photos/asha.jpg').exists())
+        self.assertFalse((self.media / 'resumes/asha_cv.pdf').exists())
+        # Derivatives that moved with the photo are not made again
+        self.assertFalse(PhotoJob.objects.exists())
+
+        output = io.StringIO()
+        call_command('shard_media', grace=0, stdout=output)
+        self.assertIn('Moved 0 files', output.getvalue())
+
+
+class MediaDeliveryTests(MediaTestCase):
+    """students.media: uploaded files only reach their student and staff"""
+
+    media_settings = {'MEDIA_ACCEL': ''}
+
+    def setUp(self):
+        super().setUp()
+        self.profile.id_proof.save('aadhaar.pdf', ContentFile(b'0123456789'), save=False)
+        self.profile.save_section(8)
+        self.url = self.profile.id_proof.url
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+
+    def test_owner_gets_the_file_and_byte_ranges(self):
+        response = self.client.get(self.url)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertIn('private', response['Cache-Control'])
+
+        response = self.client.get(self.url, headers={'Range': 'bytes=2-5'})
+        self.assertEqual((response.status_code, response['Content-Range']), (206, 'bytes 2-5/10'))
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        response = self.client.get(self.url, headers={'Range': 'bytes=-3'})
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+        response = self.client.get(self.url, headers={'Range': 'bytes=10-'})
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */10'))
+
+    def test_owner_gets_photo_derivatives(self):
+        self.profile.photo.save('camera.jpg', ContentFile(b'photo'), save=False)
+        self.profile.save_section(8)
+        thumb = variant_name(self.profile.photo.name, 'thumb', 'webp')
+        self.profile.photo.storage.save(thumb, ContentFile(b'thumb'))
+        response = self.client.get(self.profile.photo.storage.url(thumb))
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'image/webp'))
+
+    def test_other_students_and_visitors_get_404(self):
+        other, _ = self.create_student('Ravi Kumar')
+        self.client.force_login(other, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_staff_downloads_are_handed_to_the_proxy(self):
+        staff, _ = self.create_student('Staff')
+        staff.is_staff = True
+        staff.save()
+        self.client.force_login(staff, backend='django.contrib.auth.backends.ModelBackend')
+        with override_settings(MEDIA_ACCEL='nginx'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.profile.id_proof.name}')
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        # Staff may fetch any stored file, but nothing outside MEDIA_ROOT
+        self.assertEqual(self.client.get('/media/documents/..%2F..%2Fmanage.py').status_code, 404)
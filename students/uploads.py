@@ -0,0 +1,123 @@
+"""
+Resumable chunked document uploads.
+
+A client opens an UploadSession for one document field, declaring the file's
+name, type and size, then PUTs the bytes in order in chunks of at most
+``UPLOAD_CHUNK_SIZE``. Each chunk carries its offset (``Upload-Offset``) and
+the hex SHA-256 of its bytes (``Upload-Checksum``). The body is streamed from
+the request into a staging file under ``UPLOAD_STAGING_DIR`` in small blocks,
+so a worker never holds a whole chunk, let alone the file, in memory. A chunk
+that is short or fails its checksum is cut off again. A chunk at any offset
+other than the session's is refused with the current offset, which is also
+what a HEAD returns, so a client that lost its connection resumes from there.
+A chunk claims the session with a lock on its staging file before it writes;
+a concurrent chunk is refused the same way instead of writing alongside it.
+
+Once the last chunk is in, the staging file is handed to the storage as a
+temporary file: FileSystemStorage moves it into MEDIA_ROOT instead of copying,
+other storages stream it. Sessions left unfinished are removed by
+``manage.py purge_upload_sessions``.
+"""
+import fcntl
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+from PIL import Image
+
+from .models import UploadSession
+
+# Read size from the request body and the staging file
+READ_BLOCK = 64 * 1024
+
+
+class UploadConflict(Exception):
+    """The chunk's offset is not the session's (already received, or a gap)"""
+
+
+class ChunkRejected(Exception):
+    """The chunk or the assembled file was refused"""
+
+
+class StagedFile(File):
+    """An assembled staging file, which storages may move into place"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def open_upload(profile, field, filename, content_type, size):
+    """Create an UploadSession and its empty staging file"""
+    session = UploadSession.objects.create(
+        student_profile=profile, field=field, filename=filename, content_type=content_type, size=size
+    )
+    os.makedirs(settings.UPLOAD_STAGING_DIR, exist_ok=True)
+    session.staging_path.touch()
+    return session
+
+
+def write_chunk(session, offset, length, checksum, stream):
+    """Append ``length`` bytes of ``stream`` at ``offset`` and advance the session"""
+    if length < 1:
+        raise ChunkRejected('Chunk is empty.')
+    if length > settings.UPLOAD_CHUNK_SIZE or offset + length > session.size:
+        raise ChunkRejected('Chunk is larger than allowed.')
+
+    digest = hashlib.sha256()
+    with open(session.staging_path, 'r+b') as staging:
+        # Claim the session before writing, so a failed chunk only ever cuts
+        # off its own bytes; the lock goes with the file
+        try:
+            fcntl.flock(staging, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict from None
+        # The chunk that held the lock may have moved the offset
+        session.refresh_from_db(fields=['offset'])
+        if offset != session.offset:
+            raise UploadConflict
+
+        staging.seek(offset)
+        remaining = length
+        try:
+            while remaining:
+                block = stream.read(min(READ_BLOCK, remaining))
+                if not block:
+                    raise ChunkRejected('Chunk was incomplete.')
+                digest.update(block)
+                staging.write(block)
+                remaining -= len(block)
+            if digest.hexdigest() != checksum.lower():
+                raise ChunkRejected('Chunk checksum does not match.')
+        except Exception:
+            # Nothing past the offset counts until a chunk is whole (this also
+            # covers a connection dropped mid-chunk)
+            staging.truncate(offset)
+            raise
+
+        UploadSession.objects.filter(pk=session.pk).update(offset=offset + length, updated_at=timezone.now())
+    session.offset = offset + length
+
+
+def complete_upload(session, profile):
+    """Attach the assembled file to the profile's document field and close the session"""
+    path = session.staging_path
+    if session.field == 'photo':
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except Exception:
+            discard_upload(session)
+            raise ChunkRejected('Upload a valid image.')
+
+    with open(path, 'rb') as staging:
+        getattr(profile, session.field).save(session.filename, StagedFile(staging), save=False)
+    profile.save(update_fields=[session.field, 'updated_at'])
+    discard_upload(session)
+
+
+def discard_upload(session):
+    """Delete the session and whatever is left of its staging file"""
+    session.staging_path.unlink(missing_ok=True)
+    session.delete()
@@ -1,15 +1,25 @@
+from django.conf import settings
 from django.urls import path
 from .views import (
     profile_start, profile_step, profile_review,
-    profile_submit, dashboard, upload_documents, profile_complete
+    profile_submit, dashboard, upload_documents, profile_complete, profile_autosave,
+    profile_sync, upload_session_create, upload_session,
+    async_profile_step, async_profile_review
 )
 
+if settings.ASYNC_VIEWS:
+    profile_step, profile_review = async_profile_step, async_profile_review
+
 urlpatterns = [
     path('start/', profile_start, name='profile_start'),
     path('step/<int:step>/', profile_step, name='profile_step'),
+    path('step/<int:step>/autosave/', profile_autosave, name='profile_autosave'),
+    path('sync/', profile_sync, name='profile_sync'),
     path('review/', profile_review, name='profile_review'),
     path('submit/', profile_submit, name='profile_submit'),
     path('upload-documents/', upload_documents, name='upload_documents'),
+    path('uploads/', upload_session_create, name='upload_session_create'),
+    path('uploads/<uuid:session_id>/', upload_session, name='upload_session'),
     path('step/<int:step>/', profile_step, name='profile_step'),
     path('complete/', profile_complete, name='profile_complete'),
 ]
@@ -1,114 +1,220 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.shortcuts import get_object_or_404, render, redirect
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.decorators.http import require_http_methods
+from django.db import transaction
 from django.utils import timezone
-from .models import StudentProfile, Experience
+from django.utils.dateparse import parse_datetime
+from accounts.models import User
+from .models import PROGRESS_FIELDS, StudentProfile, Experience, UploadSession
 import json
-from .forms import (
-    Step1BasicInfoForm, Step2EducationForm, Step3SkillsForm,
-    Step4CareerForm, Step5AvailabilityForm, Step6BehaviouralForm,
-    Step7TrainingForm, Step8DocumentsForm
+from .forms import STEP_FORMS, DocumentUploadForm, clean_experiences
+from .media import can_access, media_response
+from .render_cache import invalidate_profile_steps, step_fragment
+from .snapshots import get_snapshot
+from .steps import STEP_TEMPLATES, TOTAL_STEPS
+from .storage import BLOB_PREFIX
+from .uploads import (
+    ChunkRejected, UploadConflict, complete_upload, discard_upload, open_upload, write_chunk,
 )
 
 from django.contrib import messages
 
+
+def get_profile(user, *steps):
+    """The user's profile with its core columns and the columns of ``steps``; raises StudentProfile.DoesNotExist"""
+    if User.profile.is_cached(user):
+        # Core columns were co-loaded with request.user; raises if there is no profile
+        profile = user.profile
+        profile.load_sections(*steps)
+        return profile
+    return StudentProfile.objects.with_sections(*steps).get(user=user)
+
+
+def get_user_profile(request, *steps):
+    """get_profile() for the request's user, or 404"""
+    try:
+        return get_profile(request.user, *steps)
+    except StudentProfile.DoesNotExist:
+        raise Http404('No StudentProfile matches the given query.')
+
+
+async def aget_profile(user, *steps):
+    """Async get_profile()"""
+    if User.profile.is_cached(user):
+        profile = user.profile
+        await profile.aload_sections(*steps)
+        return profile
+    return await StudentProfile.objects.with_sections(*steps).aget(user=user)
+
+
+async def aget_user_profile(request, *steps):
+    """Async get_user_profile()"""
+    try:
+        return await aget_profile(await request.auser(), *steps)
+    except StudentProfile.DoesNotExist:
+        raise Http404('No StudentProfile matches the given query.')
+
+
+# Extended by step_base.html instead of base.html for fragment responses
+STEP_FRAGMENT_TEMPLATE = 'students/step_fragment.html'
+
+
+def save_step(request, profile, step):
+    """Validate and save a step POST; returns (form, redirect) with redirect None on errors"""
+    form = STEP_FORMS[step](request.POST, request.FILES, instance=profile)
+    if not form.is_valid():
+        # Errors will be displayed in the template
+        return form, None
+    
+    # Progress and completion flags go into the same UPDATE as the step fields,
+    # which only lists this step's columns
+    profile = form.save(commit=False)
+    if step > profile.step_completed:
+        profile.step_completed = step
+    if step == TOTAL_STEPS:
+        profile.is_complete = True
+        profile.submitted_at = timezone.now()
+    profile.save_section(step)
+    form.save_m2m()
+    
+    if step == TOTAL_STEPS:
+        messages.success(request, 'Profile completed successfully!')
+        return form, redirect('profile_complete')
+    
+    # Redirect to next step
+    messages.success(request, 'Step saved successfully!')
+    return form, redirect('profile_step', step=step + 1)
+
+
+def step_context(step, profile, form, experiences):
+    return {
+        'step': step,
+        'profile': profile,
+        'form': form,
+        'total_steps': TOTAL_STEPS,
+        'years': list(range(2018, 2029)),
+        'experiences': experiences,
+        'today': timezone.now().date(),
+        # Cache slot for the rendered form (students.render_cache)
+        'step_fragment': step_fragment(profile, step, form),
+    }
+
+
+def wants_fragment(request):
+    """step_base.html's script asks for step pages as fragments instead of redirects"""
+    return request.headers.get('X-Step-Fragment') == '1'
+
+
+def render_step_fragment(request, step, context):
+    """JSON with the step's content block (without the base.html chrome) and progress"""
+    return JsonResponse({
+        'html': render_to_string(STEP_TEMPLATES[step], {**context, 'step_chrome': STEP_FRAGMENT_TEMPLATE}, request),
+        'step': step,
+        'total_steps': TOTAL_STEPS,
+        'step_completed': context['profile'].step_completed,
+        'url': reverse('profile_step', kwargs={'step': step}),
+    })
+
+
+def next_step_fragment(request, profile, step, response):
+    """Fragment-mode reply to a saved step: the next step's form, or where to go after the last"""
+    if step == TOTAL_STEPS:
+        return JsonResponse({'redirect': response.url})
+    step += 1
+    profile.load_sections(step)
+    form = STEP_FORMS[step](instance=profile)
+    experiences = profile.experiences.all() if step == 2 else []
+    return render_step_fragment(request, step, step_context(step, profile, form, experiences))
+
+
+# Query budget per step request, not counting the session and auth lookups
+# (enforced by students.tests.ProfileStepQueryBudgetTests):
+#   GET   1 read of the profile's core and step columns, plus 1 for the
+#         experiences on step 2 unless its form is served from the render cache
+#   POST  1 read as above and 1 UPDATE, which carries the step's columns
+#         together with step_completed, is_complete and submitted_at
+# When the auth middleware co-loads the core columns with the user, the read
+# only fetches the step's columns.
 @login_required
 def profile_step(request, step):
     """Display and handle individual profile steps"""
     
     step = int(step)
-    if step < 1 or step > 8:
+    if step < 1 or step > TOTAL_STEPS:
         return redirect('profile_start')
     
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = get_user_profile(request, step)
     
     # Prevent skipping steps
     if step > profile.step_completed + 1:
         messages.warning(request, 'Please complete the previous steps first.')
         return redirect('profile_step', step=profile.step_completed + 1)
     
-    # Get the appropriate form class
-    form_classes = {
-        1: Step1BasicInfoForm,
-        2: Step2EducationForm,
-        3: Step3SkillsForm,
-        4: Step4CareerForm,
-        5: Step5AvailabilityForm,
-        6: Step6BehaviouralForm,
-        7: Step7TrainingForm,
-        8: Step8DocumentsForm,
-    }
-    
-    form_class = form_classes.get(step)
-    
     if request.method == 'POST':
-        form = form_class(request.POST, request.FILES, instance=profile)
-        if form.is_valid():
-            # Save the form
-            form.save()
-            
-            # Update step completed
-            if step > profile.step_completed:
-                profile.step_completed = step
-                profile.save()
-            
-            # If it's the last step, mark as complete
-            if step == 8:
-                profile.is_complete = True
-                profile.submitted_at = timezone.now()
-                profile.save()
-                messages.success(request, 'Profile completed successfully!')
-                return redirect('profile_complete')
-            
-            # Redirect to next step
-            messages.success(request, 'Step saved successfully!')
-            print('jjjjjj')
-            return redirect('profile_step', step=step + 1)
-        else:
-            # Form has validation errors
-            # Errors will be displayed in the template
-            pass
+        form, response = save_step(request, profile, step)
+        if response is not None:
+            if wants_fragment(request):
+                return next_step_fragment(request, profile, step, response)
+            return response
     else:
         # GET request - display the form
-        form = form_class(instance=profile)
-    
-    years = list(range(2018, 2029))
+        form = STEP_FORMS[step](instance=profile)
     
     # Get experiences for step 2
     experiences = []
     if step == 2:
         experiences = profile.experiences.all()
     
-    context = {
-        'step': step,
-        'profile': profile,
-        'form': form,
-        'total_steps': 8,
-        'years': years,
-        'experiences': experiences,
-        'today': timezone.now().date(),
-    }
-    
-    # Get template based on step
-    template_map = {
-        1: 'students/step1_basic.html',
-        2: 'students/step2_education.html',
-        3: 'students/step3_skills.html',
-        4: 'students/step4_career.html',
-        5: 'students/step5_availability.html',
-        6: 'students/step6_behavioural.html',
-        7: 'students/step7_training.html',
-        8: 'students/step8_documents.html',
-    }
-    
-    return render(request, template_map.get(step), context)
+    context = step_context(step, profile, form, experiences)
+    if wants_fragment(request):
+        return render_step_fragment(request, step, context)
+    return render(request, STEP_TEMPLATES[step], context)
+
+
+@login_required
+async def async_profile_step(request, step):
+    """profile_step for ASGI deployments (ASYNC_VIEWS)"""
+
+    step = int(step)
+    if step < 1 or step > TOTAL_STEPS:
+        return redirect('profile_start')
+
+    profile = await aget_user_profile(request, step)
+
+    if step > profile.step_completed + 1:
+        messages.warning(request, 'Please complete the previous steps first.')
+        return redirect('profile_step', step=profile.step_completed + 1)
+
+    if request.method == 'POST':
+        # Validation, file handling and the writes stay in one sync thread
+        form, response = await sync_to_async(save_step)(request, profile, step)
+        if response is not None:
+            if wants_fragment(request):
+                return await sync_to_async(next_step_fragment)(request, profile, step, response)
+            return response
+    else:
+        form = STEP_FORMS[step](instance=profile)
+
+    experiences = []
+    if step == 2:
+        experiences = [experience async for experience in profile.experiences.all()]
+
+    context = step_context(step, profile, form, experiences)
+    if wants_fragment(request):
+        return await sync_to_async(render_step_fragment)(request, step, context)
+    return await sync_to_async(render)(request, STEP_TEMPLATES[step], context)
 
 
 @login_required
 def profile_complete(request):
     """Display profile completion page"""
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = get_user_profile(request)
     
     if not profile.is_complete:
         return redirect('profile_step', step=profile.step_completed + 1)
@@ -126,7 +232,7 @@ def profile_start(request):
         return redirect('profile_complete')
     
     # Redirect to the next incomplete step
-    next_step = profile.step_completed + 1 if profile.step_completed < 8 else 1
+    next_step = profile.step_completed + 1 if profile.step_completed < TOTAL_STEPS else 1
     return redirect('profile_step', step=next_step)
 
 
@@ -150,8 +256,8 @@ def profile_start1(request):
     
     # Redirect to the next incomplete step
     next_step = profile.step_completed + 1
-    if next_step > 8:
-        next_step = 8
+    if next_step > TOTAL_STEPS:
+        next_step = TOTAL_STEPS
     
     return redirect('profile_step', step=next_step)
 
@@ -161,10 +267,10 @@ def profile_step1(request, step):
     """Display and handle individual profile steps"""
     
     step = int(step)
-    if step < 1 or step > 8:
+    if step < 1 or step > TOTAL_STEPS:
         return redirect('profile_start')
     
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = get_user_profile(request, step)
     
     # Prevent skipping steps
     if step > profile.step_completed + 1:
@@ -173,24 +279,11 @@ def profile_step1(request, step):
     context = {
         'step': step,
         'profile': profile,
-        'total_steps': 8,
+        'total_steps': TOTAL_STEPS,
         'years': years
     }
     
-    # Get template based on step
-    template_map = {
-        1: 'students/step1_basic.html',
-        2: 'students/step2_education.html',
-        3: 'students/step3_skills.html',
-        4: 'students/step4_career.html',
-        5: 'students/step5_availability.html',
-        6: 'students/step6_behavioural.html',
-        7: 'students/step7_training.html',
-        8: 'students/step8_documents.html',
-    }
-    
-
-    return render(request, template_map.get(step), context)
+    return render(request, STEP_TEMPLATES[step], context)
 
 
 @login_required
@@ -202,96 +295,20 @@ def save_step1(request):
         data = json.loads(request.body)
         step = int(data.get('step', 0))
         
-        profile = get_object_or_404(StudentProfile, user=request.user)
+        profile = get_user_profile(request)
+        
+        # Section fields present in the payload, converted by their model fields
+        profile.apply_section_data(step, data)
         
-        # Save data based on step
-        if step == 1:
-            # Basic Information
-            profile.full_name = data.get('full_name', '')
-            profile.gender = data.get('gender', '')
-            profile.date_of_birth = data.get('date_of_birth', '')
-            profile.current_city = data.get('current_city', '')
-            profile.current_state = data.get('current_state', '')
-            profile.preferred_languages = data.get('preferred_languages', [])
-            
-        elif step == 2:
-            # Education
-            profile.current_status = data.get('current_status', '')
-            profile.highest_qualification = data.get('highest_qualification', '')
-            profile.stream_specialization = data.get('stream_specialization', '')
-            profile.college_name = data.get('college_name', '')
-            profile.university = data.get('university', '')
-            profile.graduation_year = int(data.get('graduation_year', 2024))
-            profile.academic_scores = data.get('academic_scores', '')
-            profile.has_backlogs = data.get('has_backlogs', False)
-            profile.num_backlogs = int(data.get('num_backlogs', 0))
-            
-            # Handle experiences
-            experiences = data.get('experiences', [])
-            # Clear existing experiences
-            profile.experiences.all().delete()
-            # Create new ones
-            for exp in experiences:
-                Experience.objects.create(
-                    student_profile=profile,
-                    company_name=exp.get('company_name', ''),
-                    role=exp.get('role', ''),
-                    duration=exp.get('duration', ''),
-                    description=exp.get('description', '')
-                )
-            
-        elif step == 3:
-            # Skills
-            profile.english_speaking = int(data.get('english_speaking', 3))
-            profile.english_reading = int(data.get('english_reading', 3))
-            profile.english_writing = int(data.get('english_writing', 3))
-            profile.computer_skills = data.get('computer_skills', [])
-            profile.tool_exposure = data.get('tool_exposure', [])
-            profile.typing_speed = int(data.get('typing_speed', 0))
-            
-        elif step == 4:
-            # Career Preferences
-            profile.preferred_job_roles = data.get('preferred_job_roles', [])
-            profile.preferred_industries = data.get('preferred_industries', [])
-            profile.work_type = data.get('work_type', '')
-            profile.preferred_locations = data.get('preferred_locations', [])
-            profile.willing_to_relocate = data.get('willing_to_relocate', False)
-            profile.expected_salary = data.get('expected_salary', '')
-            
-        elif step == 5:
-            # Availability
-            profile.time_for_training = data.get('time_for_training', '')
-            profile.preferred_time_slots = data.get('preferred_time_slots', [])
-            profile.has_mobile_access = data.get('has_mobile_access', True)
-            profile.has_laptop_access = data.get('has_laptop_access', False)
-            profile.internet_quality = data.get('internet_quality', '')
-            profile.constraints = data.get('constraints', '')
-            
-        elif step == 6:
-            # Behavioural
-            profile.comfort_talking_strangers = int(data.get('comfort_talking_strangers', 3))
-            profile.comfort_handling_angry_customers = int(data.get('comfort_handling_angry_customers', 3))
-            profile.comfort_working_with_data = int(data.get('comfort_working_with_data', 3))
-            profile.comfort_following_targets = int(data.get('comfort_following_targets', 3))
-            profile.comfort_writing_emails = int(data.get('comfort_writing_emails', 3))
-            profile.people_vs_task_oriented = data.get('people_vs_task_oriented', '')
-            profile.office_vs_remote = data.get('office_vs_remote', '')
-            profile.analysis_vs_communication = data.get('analysis_vs_communication', '')
-            profile.career_concerns = data.get('career_concerns', [])
-            profile.career_goal_3_years = data.get('career_goal_3_years', '')
-            
-        elif step == 7:
-            # Training Info
-            profile.previous_training = data.get('previous_training', '')
-            profile.discovery_source = data.get('discovery_source', '')
-            profile.commitment_confirmed = data.get('commitment_confirmed', False)
-            profile.fee_preference = data.get('fee_preference', '')
+        if step == 2:
+            # Only the experiences that differ are written
+            Experience.sync_for_profile(profile, data.get('experiences', []))
         
         # Update step completed
         if step > profile.step_completed:
             profile.step_completed = step
         
-        profile.save()
+        profile.save_section(step)
         
         return JsonResponse({
             'success': True,
@@ -306,37 +323,180 @@ def save_step1(request):
         }, status=400)
 
 
+# Autosave: {"version": <profile updated_at>, "changes": {field: value}} holds
+# only the fields edited since the last autosave; on step 2 it may also carry
+# the full "experiences" list, of which only the differing rows are written
+# once every entry is valid.
+# 1 read of the profile's core and step columns, then 1 UPDATE of the changed
+# columns guarded by the version (no row lock); a stale version gets 409 and
+# writes nothing.
+@login_required
+@require_http_methods(["PATCH"])
+def profile_autosave(request, step):
+    """Validate and save the changed fields of a step"""
+    
+    try:
+        payload = json.loads(request.body)
+        changes = payload['changes']
+        version = parse_datetime(payload['version'])
+    except (ValueError, KeyError, TypeError):
+        version = None
+    if version is None or not isinstance(changes, dict):
+        return JsonResponse({'error': 'Expected {"version": ..., "changes": {...}}'}, status=400)
+    if step < 1 or step > TOTAL_STEPS:
+        raise Http404('No such step.')
+    
+    profile = get_user_profile(request, step)
+    if step > profile.step_completed + 1:
+        return JsonResponse({'error': 'Please complete the previous steps first.'}, status=403)
+    if profile.updated_at != version:
+        return JsonResponse({'error': 'Profile was changed elsewhere.'}, status=409)
+    
+    # Step 2 may carry the whole experiences list, synced row by row
+    experiences = changes.pop('experiences', None) if step == 2 else None
+    form = STEP_FORMS[step].for_changes(profile, changes)
+    form.is_valid()
+    errors = {name: list(field_errors) for name, field_errors in form.errors.items()}
+    for name in changes.keys() - form.fields.keys():
+        errors[name] = ['This field is not autosaved.']
+    saved = sorted(form.cleaned_data)
+    if experiences is not None:
+        # The list replaces the stored one, so it is only synced when every entry is valid
+        experiences, experience_errors = clean_experiences(experiences)
+        if experience_errors:
+            errors['experiences'] = experience_errors
+    
+    values = form.changed_columns()
+    if values or experiences is not None:
+        with transaction.atomic():
+            # The guarded UPDATE also moves the version when only experiences changed
+            if not profile.save_changes(values, version):
+                return JsonResponse({'error': 'Profile was changed elsewhere.'}, status=409)
+            if experiences is not None:
+                Experience.sync_for_profile(profile, experiences)
+                saved.append('experiences')
+        invalidate_profile_steps(profile.pk)
+    
+    return JsonResponse({
+        'version': profile.updated_at.isoformat(),
+        'saved': saved,
+        'errors': errors,
+    })
+
+
+# Offline sync: {"steps": {"<n>": {field: value, ...}}} carries complete drafts
+# of several steps (queued in the browser while offline). Each step is
+# validated with its form as if submitted in order; the valid ones are written
+# together: 1 read, 1 UPDATE of their sections and progress, plus the step-2
+# experiences, in one transaction. Documents (the last step) need an upload.
+@login_required
+@require_http_methods(["POST"])
+def profile_sync(request):
+    """Validate and save queued drafts of several steps in one request"""
+    
+    try:
+        drafts = {int(step): data for step, data in json.loads(request.body)['steps'].items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        drafts = None
+    if not drafts or not all(isinstance(data, dict) for data in drafts.values()):
+        return JsonResponse({'error': 'Expected {"steps": {"<step>": {...}}}'}, status=400)
+    
+    steps = sorted(step for step in drafts if 1 <= step < TOTAL_STEPS)
+    errors = {
+        str(step): {'__all__': ['This step cannot be saved offline.']}
+        for step in drafts if step not in steps
+    }
+    
+    profile = get_user_profile(request, *steps)
+    saved, experiences = [], None
+    for step in steps:
+        if step > profile.step_completed + 1:
+            errors[str(step)] = {'__all__': ['Please complete the previous steps first.']}
+            continue
+        form = STEP_FORMS[step](drafts[step], instance=profile)
+        step_errors = {} if form.is_valid() else {
+            name: list(field_errors) for name, field_errors in form.errors.items()
+        }
+        step_experiences = None
+        if step == 2 and 'experiences' in drafts[step]:
+            step_experiences, experience_errors = clean_experiences(drafts[step]['experiences'])
+            if experience_errors:
+                step_errors['experiences'] = experience_errors
+        if step_errors:
+            errors[str(step)] = step_errors
+            continue
+        form.save(commit=False)
+        if step > profile.step_completed:
+            profile.step_completed = step
+        if step_experiences is not None:
+            experiences = step_experiences
+        saved.append(step)
+    
+    if saved:
+        with transaction.atomic():
+            profile.save_section(*saved)
+            if experiences is not None:
+                Experience.sync_for_profile(profile, experiences)
+    
+    return JsonResponse({
+        'saved': saved,
+        'errors': errors,
+        'step_completed': profile.step_completed,
+        'version': profile.updated_at.isoformat(),
+    })
+
+
 @login_required
 def profile_review(request):
     """Review all entered data before final submission"""
     
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = get_user_profile(request)
     
     if profile.step_completed < 7:
         return redirect('profile_step', step=profile.step_completed + 1)
     
-    experiences = profile.experiences.all()
+    # Full row and experiences, from the snapshot cache while unchanged
+    snapshot = get_snapshot(profile)
     
     context = {
-        'profile': profile,
-        'experiences': experiences,
+        'profile': snapshot.profile,
+        'experiences': snapshot.experiences,
     }
     
     return render(request, 'students/review.html', context)
 
 
+@login_required
+async def async_profile_review(request):
+    """profile_review for ASGI deployments (ASYNC_VIEWS)"""
+
+    profile = await aget_user_profile(request)
+
+    if profile.step_completed < 7:
+        return redirect('profile_step', step=profile.step_completed + 1)
+
+    snapshot = await sync_to_async(get_snapshot)(profile)
+
+    context = {
+        'profile': snapshot.profile,
+        'experiences': snapshot.experiences,
+    }
+
+    return await sync_to_async(render)(request, 'students/review.html', context)
+
+
 @login_required
 @require_http_methods(["POST"])
 def profile_submit(request):
     """Final submission of profile"""
     
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = get_user_profile(request)
     
     # Mark as complete
     profile.is_complete = True
-    profile.step_completed = 8
+    profile.step_completed = TOTAL_STEPS
     profile.submitted_at = timezone.now()
-    profile.save()
+    profile.save(update_fields=PROGRESS_FIELDS)
     
     return JsonResponse({
         'success': True,
@@ -350,23 +510,39 @@ def dashboard(request):
     """User dashboard after profile completion"""
     
     try:
-        profile = StudentProfile.objects.get(user=request.user)
+        profile = get_profile(request.user)
     except StudentProfile.DoesNotExist:
         return redirect('profile_start')
     
     context = {
-        'profile': profile,
+        'profile': get_snapshot(profile).profile,
     }
     
     return render(request, 'students/dashboard.html', context)
 
 
+@login_required
+async def async_dashboard(request):
+    """dashboard for ASGI deployments (ASYNC_VIEWS)"""
+
+    try:
+        profile = await aget_profile(await request.auser())
+    except StudentProfile.DoesNotExist:
+        return redirect('profile_start')
+
+    context = {
+        'profile': (await sync_to_async(get_snapshot)(profile)).profile,
+    }
+
+    return await sync_to_async(render)(request, 'students/dashboard.html', context)
+
+
 @login_required
 @require_http_methods(["POST"])
 def upload_documents(request):
     """Handle document uploads"""
     
-    profile = get_object_or_404(StudentProfile, user=request.user)
+    profile = get_user_profile(request)
     
     if 'photo' in request.FILES:
         profile.photo = request.FILES['photo']
@@ -377,9 +553,107 @@ def upload_documents(request):
     if 'marksheet' in request.FILES:
         profile.marksheet = request.FILES['marksheet']
     
-    profile.save()
+    profile.save_section(8)
     
     return JsonResponse({
         'success': True,
         'message': 'Documents uploaded successfully'
-    })
\ No newline at end of file
+    })
+
+
+def upload_state(session):
+    return JsonResponse({
+        'id': str(session.pk),
+        'field': session.field,
+        'offset': session.offset,
+        'size': session.size,
+        'chunk_size': settings.UPLOAD_CHUNK_SIZE,
+        'url': reverse('upload_session', kwargs={'session_id': session.pk}),
+    }, status=201)
+
+
+# Resumable uploads (students.uploads): POST {"field", "filename", "content_type",
+# "size"} opens a session; each chunk is a PUT of raw bytes to its url with
+# Upload-Offset and Upload-Checksum (hex SHA-256) headers. A wrong offset gets
+# 409 with the session's offset, HEAD reports it in the same header, DELETE
+# abandons the upload. The chunk that completes the file attaches it.
+@login_required
+@require_http_methods(["POST"])
+def upload_session_create(request):
+    """Open a resumable upload of one document"""
+    
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Expected {"field", "filename", "content_type", "size"}'}, status=400)
+    
+    form = DocumentUploadForm(data)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    
+    session = open_upload(get_user_profile(request), **form.cleaned_data)
+    return upload_state(session)
+
+
+@login_required
+@require_http_methods(["HEAD", "PUT", "DELETE"])
+def upload_session(request, session_id):
+    """Receive a chunk of, report or abandon a resumable upload"""
+    
+    session = get_object_or_404(UploadSession, pk=session_id, student_profile__user=request.user)
+    
+    if request.method == 'HEAD':
+        response = HttpResponse()
+        response['Upload-Offset'] = session.offset
+        return response
+    if request.method == 'DELETE':
+        discard_upload(session)
+        return HttpResponse(status=204)
+    
+    try:
+        offset = int(request.headers['Upload-Offset'])
+        length = int(request.headers['Content-Length'])
+        checksum = request.headers['Upload-Checksum']
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Upload-Offset, Content-Length and Upload-Checksum are required.'}, status=400)
+    
+    try:
+        write_chunk(session, offset, length, checksum, request)
+    except UploadConflict:
+        session.refresh_from_db(fields=['offset'])
+        response = JsonResponse({'error': 'Offset does not match the upload.', 'offset': session.offset}, status=409)
+        response['Upload-Offset'] = session.offset
+        return response
+    except ChunkRejected as e:
+        # The chunk may be sent again
+        return JsonResponse({'error': str(e), 'offset': session.offset}, status=400)
+    
+    if session.is_complete:
+        try:
+            complete_upload(session, get_user_profile(request, 8))
+        except ChunkRejected as e:
+            # The file was refused and the session is gone
+            return JsonResponse({'error': str(e)}, status=400)
+    
+    response = JsonResponse({'offset': session.offset, 'complete': session.is_complete})
+    response['Upload-Offset'] = session.offset
+    return response
+
+
+# Everything under MEDIA_URL (students.media). Not @login_required: anyone who
+# may not see a file gets a 404 rather than a login redirect.
+@require_http_methods(["GET", "HEAD"])
+def media_file(request, name):
+    """Serve an uploaded file to its student or to staff"""
+    
+    if not can_access(request.user, name):
+        raise Http404('No such file.')
+    
+    field = 'resume' if name.startswith(f'{BLOB_PREFIX}/') else 'photo'
+    try:
+        return media_response(request, StudentProfile._meta.get_field(field).storage, name)
+    except (OSError, SuspiciousFileOperation):
+        raise Http404('No such file.')
+